@@ -0,0 +1,163 @@
+"""
+Бенчмарк пула соединений LLMTransport против локального стаб-сервера.
+
+Стаб отвечает на POST коротким JSON через `--server-ms` мс и держит
+keep-alive. Волны по `--concurrency` запросов с паузой `--gap` с между
+волнами, как ходы агентов, сравниваются для трех клиентов:
+1. новый httpx.AsyncClient на запрос - каждый раз TCP (и TLS) заново;
+2. один AsyncClient с настройками httpx по умолчанию (20 keep-alive
+   соединений, простой 5 с) - лишние соединения закрываются после волны;
+3. LLMTransport с лимитами из аргументов.
+Накладные расходы на запрос - средняя задержка минус `--server-ms`.
+С `--tls` стаб поднимается с самоподписанным сертификатом (нужен openssl).
+
+Запуск: python -m benchmarks.bench_http_transport [--concurrency 16] [--waves 6] [--gap 6] [--tls]
+"""
+import os
+import ssl
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Optional
+
+import httpx
+
+from src.core.agents.transport import LLMTransport, TransportStats
+
+BODY = b'{"message": {"role": "assistant", "content": "ok"}, "done": true}'
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, server_ms: float) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(server_ms / 1000)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(BODY)}\r\n\r\n".encode()
+                + BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def self_signed_context(workdir: str) -> ssl.SSLContext:
+    cert, key = os.path.join(workdir, "cert.pem"), os.path.join(workdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def traced(stats: TransportStats) -> dict:
+    async def attach_trace(request: httpx.Request) -> None:
+        request.extensions["trace"] = stats.trace
+    return {"event_hooks": {"request": [attach_trace]}}
+
+
+async def run_waves(args, url: str, call) -> list:
+    latencies = []
+
+    async def one():
+        started = time.perf_counter()
+        response = await call(url)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+    for wave in range(args.waves):
+        await asyncio.gather(*(one() for _ in range(args.concurrency)))
+        if args.gap and wave + 1 < args.waves:
+            await asyncio.sleep(args.gap)
+    return latencies
+
+
+def report(name: str, args, latencies: list, stats: TransportStats) -> float:
+    latencies.sort()
+    mean = sum(latencies) / len(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    overhead = (mean - args.server_ms / 1000) * 1000
+    print(
+        f"  {name:>18}: среднее {mean * 1000:7.2f} мс, p99 {p99 * 1000:7.2f} мс, "
+        f"накладные {overhead:6.2f} мс/запрос, новых соединений {stats.new_connections:5d}, "
+        f"TLS {stats.tls_handshakes:5d}"
+    )
+    return overhead
+
+
+async def bench(args) -> None:
+    workdir = tempfile.mkdtemp()
+    server_ssl: Optional[ssl.SSLContext] = self_signed_context(workdir) if args.tls else None
+    server = await asyncio.start_server(
+        lambda r, w: handle(r, w, args.server_ms), "127.0.0.1", 0, ssl=server_ssl, backlog=1024,
+    )
+    port = server.sockets[0].getsockname()[1]
+    url = f"{'https' if args.tls else 'http'}://127.0.0.1:{port}/api/chat"
+    verify = False
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "привет"}]}
+
+    print(f"{args.waves} волн по {args.concurrency} запросов, пауза {args.gap} с, "
+          f"сервер {args.server_ms} мс, {'TLS' if args.tls else 'без TLS'}:")
+    results = {}
+
+    stats = TransportStats()
+
+    async def per_request(url):
+        async with httpx.AsyncClient(verify=verify, **traced(stats)) as client:
+            return await client.post(url, json=payload)
+    latencies = await run_waves(args, url, per_request)
+    results["client per request"] = report("клиент на запрос", args, latencies, stats)
+
+    stats = TransportStats()
+    async with httpx.AsyncClient(verify=verify, **traced(stats)) as default_client:
+        latencies = await run_waves(args, url, lambda u: default_client.post(u, json=payload))
+    results["httpx defaults"] = report("httpx по умолчанию", args, latencies, stats)
+
+    transport = LLMTransport(
+        max_connections=args.max_connections,
+        max_keepalive_connections=args.max_keepalive,
+        keepalive_expiry=args.keepalive_expiry,
+        http2=False,
+    )
+    async with transport.client("stub", verify=verify) as pooled_client:
+        latencies = await run_waves(args, url, lambda u: pooled_client.post(u, json=payload))
+    pooled = transport._stats["stub"]
+    results["LLMTransport"] = report("LLMTransport", args, latencies, pooled)
+    print(f"  доля переиспользованных соединений LLMTransport: {pooled.as_dict()['reuse_rate']:.1%}")
+    print(f"  экономия против httpx по умолчанию: "
+          f"{results['httpx defaults'] - results['LLMTransport']:.2f} мс/запрос")
+    await transport.aclose()
+
+    server.close()
+    await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--waves", type=int, default=6)
+    parser.add_argument("--gap", type=float, default=6.0)
+    parser.add_argument("--server-ms", type=float, default=5.0)
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--max-keepalive", type=int, default=50)
+    parser.add_argument("--keepalive-expiry", type=float, default=300.0)
+    parser.add_argument("--tls", action="store_true")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Нагрузочный бенчмарк агентов на mock LLM - без GigaChat, Ollama и сети.
+
+Каждый ход клиента идет через MultiAgentChain.process: препроцессинг с
+загрузкой клиента и записью истории, research и диалог, если research не
+остановил его. Агенты - полный граф create_agent со всеми middleware
+(автоматы, ретраи, бюджет повторов), лимитерами и ретраями execute;
+отвечает GetMockLLM. Параметры mock из .env переопределяются аргументами.
+Накладные расходы конвейера - среднее время хода минус среднее время,
+проведенное в mock за ход (по `MockChatModel.stats()`).
+
+Нужен .env с MOCK_LLM_ENABLED=true и остальными обязательными настройками.
+Клиенты живут во временной SQLite, Redis не нужен; без стриминга и
+спекулятивного диалога, чекпоинтер - по USE_CHECKPOINTER.
+
+Запуск: python -m benchmarks.bench_mock_pipeline [--clients 32] [--turns 5]
+    [--latency-ms 300] [--distribution lognormal] [--jitter-ms 200] [--error-rate 0.05]
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+from langchain.messages import SystemMessage
+
+PHRASES = [
+    "Здравствуйте! Хотим чат-бота для записи клиентов в салон, сколько это будет стоить?",
+    "Нужна запись через Telegram и напоминания за день до визита, CRM у нас YCLIENTS.",
+    "А сколько по срокам? Хотим запуститься до конца месяца.",
+    "Бюджет около 150 тысяч, это реально?",
+]
+
+
+def percentile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def bench(args) -> None:
+    from data.init_configs import init, get_config
+    init()
+    if not get_config().MOCK_LLM_CONFIG.MOCK_LLM_ENABLED:
+        raise SystemExit("Включите MOCK_LLM_ENABLED=true - бенчмарк не должен ходить в сеть")
+
+    from chain import MultiAgentChain
+    from db.sqlite.crud import ClientSQL
+    from db.sqlite.manager import AsyncDatabaseManager
+    from db.sqlite.schemas import insert_client_sql
+    from src.enum.client import Source
+    from src.models.messages import BaseMessage
+    from src.models.research import ResearchResult
+    from src.core.agents.models.base import BaseLLM
+    from src.core.agents.llms.mock_llm import GetMockLLM
+    from src.core.agents.prompts import ResearchSystemPromptTemplate
+    from src.core.agents.agent_singleton import DialogAgent, ResearchAgent
+
+    mock = GetMockLLM().get_llm()
+    for field, value in (
+        ("latency_ms", args.latency_ms),
+        ("latency_jitter_ms", args.jitter_ms),
+        ("latency_distribution", args.distribution),
+        ("tokens_per_second", args.tokens_per_second),
+        ("error_rate", args.error_rate),
+    ):
+        if value is not None:
+            setattr(mock, field, value)
+
+    class ResearchMockLLM(BaseLLM):
+        # обертки BaseLLM - синглтоны: structured output research не должен попасть в диалог
+        offline = True
+
+        def get_llm(self):
+            return mock
+
+    dialog = DialogAgent(llm=GetMockLLM(), system_prompt=SystemMessage(content="Ты менеджер студии чат-ботов."))
+    research = ResearchAgent(
+        llm=ResearchMockLLM().with_structured_output(ResearchResult),
+        system_prompt=ResearchSystemPromptTemplate.get_system_prompt(),
+    )
+
+    manager = AsyncDatabaseManager(os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+    repo = ClientSQL(manager)
+    await repo.create_tables()
+    tg_ids = [1_000_000 + i for i in range(args.clients)]
+    # клиенты заведены заранее: ходы пишут историю через update_message_history
+    await manager.executemany(insert_client_sql(), [
+        {
+            "tg_id": tg_id, "message_history": json.dumps([]), "age": None, "full_name": None,
+            "username": None, "email": None, "tg_nick": None, "client_project_info": None,
+            "lead_status": "new",
+        }
+        for tg_id in tg_ids
+    ])
+    chain = MultiAgentChain(
+        db=repo,
+        dialog_llm=dialog,
+        research_llm=research,
+        speculative_dialog=False,
+        stream_dialog=False,
+    )
+    await chain.get_graph()
+
+    turns, failed = [], 0
+
+    async def client(tg_id: int) -> None:
+        nonlocal failed
+        for turn in range(args.turns):
+            message = BaseMessage(content=PHRASES[turn % len(PHRASES)], source=Source.CLIENT, tg_id=tg_id)
+            started = time.perf_counter()
+            try:
+                state = await chain.process(message)
+            except Exception:
+                failed += 1
+                continue
+            # узлы графа сами ловят ошибки агентов: ход без ответа, который research не останавливал, - сбой
+            if state.get("response") is None and (state.get("client_info") or {}).get("should_continue_dialog", True):
+                failed += 1
+                continue
+            turns.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(tg_id) for tg_id in tg_ids))
+    elapsed = time.perf_counter() - started
+    await manager.close()
+
+    turns.sort()
+    mock_stats = mock.stats()
+    calls = mock_stats["calls"]
+    mean_turn = sum(turns) / len(turns) if turns else 0.0
+    mean_model = mock_stats["mean_seconds"]
+    calls_per_turn = calls / (len(turns) + failed) if turns or failed else 0.0
+    print(
+        f"{args.clients} клиентов x {args.turns} ходов, mock: {mock.latency_distribution} "
+        f"{mock.latency_ms:g}±{mock.latency_jitter_ms:g} мс, {mock.tokens_per_second:g} токенов/с, "
+        f"ошибок {mock.error_rate:.0%}"
+    )
+    print(
+        f"  ходов {len(turns)} за {elapsed:.2f} с ({len(turns) / elapsed:.1f} ходов/с), ошибок {failed}; "
+        f"ход: среднее {mean_turn * 1000:.1f} мс, p50 {percentile(turns, 0.5) * 1000:.1f} мс, "
+        f"p99 {percentile(turns, 0.99) * 1000:.1f} мс"
+    )
+    print(
+        f"  вызовов mock {calls} ({calls_per_turn:.2f} на ход), задержка mock в среднем {mean_model * 1000:.1f} мс; "
+        f"накладные конвейера ~{(mean_turn - calls_per_turn * mean_model) * 1000:.1f} мс/ход"
+    )
+    print(f"  mock: {mock_stats}")
+    print(f"  лимитер диалога: {dialog.limiter_stats()}")
+    print(f"  лимитер research: {research.limiter_stats()}")
+    print(f"  автоматы: {get_config().MIDDLEWARE_SERVICE.breaker_stats()}")
+    print(f"  стадии: {chain.stage_stats()['stages']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=None)
+    parser.add_argument("--jitter-ms", type=float, default=None)
+    parser.add_argument("--distribution", default=None, choices=["fixed", "uniform", "normal", "lognormal", "exponential"])
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=None)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Бенчмарк семантического кэша DialogAgent.
+
+Индекс заполняется `--entries` случайными векторами, среди которых
+`--faq` "типовых вопросов". Запросы - наполовину перефразировки типовых
+вопросов (вектор вопроса плюс шум до косинуса ~`--paraphrase-cos`),
+наполовину новые вопросы. Печатает задержку поиска и долю попаданий.
+
+С `--model` (локальный путь к sentence-embedding модели) дополнительно
+меряет время кодирования и попадания на реальных перефразировках.
+
+Запуск: python -m benchmarks.bench_semantic_cache [--entries 100000] [--model PATH]
+"""
+import time
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+
+from src.core.agents.semantic_cache import SemanticCache, SentenceEmbedder, VectorIndex
+
+FAQ_PARAPHRASES = [
+    ("Сколько стоит разработка бота?", "Какая цена у разработки чат-бота?"),
+    ("Какие сроки разработки?", "За сколько времени вы сделаете проект?"),
+    ("Как проходит процесс работы?", "Расскажите, как у вас устроен процесс?"),
+    ("Можно ли оплатить частями?", "Есть ли оплата в рассрочку?"),
+    ("Вы даете гарантию?", "Какая гарантия на работу?"),
+]
+NOVEL_QUESTIONS = [
+    "Можно интегрировать бота с нашей CRM на 1С?",
+    "У вас есть офис в Казани?",
+    "Бот сможет принимать голосовые сообщения?",
+]
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def paraphrase(rng: np.random.Generator, vector: np.ndarray, cos: float) -> np.ndarray:
+    """Вектор с заданным косинусом к исходному"""
+    noise = rng.standard_normal(vector.shape).astype(np.float32)
+    noise = unit(noise - (noise @ vector) * vector)
+    return unit(cos * vector + np.sqrt(1 - cos ** 2) * noise)
+
+
+def percentile_ms(samples: list, q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def bench_index(args) -> None:
+    rng = np.random.default_rng(0)
+    path = f"{tempfile.mkdtemp()}/index" if args.mmap else None
+    index = VectorIndex(args.dim, max_entries=args.entries, path=path)
+
+    started = time.perf_counter()
+    vectors = unit(rng.standard_normal((args.entries, args.dim)).astype(np.float32))
+    for i, vector in enumerate(vectors):
+        index.add(vector, f"answer-{i}")
+    print(f"заполнение {args.entries} записей: {time.perf_counter() - started:.2f} с"
+          f"{' (memmap)' if args.mmap else ''}")
+
+    faq = rng.choice(args.entries, size=args.faq, replace=False)
+    hits, false_hits, latencies = 0, 0, []
+    for i in range(args.queries):
+        if i % 2 == 0:
+            target = int(faq[i // 2 % args.faq])
+            query = paraphrase(rng, vectors[target], args.paraphrase_cos)
+        else:
+            target = None
+            query = unit(rng.standard_normal(args.dim).astype(np.float32))
+
+        started = time.perf_counter()
+        score, payload = index.search(query, k=1)[0]
+        latencies.append(time.perf_counter() - started)
+
+        if score >= args.threshold:
+            if target is not None and payload == f"answer-{target}":
+                hits += 1
+            else:
+                false_hits += 1
+
+    print(f"поиск top-1: p50 {percentile_ms(latencies, 50):.2f} мс, "
+          f"p99 {percentile_ms(latencies, 99):.2f} мс")
+    print(f"попадания по перефразировкам: {hits / (args.queries / 2):.1%}, "
+          f"ложные попадания: {false_hits / args.queries:.2%} (порог {args.threshold})")
+
+
+async def bench_model(args) -> None:
+    embedder = SentenceEmbedder(args.model)
+    cache = SemanticCache(
+        embedder=embedder,
+        index=VectorIndex(embedder.dim, max_entries=args.entries),
+        threshold=args.threshold,
+    )
+
+    filler = np.random.default_rng(0).standard_normal(
+        (args.entries - len(FAQ_PARAPHRASES), embedder.dim)
+    ).astype(np.float32)
+    for i, vector in enumerate(unit(filler)):
+        cache._index.add(vector, f"filler-{i}")
+    for question, _ in FAQ_PARAPHRASES:
+        await cache.store(question, f"ответ: {question}")
+
+    latencies = []
+    for _, rephrased in FAQ_PARAPHRASES:
+        started = time.perf_counter()
+        await cache.lookup(rephrased)
+        latencies.append(time.perf_counter() - started)
+    for question in NOVEL_QUESTIONS:
+        await cache.lookup(question)
+
+    stats = cache.stats()
+    print(f"модель {args.model}: кодирование+поиск p50 {percentile_ms(latencies, 50):.1f} мс")
+    print(f"попаданий {stats['hits']} из {len(FAQ_PARAPHRASES)} перефразировок, "
+          f"промахов {stats['misses']} (из них {len(NOVEL_QUESTIONS)} новых вопросов)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--faq", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--threshold", type=float, default=0.92)
+    parser.add_argument("--paraphrase-cos", type=float, default=0.95)
+    parser.add_argument("--mmap", action="store_true")
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    bench_index(args)
+    if args.model:
+        asyncio.run(bench_model(args))
+
+
+if __name__ == "__main__":
+    main()
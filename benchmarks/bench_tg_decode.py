@@ -0,0 +1,76 @@
+"""
+Микробенчмарк разбора обновления Telegram в вебхуке.
+
+Сравнивает прежний путь (json -> TelegramUpdate с dict-полями -> ручной
+разбор -> валидируемый BaseMessage) с типизированным разбором сырого тела.
+
+Запуск: python -m benchmarks.bench_tg_decode [--n 100000]
+"""
+import json
+import argparse
+import datetime
+import timeit
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from src.enum.client import Source
+from src.models.messages import BaseMessage
+from src.models.telegram import TelegramUpdate, to_base_message
+
+RAW_UPDATE = json.dumps({
+    "update_id": 123456789,
+    "message": {
+        "message_id": 42,
+        "from": {
+            "id": 555000111, "is_bot": False, "first_name": "Иван",
+            "username": "ivan", "language_code": "ru", "is_premium": False,
+        },
+        "chat": {"id": 555000111, "first_name": "Иван", "username": "ivan", "type": "private"},
+        "date": 1760000000,
+        "text": "Здравствуйте, сколько стоит разработка бота?",
+    },
+}, ensure_ascii=False).encode()
+
+
+class LegacyTelegramUpdate(BaseModel):
+    update_id: int
+    message: Optional[dict] = Field(default=None)
+    edited_message: Optional[dict] = Field(default=None)
+    channel_post: Optional[dict] = Field(default=None)
+
+
+def legacy_decode(raw: bytes) -> BaseMessage:
+    update = LegacyTelegramUpdate(**json.loads(raw))
+    message = update.message or update.edited_message or update.channel_post
+    user_info: dict = message.get("from", {})
+    from_info: dict = message.get('from', {})
+    return BaseMessage(
+        timestamp=datetime.datetime.fromtimestamp(
+            message.get("date", datetime.datetime.now().timestamp())
+        ),
+        source=Source.CLIENT,
+        content=message.get("text", ""),
+        tg_nick=from_info.get('username', ""),
+        tg_id=user_info.get("id"),
+    )
+
+
+def typed_decode(raw: bytes) -> BaseMessage:
+    return to_base_message(TelegramUpdate.model_validate_json(raw).payload)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100_000)
+    args = parser.parse_args()
+
+    legacy, typed = legacy_decode(RAW_UPDATE), typed_decode(RAW_UPDATE)
+    assert (legacy.tg_id, legacy.content, legacy.tg_nick) == (typed.tg_id, typed.content, typed.tg_nick)
+
+    for name, func in (("legacy", legacy_decode), ("typed", typed_decode)):
+        best = min(timeit.repeat(lambda: func(RAW_UPDATE), number=args.n, repeat=5))
+        print(f"{name:>8}: {best / args.n * 1e6:8.2f} мкс/обновление")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Бенчмарк общего контекста хода (TurnContext).
+
+1. CPU: прежняя сборка промпта дважды за ход (диалог и research, каждый
+   со своими json.dumps профиля и конвертацией истории) против одной
+   сборки TurnContext, переиспользуемой вторым агентом.
+2. Стабильность префикса: сколько токенов промпта хода совпадает
+   с началом промпта прошлого хода при скользящем окне (шаг 1) и при
+   сдвиге окна блоками. Совпавший префикс провайдер с KV-кэшем
+   (Ollama с keep_alive) не пересчитывает; оценка времени - по
+   `--eval-tps` токенов/с prompt eval. С `--ollama-model` время prompt
+   eval меряется на локальном Ollama.
+
+Запуск: python -m benchmarks.bench_turn_context [--history 400] [--budget 3000]
+"""
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+from src.enum.client import Source
+from src.models.messages import BaseMessage
+from src.models.client_model import ClientModel
+from src.core.agents.context import HISTORY_FIELDS, TokenCounter, TurnContext, fit_history
+
+PHRASES = [
+    "Здравствуйте! Хотим чат-бота для записи клиентов в салон, сколько это будет стоить?",
+    "Добрый день! Стоимость зависит от интеграций: календарь, CRM, оплата. Какие нужны вам?",
+    "Нужна запись через Telegram и напоминания за день до визита, CRM у нас YCLIENTS.",
+    "Понял. Интеграция с YCLIENTS у нас готовая, срок около трех недель. Бюджет обсудим?",
+]
+
+
+def make_client(history: int) -> ClientModel:
+    started = datetime(2026, 1, 1)
+    return ClientModel(
+        tg_id=555000111,
+        tg_nick="ivan",
+        full_name="Иван Петров",
+        client_project_info="Чат-бот записи в салон красоты с YCLIENTS",
+        lead_status="qualified",
+        message_history=[
+            BaseMessage(
+                content=PHRASES[i % len(PHRASES)],
+                source=Source.CLIENT if i % 2 == 0 else Source.AGENT,
+                timestamp=started + timedelta(minutes=i),
+            )
+            for i in range(history)
+        ],
+    )
+
+
+def legacy_build(client: ClientModel, message: BaseMessage, budget, counter: TokenCounter) -> list:
+    """Сборка промпта до TurnContext: профиль и история заново у каждого агента"""
+    from langchain.messages import SystemMessage, HumanMessage
+
+    client_json = json.dumps(
+        client.model_dump(exclude_none=True, exclude=HISTORY_FIELDS),
+        ensure_ascii=False,
+        indent=2,
+    )
+    profile = SystemMessage(content=f"Данные клиента:\n{client_json}, история сообщений асисстента и клиента далее.")
+    history_budget = None
+    if budget is not None:
+        history_budget = max(0, budget - counter.count(profile.content) - counter.count(message.content))
+    return [
+        profile,
+        *fit_history(client.message_history, budget=history_budget, counter=counter),
+        HumanMessage(content=message.content),
+    ]
+
+
+def render(messages: list) -> str:
+    return "".join(f"<{type(msg).__name__}>{msg.content}" for msg in messages)
+
+
+def common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def bench_cpu(args, counter: TokenCounter) -> None:
+    client = make_client(args.history)
+    message = BaseMessage(content="А можно добавить онлайн-оплату?", source=Source.CLIENT, tg_id=client.tg_id)
+    legacy_build(client, message, args.budget, counter)  # прогрев кэша токенов
+
+    started = time.perf_counter()
+    for _ in range(args.turns):
+        legacy_build(client, message, args.budget, counter)
+        legacy_build(client, message, args.budget, counter)
+    legacy = (time.perf_counter() - started) / args.turns
+
+    started = time.perf_counter()
+    for _ in range(args.turns):
+        ctx = TurnContext(message, window_step=args.window_step, counter=counter)
+        ctx.build(client, args.budget)
+        ctx.build(client, args.budget)
+    shared = (time.perf_counter() - started) / args.turns
+
+    print(f"CPU сборки промптов за ход ({args.history} сообщений, бюджет {args.budget}):")
+    print(f"  {'legacy x2':>14}: {legacy * 1e3:8.3f} мс")
+    print(f"  {'TurnContext':>14}: {shared * 1e3:8.3f} мс  (-{(1 - shared / legacy):.0%})")
+
+
+def bench_prefix(args, counter: TokenCounter) -> dict:
+    results = {}
+    for step in (1, args.window_step):
+        client = make_client(args.history)
+        previous, reused, total = None, 0, 0
+        for turn in range(args.turns):
+            message = BaseMessage(content=f"Вопрос {turn}: а что по срокам?", source=Source.CLIENT)
+            prompt = render(TurnContext(message, window_step=step, counter=counter).build(client, args.budget))
+            tokens = counter.count(prompt)
+            if previous is not None:
+                reused += counter.count(prompt[:common_prefix(previous, prompt)])
+                total += tokens
+            previous = prompt
+            client.message_history.append(message)
+            client.message_history.append(BaseMessage(content=PHRASES[turn % len(PHRASES)], source=Source.AGENT))
+        results[step] = (reused / total if total else 0.0, total / max(1, args.turns - 1))
+
+    print(f"Префикс, совпадающий с прошлым ходом ({args.turns} ходов):")
+    for step, (share, avg_tokens) in results.items():
+        saved = share * avg_tokens / args.eval_tps
+        print(f"  шаг окна {step:>2}: {share:6.1%} из ~{avg_tokens:.0f} токенов, "
+              f"prompt eval -{saved:.2f} с/ход при {args.eval_tps} ток/с")
+    return results
+
+
+def bench_ollama(args, counter: TokenCounter) -> None:
+    import httpx
+
+    for step in (1, args.window_step):
+        client = make_client(args.history)
+        durations = []
+        for turn in range(min(args.turns, 6)):
+            message = BaseMessage(content=f"Вопрос {turn}: а что по срокам?", source=Source.CLIENT)
+            messages = TurnContext(message, window_step=step, counter=counter).build(client, args.budget)
+            response = httpx.post(
+                f"{args.ollama_url}/api/chat",
+                json={
+                    "model": args.ollama_model,
+                    "stream": False,
+                    "keep_alive": "30m",
+                    "options": {"num_predict": 1},
+                    "messages": [
+                        {"role": {"SystemMessage": "system", "HumanMessage": "user"}.get(type(msg).__name__, "assistant"),
+                         "content": msg.content}
+                        for msg in messages
+                    ],
+                },
+                timeout=300,
+            ).json()
+            if turn:
+                durations.append(response.get("prompt_eval_duration", 0) / 1e9)
+            client.message_history.append(message)
+            client.message_history.append(BaseMessage(content=PHRASES[turn % len(PHRASES)], source=Source.AGENT))
+        print(f"  Ollama шаг окна {step:>2}: prompt eval {sum(durations) / max(1, len(durations)):.2f} с/ход")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=400)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--window-step", type=int, default=8)
+    parser.add_argument("--eval-tps", type=float, default=300.0)
+    parser.add_argument("--ollama-model", default=None)
+    parser.add_argument("--ollama-url", default="http://localhost:11434")
+    args = parser.parse_args()
+
+    counter = TokenCounter()
+    bench_cpu(args, counter)
+    bench_prefix(args, counter)
+    if args.ollama_model:
+        bench_ollama(args, counter)
+
+
+if __name__ == "__main__":
+    main()
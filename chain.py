@@ -1,16 +1,32 @@
+import time
+import asyncio
+from collections import defaultdict
 from loguru import logger
-from typing import TypedDict, Literal
+from typing import TypedDict, Literal, Optional
 from IPython.display import Image, display
+from pydantic import BaseModel
 from langgraph.graph import StateGraph, END
 
 from src.models.client_model import ClientModel, to_client_model
-from src.models.messages import BaseMessage
+from src.models.messages import BaseMessage, merge_messages
+from data.init_configs import get_config
 from src.app.telegram_queue import telegram_event_queue
+from src.app.worker_pool import UserWorkerPool
+from src.app.prefetch import ClientPrefetcher
+from src.app.fair_scheduler import UserRateLimiter
+from src.app.reply_streamer import ReplyStreamer
+from src.app.summarizer import HistorySummarizer
+from src.app.routers.router_models import TelegramSender
+from src.factories.checkpointer_factory import CheckpointerFactory
 from src.core.agents.models.base import BaseAgentSingleton
+from src.core.agents.limiter import limiter_stats
+from src.core.agents.transport import LLMTransport
+from utils.deadline import deadline_scope, get_retry_budget
 from db.database import database, Database, ClientBase
 
 class State(TypedDict):
     message: BaseMessage | None
+    burst: list[BaseMessage] | None
     client_info: dict | None
     preprocessed_data: dict | None
     response: str | None
@@ -32,6 +48,9 @@ class MultiAgentChain:
         db: Database | ClientBase,
         dialog_llm: BaseAgentSingleton,
         research_llm: BaseAgentSingleton,
+        speculative_dialog: Optional[bool] = None,
+        stream_dialog: Optional[bool] = None,
+        summary_llm: Optional[BaseAgentSingleton] = None,
     ):
         if self._initialized:
             return
@@ -39,12 +58,65 @@ class MultiAgentChain:
         self.db = db
         self.dialog_llm = dialog_llm  
         self.research_llm = research_llm  
+        self.worker_pool: Optional[UserWorkerPool] = None
+        self._graph = None
+        self._checkpointer = None
+        self._graph_lock = asyncio.Lock()
+        self._invocations = 0
+        self._invocation_seconds = 0.0
+
+        self._prefetcher = ClientPrefetcher(lambda tg_id: self._repo().get_client(tg_id))
+        self._history_writes: dict[int | str, asyncio.Task] = {}
+        self._stage_seconds: defaultdict[str, float] = defaultdict(float)
+        self._stage_counts: defaultdict[str, int] = defaultdict(int)
+        self._overlap_saved = 0.0
+
+        base_config = get_config().BASE_CONFIG
+        if stream_dialog is None:
+            stream_dialog = base_config.STREAM_DIALOG
+        self._stream = stream_dialog
+        self._sender = TelegramSender()
+        self._chat_limiter = UserRateLimiter(
+            per_minute=60 / base_config.STREAM_EDIT_INTERVAL_SECONDS, burst=1,
+        )
+        self._bot_limiter = UserRateLimiter(
+            per_minute=base_config.STREAM_BOT_EDITS_PER_SECOND * 60,
+            burst=max(1, int(base_config.STREAM_BOT_EDITS_PER_SECOND)),
+        )
+        self._ttft_seconds = 0.0
+        self._ttft_max = 0.0
+        self._ttft_count = 0
+        self._stream_edits = 0
+        self._stream_skipped = 0
+
+        self._summarizer: Optional[HistorySummarizer] = None
+        if summary_llm is not None:
+            self._summarizer = HistorySummarizer(
+                summary_llm,
+                self._repo,
+                keep_recent=base_config.SUMMARY_KEEP_RECENT,
+                fold_batch=base_config.SUMMARY_FOLD_BATCH,
+                concurrency=base_config.SUMMARY_CONCURRENCY,
+            )
+
+        if speculative_dialog is None:
+            speculative_dialog = base_config.SPECULATIVE_DIALOG
+        if speculative_dialog and stream_dialog:
+            # спекулятивный ответ нельзя показывать до решения research
+            logger.warning("SPECULATIVE_DIALOG не совместим со STREAM_DIALOG и отключен")
+            speculative_dialog = False
+        self._speculative = speculative_dialog
+        self._speculative_dialogs: dict[int | str, tuple[asyncio.Task, float]] = {}
+        self._speculation: defaultdict[str, int] = defaultdict(int)
+        self._speculation_saved = 0.0
         self._initialized = True
         logger.info("MultiAgentChain инициализирован")
 
     async def waiting_new_message(self, state: State) -> State:
         logger.info("Агент ожидает новое сообщение...")
         item: BaseMessage = await telegram_event_queue.get()
+        # в режиме цикла граф не возвращает управление, подтверждаем сразу
+        await telegram_event_queue.ack(item)
         logger.info(f'Получено сообщение от пользователя: {item.tg_id}')
 
         return {
@@ -53,6 +125,50 @@ class MultiAgentChain:
             "should_continue": True
         }
 
+    def _repo(self) -> ClientBase:
+        return self.db.get() if isinstance(self.db, Database) else self.db
+
+    def _record_stage(self, stage: str, seconds: float) -> None:
+        self._stage_seconds[stage] += seconds
+        self._stage_counts[stage] += 1
+
+    async def _write_history(
+        self, repo: ClientBase, client_model: ClientModel, is_new: Optional[bool]
+    ) -> float:
+        """
+        Сохранение истории клиента, возвращает длительность записи
+
+        is_new=None - неизвестно, есть ли клиент в БД: сначала перезаписываем
+        историю, при отсутствии строки создаем клиента
+        """
+        started = time.perf_counter()
+        try:
+            if is_new:
+                await repo.add_client(client_model)
+            else:
+                updated = await repo.update_message_history(
+                    tg_id=client_model.tg_id, 
+                    history=client_model.message_history
+                )
+                if not updated and is_new is None:
+                    await repo.add_client(client_model)
+        except Exception as exp:
+            logger.error(f"Ошибка при сохранении истории клиента {client_model.tg_id}: {exp}")
+        elapsed = time.perf_counter() - started
+        self._record_stage("history_write", elapsed)
+        return elapsed
+
+    async def _commit_history(self, tg_id: int | str) -> None:
+        """Дождаться фоновой записи истории, учитывая время, скрытое за LLM"""
+        write = self._history_writes.pop(tg_id, None)
+        if write is None:
+            return
+
+        started = time.perf_counter()
+        write_seconds = await write
+        waited = time.perf_counter() - started
+        self._overlap_saved += max(0.0, write_seconds - waited)
+
     async def preprocessing_message(self, state: State) -> State:
         logger.info("Начало препроцессинга сообщения")
 
@@ -62,31 +178,40 @@ class MultiAgentChain:
             return {**state, "should_continue": False}
 
         try:
-            repo = self.db.get() if isinstance(self.db, Database) else self.db
+            repo = self._repo()
         except Exception as exp:
             logger.error(f"Ошибка доступа к базе данных: {exp}")
             return {**state, "should_continue": False}
 
-        # Получаем модель клиента из базы
+        # при склейке пачки в историю пишем каждое сообщение отдельно
+        incoming = state.get("burst") or [message]
+
+        # Получаем модель клиента из базы (или из предзагрузки пула)
         client_model = None
+        started = time.perf_counter()
         try:
-            client_model = await repo.get_client(message.tg_id)
-            if client_model is None:
+            client_model = await self._prefetcher.take(message.tg_id)
+            is_new = client_model is None
+            if is_new:
                 client_model = ClientModel(
                     tg_id=getattr(message, "tg_id", message.tg_id),
                     tg_nick=getattr(message, "tg_nick", None)
                 )
-                client_model.add_message(message)
-                await repo.add_client(client_model)
-            else:
-                client_model.add_message(message)
-                await repo.update_message_history(
-                    tg_id=client_model.tg_id, 
-                    history=client_model.message_history
-                )  
+            for msg in incoming:
+                await client_model.add_message(msg)
         except Exception as exp:
             logger.error(f"Ошибка при получении данных клиента: {exp}")
             return {**state, "should_continue": False}
+        self._record_stage("client_load", time.perf_counter() - started)
+
+        # запись истории идет параллельно с research и дожидается в research_message
+        self._history_writes[message.tg_id] = asyncio.create_task(
+            self._write_history(repo, client_model, is_new)
+        )
+
+        if self.worker_pool is not None:
+            # следующие ходы клиента планируются по его актуальному статусу лида
+            self.worker_pool.set_priority(client_model.tg_id, client_model.lead_status)
 
         preprocessed_data = {
             "client_data": client_model,
@@ -101,23 +226,197 @@ class MultiAgentChain:
             "should_continue": True
         }
 
-    async def build_workflow(self) -> StateGraph:
-        """Построение workflow графа"""
+    def _start_speculative_dialog(self, client_model: ClientModel, message: BaseMessage) -> None:
+        """
+        Запустить диалог параллельно с research, решение о нем примет research_message
+
+        Отмена прерывает только LLM-вызов: сообщения, которые агент успел
+        запланировать инструментами до отмены, не отзываются.
+        """
+        self._speculation["started"] += 1
+        task = asyncio.create_task(self._timed_dialog(client_model, message))
+        # ошибка отброшенного диалога никому не нужна, но должна быть прочитана
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._speculative_dialogs[message.tg_id] = (task, time.perf_counter())
+
+    async def _timed_dialog(self, client_model: ClientModel, message: BaseMessage) -> tuple:
+        """Ответ диалога и момент его готовности"""
+        response = await self.dialog_llm.execute(client_model, message)
+        return response, time.perf_counter()
+
+    def _discard_speculative_dialog(self, tg_id: int | str, reason: str) -> None:
+        speculative = self._speculative_dialogs.pop(tg_id, None)
+        if speculative is None:
+            return
+        task, _ = speculative
+        task.cancel()
+        self._speculation[reason] += 1
+        logger.info(f"Спекулятивный диалог для {tg_id} отброшен: {reason}")
+
+    async def research_message(self, state: State) -> State:
+        logger.info("Начало research сообщения")
+
+        message = state.get("message")
+        preprocessed_data = state.get("preprocessed_data")
+        if not state.get("should_continue") or not preprocessed_data:
+            return {**state, "should_continue": False}
+
+        client_model: ClientModel = preprocessed_data["client_data"]
+
+        if message.tg_id not in self._history_writes:
+            # прогон продолжен с чекпоинта препроцессинга: его фоновая запись могла
+            # не дойти до БД. История в состоянии полная, перезапись идемпотентна
+            self._history_writes[message.tg_id] = asyncio.create_task(
+                self._write_history(self._repo(), client_model, is_new=None)
+            )
+
+        if self._speculative:
+            # инструменты диалога пишут в ту же строку клиента - сначала фиксируем историю
+            await self._commit_history(message.tg_id)
+            self._start_speculative_dialog(client_model, message)
+
+        started = time.perf_counter()
+        research = None
+        try:
+            research = await self.research_llm.execute(client_model, message)
+        except Exception as exp:
+            logger.error(f"Ошибка research для пользователя {message.tg_id}: {exp}")
+        finally:
+            self._record_stage("research", time.perf_counter() - started)
+            # до диалога история должна быть в БД - инструменты агента пишут туда же
+            await self._commit_history(message.tg_id)
+
+        if research is None:
+            # без research все равно отвечаем клиенту
+            return {**state, "should_continue": True}
+
+        should_continue = getattr(research, "should_continue_dialog", True)
+        if not should_continue:
+            self._discard_speculative_dialog(message.tg_id, "discarded")
+            self._schedule_summary(client_model)
+
+        updates = {
+            field: value
+            for field in ("lead_status", "client_project_info")
+            if (value := getattr(research, field, None)) is not None
+            and value != getattr(client_model, field)
+        }
+        if updates:
+            try:
+                await self._repo().update_client_fields(client_model.tg_id, **updates)
+                client_model = client_model.model_copy(update=updates)
+                # диалог видел старый профиль клиента - переспрашиваем с новым
+                self._discard_speculative_dialog(message.tg_id, "reruns")
+            except Exception as exp:
+                logger.error(f"Ошибка при обновлении клиента {client_model.tg_id}: {exp}")
+
+        return {
+            **state,
+            "client_info": research.model_dump() if isinstance(research, BaseModel) else research,
+            "preprocessed_data": {**preprocessed_data, "client_data": client_model},
+            "should_continue": should_continue,
+        }
+
+    def should_continue_processing(self, state: State) -> str:
+        if state.get("should_continue"):
+            return "continue_dialog"
+        logger.info("Research решил не продолжать диалог")
+        return "waiting_new_message"
+
+    async def continue_dialog(self, state: State) -> State:
+        logger.info("Продолжение диалога")
+
+        message = state.get("message")
+        client_model: ClientModel = state["preprocessed_data"]["client_data"]
+
+        started = time.perf_counter()
+        speculative = self._speculative_dialogs.pop(message.tg_id, None)
+        try:
+            if speculative is not None:
+                task, speculative_started = speculative
+                response, finished = await task
+                self._speculation["hits"] += 1
+                # диалог шел параллельно с research до конца research или до своего ответа,
+                # что наступило раньше: экономия - min(research, диалог)
+                self._speculation_saved += min(finished, started) - speculative_started
+            elif self._stream:
+                response = await self._stream_dialog(client_model, message, started)
+            else:
+                response = await self.dialog_llm.execute(client_model, message)
+        except Exception as exp:
+            logger.error(f"Ошибка диалога для пользователя {message.tg_id}: {exp}")
+            return {**state, "response": None, "should_continue": False}
+        finally:
+            self._record_stage("dialog", time.perf_counter() - started)
+            self._schedule_summary(client_model)
+
+        return {
+            **state,
+            "response": getattr(response, "content", response),
+            "should_continue": True,
+        }
+
+    async def _stream_dialog(self, client_model: ClientModel, message: BaseMessage, started: float):
+        """Диалог с потоковой отправкой ответа клиенту по мере генерации"""
+        streamer = ReplyStreamer(
+            self._sender,
+            message.tg_id,
+            chat_limiter=self._chat_limiter,
+            bot_limiter=self._bot_limiter,
+            first_tokens=get_config().BASE_CONFIG.STREAM_FIRST_TOKENS,
+        )
+        try:
+            response = await self.dialog_llm.execute_stream(client_model, message, streamer.update)
+            await streamer.finish(getattr(response, "content", None))
+            return response
+        finally:
+            self._stream_edits += streamer.edits
+            self._stream_skipped += streamer.skipped
+            if streamer.first_visible_at is not None:
+                ttft = streamer.first_visible_at - started
+                self._ttft_seconds += ttft
+                self._ttft_max = max(self._ttft_max, ttft)
+                self._ttft_count += 1
+
+    def _schedule_summary(self, client_model: ClientModel) -> None:
+        """Свернуть старую историю клиента в резюме после хода, в фоне"""
+        if self._summarizer is not None:
+            self._summarizer.schedule(client_model)
+
+    def after_dialog(self, state: State) -> str:
+        return "waiting_new_message"
+
+    async def build_workflow(self, *, from_queue: bool = True) -> StateGraph:
+        """
+        Построение workflow графа
+
+        Args:
+            from_queue: True - граф сам забирает сообщения из telegram_event_queue
+                и крутится бесконечно, False - граф обрабатывает одно сообщение
+                из state["message"] и завершается (для пула воркеров)
+        """
         logger.info("Построение workflow")
         
         builder = StateGraph(State)
 
+        # после обработки сообщения либо ждем следующее, либо завершаемся
+        next_message = 'waiting_new_message' if from_queue else END
+
         # Добавляем узлы
-        builder.add_node('waiting_new_message', self.waiting_new_message)
+        if from_queue:
+            builder.add_node('waiting_new_message', self.waiting_new_message)
         builder.add_node('preprocessing_message', self.preprocessing_message)
         builder.add_node('research_message', self.research_message)
         builder.add_node('continue_dialog', self.continue_dialog)
 
         # Устанавливаем точку входа
-        builder.set_entry_point('waiting_new_message')
+        if from_queue:
+            builder.set_entry_point('waiting_new_message')
+            builder.add_edge('waiting_new_message', 'preprocessing_message')
+        else:
+            builder.set_entry_point('preprocessing_message')
 
         # Добавляем edges (переходы между узлами)
-        builder.add_edge('waiting_new_message', 'preprocessing_message')
         builder.add_edge('preprocessing_message', 'research_message')
         
         # Условный переход после research
@@ -126,7 +425,7 @@ class MultiAgentChain:
             self.should_continue_processing,
             {
                 "continue_dialog": "continue_dialog",
-                "waiting_new_message": "waiting_new_message"
+                "waiting_new_message": next_message
             }
         )
         
@@ -134,35 +433,285 @@ class MultiAgentChain:
             'continue_dialog',
             self.after_dialog,
             {
-                "waiting_new_message": "waiting_new_message",
+                "waiting_new_message": next_message,
                 END: END
             }
         )
 
         logger.info("Workflow построен успешно")
-        return builder.compile()
+        # бесконечный граф с очередью не чекпоинтим - его тред рос бы без конца
+        return builder.compile(
+            checkpointer=None if from_queue else self._checkpointer
+        )
     
-    async def run(self):
-        """Запуск бесконечного цикла обработки сообщений"""
-        logger.info("Запуск MultiAgentChain")
-        graph = await self.build_workflow()
-        
-        initial_state: State = {
-            "message": None,
-            "tg_id": None,
-            "client_info": None,
-            "preprocessed_data": None,
-            "response": None,
-            "should_continue": True
+    async def get_graph(self):
+        """Скомпилированный граф обработки одного сообщения, собирается один раз"""
+        if self._graph is not None:
+            return self._graph
+        async with self._graph_lock:
+            if self._graph is None:
+                db_config = get_config().DB_CONFIG
+                if db_config.USE_CHECKPOINTER:
+                    self._checkpointer = await CheckpointerFactory.create(db_config)
+                self._graph = await self.build_workflow(from_queue=False)
+        return self._graph
+
+    @staticmethod
+    def _thread_config(message: BaseMessage) -> dict:
+        """Детерминированный thread_id: повторная доставка того же сообщения продолжит его прогон"""
+        thread_id = f"tg:{message.tg_id}:{int(message.timestamp.timestamp() * 1000)}"
+        return {"configurable": {"thread_id": thread_id}}
+
+    async def _finish_thread(self, config: dict) -> None:
+        if self._checkpointer is not None:
+            await self._checkpointer.adelete_thread(config["configurable"]["thread_id"])
+
+    async def resume_interrupted(self) -> int:
+        """
+        Довести до конца прогоны, прерванные остановкой процесса
+
+        Завершенные треды удаляются в process(), поэтому все оставшиеся
+        в checkpointer'е - незавершенные. Прогон продолжается с узла,
+        следующего за последним сохраненным (например, без повторного research).
+
+        Прогоны, чьи сообщения очередь доставит повторно (Redis Streams),
+        здесь не запускаются: тред с тем же thread_id продолжит process()
+        при повторной доставке, а тред пользователя, чьи сообщения вернутся
+        другой пачкой, удаляется - иначе ход выполнился бы дважды.
+
+        Returns:
+            Количество продолженных прогонов
+        """
+        graph = await self.get_graph()
+        if self._checkpointer is None:
+            return 0
+
+        thread_ids = set()
+        async for checkpoint in self._checkpointer.alist(None):
+            thread_ids.add(checkpoint.config["configurable"]["thread_id"])
+        if not thread_ids:
+            return 0
+
+        pending = await telegram_event_queue.pending()
+        redelivered = {self._thread_config(item)["configurable"]["thread_id"] for item in pending}
+        pending_users = {str(item.tg_id) for item in pending}
+
+        resumed = 0
+        for thread_id in thread_ids:
+            config = {"configurable": {"thread_id": thread_id}}
+            if thread_id in redelivered:
+                logger.info(f"Прогон {thread_id} продолжится при повторной доставке сообщения")
+                continue
+            if thread_id.split(":")[1] in pending_users:
+                logger.info(f"Прогон {thread_id} заменит повторная доставка сообщений пользователя")
+                await self._finish_thread(config)
+                continue
+            try:
+                snapshot = await graph.aget_state(config)
+                if snapshot.next:
+                    logger.info(f"Продолжение прогона {thread_id} с узла {snapshot.next}")
+                    await graph.ainvoke(None, config=config)
+                    resumed += 1
+            except Exception as exp:
+                logger.error(f"Не удалось продолжить прогон {thread_id}: {exp}")
+            await self._finish_thread(config)
+
+        if resumed:
+            logger.info(f"Продолжено прерванных прогонов: {resumed}")
+        return resumed
+
+    async def process(self, message: BaseMessage | list[BaseMessage]) -> State:
+        """
+        Обработка одного сообщения без очереди
+
+        Args:
+            message: Входящее сообщение клиента или пачка сообщений одного
+                клиента, которая обрабатывается как один ход диалога
+
+        Returns:
+            Итоговое состояние графа
+        """
+        graph = await self.get_graph()
+
+        burst = message if isinstance(message, list) else None
+        if burst:
+            message = merge_messages(burst)
+            logger.info(f"Склеено {len(burst)} сообщений от {message.tg_id}")
+
+        config = self._thread_config(message)
+        started = time.perf_counter()
+        deadline = message.deadline
+        deadline_seconds = get_config().BASE_CONFIG.MESSAGE_DEADLINE_SECONDS
+        if deadline is None and deadline_seconds:
+            deadline = time.time() + deadline_seconds
+        get_retry_budget().on_message()
+
+        # дедлайн виден всем узлам графа, агентам, инструментам и отправке
+        try:
+            with deadline_scope(deadline):
+                snapshot = await graph.aget_state(config) if self._checkpointer is not None else None
+                if snapshot is not None and snapshot.next:
+                    # сообщение доставлено повторно после рестарта - продолжаем с места остановки
+                    logger.info(f"Продолжение прогона {config['configurable']['thread_id']}")
+                    result = await graph.ainvoke(None, config=config)
+                else:
+                    result = await graph.ainvoke({
+                        "message": message,
+                        "burst": burst,
+                        "client_info": None,
+                        "preprocessed_data": None,
+                        "response": None,
+                        "should_continue": True
+                    }, config=config)
+        except asyncio.CancelledError:
+            # прогон, прерванный остановкой, продолжит resume_interrupted
+            raise
+        except Exception:
+            # упавший прогон не должен перезапускаться на каждом старте
+            await self._finish_thread(config)
+            raise
+        await self._finish_thread(config)
+        elapsed = time.perf_counter() - started
+
+        self._invocations += 1
+        self._invocation_seconds += elapsed
+        logger.info(f"Сообщение от {message.tg_id} обработано за {elapsed:.3f}s")
+        return result
+
+    def invocation_stats(self) -> dict:
+        """Количество и средняя длительность вызовов process()"""
+        return {
+            "invocations": self._invocations,
+            "total_seconds": self._invocation_seconds,
+            "avg_seconds": (
+                self._invocation_seconds / self._invocations if self._invocations else 0.0
+            ),
         }
-        
-        while True:
+
+    async def run(self, workers: Optional[int] = None):
+        """
+        Запуск обработки сообщений пулом воркеров
+
+        Args:
+            workers: Количество одновременно обслуживаемых пользователей,
+                по умолчанию WORKER_POOL_SIZE из BASE_CONFIG
+        """
+        logger.info("Запуск MultiAgentChain")
+        base_config = get_config().BASE_CONFIG
+        await self.get_graph()
+        await self.resume_interrupted()
+
+        self.worker_pool = UserWorkerPool(
+            self.process,
+            source=telegram_event_queue,
+            workers=workers or base_config.WORKER_POOL_SIZE,
+            max_pending=base_config.MAX_PENDING_MESSAGES,
+            debounce_seconds=base_config.DEBOUNCE_SECONDS,
+            max_burst=base_config.MAX_BURST_MESSAGES,
+            max_pending_per_user=base_config.MAX_PENDING_PER_USER,
+            priority_weights=base_config.PRIORITY_WEIGHTS,
+            rate_per_minute=base_config.USER_RATE_LIMIT_PER_MINUTE,
+            rate_burst=base_config.USER_RATE_BURST,
+            on_ready=self._prefetcher.prefetch,
+        )
+        self.worker_pool.start()
+        try:
+            await self.worker_pool.join()
+        finally:
+            await self.worker_pool.stop()
+
+    async def shutdown(self, deadline: Optional[float] = None) -> bool:
+        """
+        Плавная остановка: дождаться начатых сообщений, но не дольше дедлайна
+
+        Прерванные по дедлайну прогоны остаются в checkpointer'е и будут
+        продолжены при следующем запуске.
+
+        Args:
+            deadline: Секунды ожидания, по умолчанию SHUTDOWN_DEADLINE_SECONDS
+
+        Returns:
+            True если все начатые сообщения успели завершиться
+        """
+        if self.worker_pool is None:
+            return True
+        if deadline is None:
+            deadline = get_config().BASE_CONFIG.SHUTDOWN_DEADLINE_SECONDS
+        drained = await self.worker_pool.drain(deadline)
+        if self._summarizer is not None:
             try:
-                result = await graph.ainvoke(initial_state)
-                logger.info(f"Итерация завершена: {result}")
-            except Exception as e:
-                logger.error(f"Ошибка в workflow: {e}")
-                continue
+                await asyncio.wait_for(self._summarizer.stop(), timeout=deadline)
+            except asyncio.TimeoutError:
+                logger.warning("Сворачивание истории не завершилось до дедлайна")
+
+        # индекс семантического кэша на диске переживает рестарт
+        flush = getattr(self.dialog_llm, "flush_semantic_cache", None)
+        if flush is not None:
+            await asyncio.to_thread(flush)
+        await LLMTransport.from_config().aclose()
+        return drained
+
+    def stage_stats(self) -> dict:
+        """Среднее время стадий и время записи в БД, скрытое за LLM-вызовами"""
+        return {
+            "stages": {
+                stage: {
+                    "count": self._stage_counts[stage],
+                    "avg_seconds": self._stage_seconds[stage] / self._stage_counts[stage],
+                }
+                for stage in self._stage_seconds
+            },
+            "overlap_saved_seconds": self._overlap_saved,
+            "prefetch": self._prefetcher.stats(),
+        }
+
+    def speculation_stats(self) -> dict:
+        """Доля спекулятивных диалогов, которые пригодились, и сэкономленное время"""
+        started = self._speculation["started"]
+        return {
+            "started": started,
+            "hits": self._speculation["hits"],
+            "discarded": self._speculation["discarded"],
+            "reruns": self._speculation["reruns"],
+            "hit_rate": self._speculation["hits"] / started if started else 0.0,
+            "latency_saved_seconds": self._speculation_saved,
+        }
+
+    def stream_stats(self) -> dict:
+        """Время до первого видимого клиенту текста и число правок сообщений"""
+        return {
+            "enabled": self._stream,
+            "replies": self._ttft_count,
+            "ttft_avg_seconds": self._ttft_seconds / self._ttft_count if self._ttft_count else 0.0,
+            "ttft_max_seconds": self._ttft_max,
+            "edits": self._stream_edits,
+            "edits_skipped": self._stream_skipped,
+        }
+
+    def summary_stats(self) -> dict:
+        """Сколько сворачиваний истории в резюме выполнено в фоне"""
+        if self._summarizer is None:
+            return {}
+        return self._summarizer.stats()
+
+    def pool_stats(self) -> dict:
+        """Утилизация воркеров относительно текущих лимитов LLM-бэкендов"""
+        if self.worker_pool is None:
+            return {}
+        limiters = limiter_stats()
+        return {
+            **self.worker_pool.stats(
+                max_concurrent=max(
+                    (stats["limit"] for stats in limiters.values()),
+                    default=get_config().BASE_CONFIG.MAX_CONCURRENT_EXECUTE,
+                )
+            ),
+            "limiters": limiters,
+            "hedging": get_config().MIDDLEWARE_SERVICE.hedge_stats(),
+            "breakers": get_config().MIDDLEWARE_SERVICE.breaker_stats(),
+            "transport": get_config().MIDDLEWARE_SERVICE.transport_stats(),
+            "retries": get_retry_budget().stats(),
+        }
     
     async def show_workflow(self):
         graph = await self.build_workflow()
@@ -179,5 +728,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
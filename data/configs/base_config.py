@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv, find_dotenv
 
@@ -9,6 +10,72 @@ class BaseConfig(BaseSettings):
     BACKOFF: float
     ATTEMPS_FOR_RETRY: int
     MAX_CONCURRENT_EXECUTE: int
+    # адаптивный лимит на бэкенд стартует с MAX_CONCURRENT_EXECUTE
+    LIMITER_MIN_CONCURRENCY: int = 1
+    LIMITER_MAX_CONCURRENCY: int = 64
+    LIMITER_LATENCY_TOLERANCE: float = 2.0
+    LIMITER_BACKOFF: float = 0.7
+    LIMITER_QUEUE_TIMEOUT_SECONDS: float = 0.0
+    # дублирование медленных запросов к модели на запасной бэкенд
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 0.95
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_WINDOW: int = 200
+    # автомат на LLM-бэкенд: разомкнутые бэкенды пропускаются в цепочке запасных
+    BREAKER_ENABLED: bool = True
+    BREAKER_WINDOW: int = 20
+    BREAKER_MIN_CALLS: int = 5
+    BREAKER_ERROR_RATE: float = 0.5
+    BREAKER_SLOW_CALL_SECONDS: float = 0.0
+    BREAKER_OPEN_SECONDS: float = 30.0
+    BREAKER_HALF_OPEN_PROBES: int = 1
+    # дедлайн сообщения от вебхука, 0 - без дедлайна; повторы всех слоев - из общего бюджета
+    MESSAGE_DEADLINE_SECONDS: float = 0.0
+    RETRY_BUDGET_RATIO: float = 0.5
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    RETRY_BUDGET_MAX_TOKENS: float = 100.0
+    WORKER_POOL_SIZE: int = 4
+    MAX_PENDING_MESSAGES: int = 1000
+    QUEUE_BACKEND: str = "memory"
+    ADMISSION_MAX_WAIT_SECONDS: float = 0.05
+    OVERLOAD_POLICY: str = "reject"
+    DEBOUNCE_SECONDS: float = 0.0
+    MAX_BURST_MESSAGES: int = 5
+    MAX_PENDING_PER_USER: int = 50
+    PRIORITY_WEIGHTS: Dict[str, int] = {"high": 4, "normal": 2, "low": 1}
+    USER_RATE_LIMIT_PER_MINUTE: float = 0.0
+    USER_RATE_BURST: int = 5
+    SHUTDOWN_DEADLINE_SECONDS: float = 30.0
+    SPECULATIVE_DIALOG: bool = False
+    STREAM_DIALOG: bool = False
+    STREAM_FIRST_TOKENS: int = 8
+    STREAM_EDIT_INTERVAL_SECONDS: float = 1.0
+    STREAM_BOT_EDITS_PER_SECOND: float = 25.0
+
+    # TTL кэша ответов по имени класса агента, 0 - кэш выключен
+    AGENT_CACHE_TTL: Dict[str, int] = {}
+    AGENT_CACHE_MAX_ENTRIES: int = 1024
+    AGENT_CACHE_USE_REDIS: bool = False
+
+    # бюджет токенов промпта по имени класса агента, нет значения - вся история
+    PROMPT_TOKEN_BUDGET: Dict[str, int] = {}
+    PROMPT_TOKEN_ENCODING: str = "cl100k_base"
+    PROMPT_WINDOW_STEP: int = 8
+    SUMMARY_KEEP_RECENT: int = 10
+    SUMMARY_FOLD_BATCH: int = 10
+    # потолок одновременных сворачиваний: свой лимитер, не лимитер бэкенда
+    SUMMARY_CONCURRENCY: int = 2
+
+    # семантический кэш DialogAgent, пустой путь к модели - кэш выключен
+    SEMANTIC_CACHE_MODEL_PATH: str = ""
+    SEMANTIC_CACHE_INDEX_PATH: str = ""
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 100_000
+    SEMANTIC_CACHE_MAX_HISTORY: int = 2
+
+    DEDUP_CACHE_SIZE: int = 10_000
+    DEDUP_USE_REDIS: bool = False
+    DEDUP_TTL_SECONDS: int = 3600
 
     BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     model_config = SettingsConfigDict(
@@ -13,6 +13,8 @@ class DBConfig(BaseSettings):
     DB_PASSWORD: str
     SQLITE_PATH: str
     DB_DEBUG: bool = False
+    USE_CHECKPOINTER: bool = True
+    CHECKPOINT_SQLITE_PATH: str = "checkpoints.sqlite"
 
     BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     UPLOAD_DIR: str = os.path.join(BASE_DIR, 'app/uploads')
@@ -10,6 +10,11 @@ class BaseLLMConfig(BaseSettings):
     VERBOSE: bool
     TIMEOUT: int
     TOP_P: float
+    # общий пул соединений HTTP-клиентов LLM
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 300.0
+    HTTP2: bool = True
 
     BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     model_config = SettingsConfigDict(
@@ -1,12 +1,17 @@
 import pkgutil
 import importlib
-from typing import List
+from typing import Dict, List, Optional
 from loguru import logger
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from src.core.agents.models.base import BaseLLM
+from src.core.agents.hedging import HedgingMiddleware
+from src.core.agents.breaker import BreakerFallbackMiddleware, breaker_stats, get_breaker, register_backend
+from src.core.agents.retry import BudgetedToolRetryMiddleware
+from src.core.agents.limiter import LimiterMiddleware
+from src.core.agents.transport import LLMTransport
+from langchain_core.language_models import BaseChatModel
 from langchain.agents.middleware.types import AgentMiddleware
-from langchain.agents.middleware.tool_retry import ToolRetryMiddleware
 from langchain.agents.middleware.model_fallback import ModelFallbackMiddleware
 
 
@@ -34,6 +39,8 @@ class MiddlewareService:
         if self._initialized:
             return
         self._middleware_lst: List[AgentMiddleware] = []
+        self._hedging: Optional[HedgingMiddleware] = None
+        self._models: Dict[str, BaseChatModel] = {}
         self._initialized = False  
 
     def _append_middleware(self, base_config) -> List[AgentMiddleware]:
@@ -55,10 +62,14 @@ class MiddlewareService:
         if loaded_modules:
             logger.info(f'Загружено LLM модулей: {", ".join(loaded_modules)}')
 
-        # Получаем все подклассы BaseLLM
-        llm_classes = BaseLLM.__subclasses__()
+        # Получаем все подклассы BaseLLM: с mock - только бэкенды без сети, иначе только сетевые
+        from data.init_configs import get_config
+        offline = get_config().MOCK_LLM_CONFIG.MOCK_LLM_ENABLED
+        llm_classes = [cls for cls in BaseLLM.__subclasses__() if cls.offline == offline]
         if not llm_classes:
             raise RuntimeError("Нет зарегистрированных LLM классов")
+        if offline:
+            logger.warning('⚠ Включен mock LLM: запросы к GigaChat/Ollama не отправляются')
             
         logger.info(f'Найдено LLM классов: {[cls.__name__ for cls in llm_classes]}')
         
@@ -69,6 +80,9 @@ class MiddlewareService:
                 wrapper = llm_class()
                 llm = wrapper.get_llm()
                 llm_instances.append(llm)
+                self._models[llm_class.__name__] = llm
+                register_backend(llm_class.__name__, llm)
+                get_breaker(llm_class.__name__)
                 logger.success(f'  ✓ {llm_class.__name__}')
             except Exception as e:
                 logger.error(f'  ✗ Ошибка инициализации {llm_class.__name__}: {e}')
@@ -79,22 +93,66 @@ class MiddlewareService:
         logger.info(f'Инициализировано {len(llm_instances)} LLM')
         
         # Добавление middleware
+        if base_config.HEDGE_ENABLED and not base_config.BREAKER_ENABLED:
+            # только BreakerFallbackMiddleware не шлет fallback на бэкенд, занятый дублем
+            logger.warning("HEDGE_ENABLED требует BREAKER_ENABLED и отключен")
+        elif base_config.HEDGE_ENABLED and len(llm_instances) > 1:
+            # снаружи fallback: дублированный запрос тоже проходит цепочку запасных моделей
+            self._hedging = HedgingMiddleware(
+                *llm_instances[::-1],
+                percentile=base_config.HEDGE_PERCENTILE,
+                min_samples=base_config.HEDGE_MIN_SAMPLES,
+                window=base_config.HEDGE_WINDOW,
+            )
+            self._middleware_lst.append(self._hedging)
+            logger.success(f'✓ HedgingMiddleware (p{base_config.HEDGE_PERCENTILE * 100:g})')
+
+        fallback_cls = BreakerFallbackMiddleware if base_config.BREAKER_ENABLED else ModelFallbackMiddleware
         self._middleware_lst.append(
-            ModelFallbackMiddleware(*llm_instances[::-1])
+            fallback_cls(*llm_instances[::-1])
         )
-        logger.success(f'✓ ModelFallbackMiddleware ({len(llm_instances)} моделей)')
+        logger.success(f'✓ {fallback_cls.__name__} ({len(llm_instances)} моделей)')
+
+        # внутри fallback: слот и замер AIMD - у бэкенда, который реально вызван
+        self._middleware_lst.append(LimiterMiddleware())
+        logger.success('✓ LimiterMiddleware')
 
         self._middleware_lst.append(
-            ToolRetryMiddleware(
+            BudgetedToolRetryMiddleware(
                 backoff_factor=base_config.BACKOFF,
                 max_retries=base_config.ATTEMPS_FOR_RETRY
             )
         )
-        logger.success(f'✓ ToolRetryMiddleware (retries={base_config.ATTEMPS_FOR_RETRY})')
+        logger.success(f'✓ BudgetedToolRetryMiddleware (retries={base_config.ATTEMPS_FOR_RETRY})')
         
         self._initialized = True
         return self._middleware_lst
 
+    def chat_model(self, llm: BaseLLM | BaseChatModel) -> BaseChatModel:
+        """Модель обертки BaseLLM; если ее бэкенд не активен (например, включен mock) - первая из активных"""
+        if not isinstance(llm, BaseLLM):
+            return llm
+        model = self._models.get(llm.__class__.__name__)
+        if model is None:
+            if not self._models:
+                raise RuntimeError(
+                    "Middleware не инициализированы. Вызовите init() из data.init_configs"
+                )
+            model = next(iter(self._models.values()))
+        return model
+
+    def hedge_stats(self) -> dict:
+        """Доля дублированных запросов, победы запасного бэкенда и потраченные впустую токены"""
+        return self._hedging.stats() if self._hedging else {}
+
+    def transport_stats(self) -> dict:
+        """Запросы, новые соединения и доля переиспользования по бэкендам"""
+        return LLMTransport.from_config().stats()
+
+    def breaker_stats(self) -> dict:
+        """Состояние автоматов LLM-бэкендов"""
+        return breaker_stats()
+
     @property
     def middlewares(self) -> List[AgentMiddleware]:
         """Получение списка middleware"""
@@ -0,0 +1,35 @@
+import os
+from typing import Any, Dict, List, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from dotenv import load_dotenv, find_dotenv
+
+from src.enum.llm import LatencyDistribution
+
+load_dotenv(find_dotenv())
+
+class MockLLMConfig(BaseSettings):
+    # вместо GigaChat/Ollama работает только mock - граф агентов идет без сети
+    MOCK_LLM_ENABLED: bool = False
+    # шаблоны текстовых ответов, {message} - последнее сообщение клиента
+    MOCK_LLM_ANSWERS: List[str] = ["Спасибо за сообщение! Вы написали: {message}"]
+    # значения полей structured output, остальные поля - по схеме
+    MOCK_LLM_STRUCTURED_ANSWER: Dict[str, Any] = {}
+    # задержка до первого токена
+    MOCK_LLM_LATENCY_DISTRIBUTION: LatencyDistribution = LatencyDistribution.FIXED
+    MOCK_LLM_LATENCY_MS: float = 300.0
+    MOCK_LLM_LATENCY_JITTER_MS: float = 0.0
+    # скорость генерации, 0 - ответ целиком сразу после задержки
+    MOCK_LLM_TOKENS_PER_SECOND: float = 0.0
+    # доли вызовов с ошибкой и с зависанием на TIMEOUT секунд
+    MOCK_LLM_ERROR_RATE: float = 0.0
+    MOCK_LLM_TIMEOUT_RATE: float = 0.0
+    # доля ходов, начинающихся с вызова инструмента; пустой список - любой из привязанных
+    MOCK_LLM_TOOL_CALL_RATE: float = 0.0
+    MOCK_LLM_TOOLS: List[str] = []
+    MOCK_LLM_SEED: Optional[int] = None
+
+    BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    model_config = SettingsConfigDict(
+        env_file=os.path.join(BASE_DIR, ".env"),
+        env_file_encoding="utf-8",
+    )
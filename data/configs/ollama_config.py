@@ -6,6 +6,8 @@ load_dotenv(find_dotenv())
 
 class OllamaConfig(BaseSettings):
     OLLAMA_MODEL: str
+    # модель и ее KV-кэш остаются в памяти между ходами - общий префикс промпта не пересчитывается
+    OLLAMA_KEEP_ALIVE: str = "30m"
     
     BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     model_config = SettingsConfigDict(
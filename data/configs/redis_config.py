@@ -1,4 +1,5 @@
 import os
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv, find_dotenv
 
@@ -8,6 +9,15 @@ class RedisSettings(BaseSettings):
     REDIS_PORT: int
     REDIS_PASSWORD: str
     REDIS_HOST: str
+
+    # входящая очередь на Redis Streams (QUEUE_BACKEND=redis)
+    REDIS_STREAM_NAME: str = "tg:events"
+    REDIS_STREAM_GROUP: str = "agents"
+    REDIS_STREAM_CONSUMER: Optional[str] = None
+    REDIS_STREAM_PARTITIONS: int = 1
+    REDIS_STREAM_OWNED_PARTITIONS: Optional[List[int]] = None
+    REDIS_STREAM_MAXLEN: int = 100_000
+    REDIS_STREAM_CLAIM_IDLE_MS: int = 60_000
     BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     
     model_config = SettingsConfigDict(
@@ -27,8 +27,10 @@ class ConfigRegistry:
         self._base_llm_config = None
         self._ollama_config = None
         self._giga_chat_config = None
+        self._mock_llm_config = None
         
         # с зависимостями
+        self._redis_config = None
         self._redis_client = None
         self._celery_app = None
         self._middleware_service = None
@@ -43,6 +45,7 @@ class ConfigRegistry:
         from data.configs.llm_config import BaseLLMConfig
         from data.configs.ollama_config import OllamaConfig
         from data.configs.gigachat_config import GigaChatConfig
+        from data.configs.mock_llm_config import MockLLMConfig
 
         self._base_config = BaseConfig()
         logger.success('✓ BASE_CONFIG инициализирован')
@@ -62,6 +65,9 @@ class ConfigRegistry:
         self._giga_chat_config = GigaChatConfig()
         logger.success('✓ GIGA_CHAT_CONFIG инициализирован')
 
+        self._mock_llm_config = MockLLMConfig()
+        logger.success('✓ MOCK_LLM_CONFIG инициализирован')
+
     def _init_redis(self):
         """Инициализация Redis и Celery"""
         from data.configs.redis_config import RedisSettings
@@ -69,6 +75,7 @@ class ConfigRegistry:
         from celery import Celery
 
         settings = RedisSettings()
+        self._redis_config = settings
         redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOST}:{settings.REDIS_PORT}/0"
 
         self._celery_app = Celery("celery_worker", broker=redis_url, backend=redis_url)
@@ -175,6 +182,16 @@ class ConfigRegistry:
         self._check_initialized()
         return self._giga_chat_config
 
+    @property
+    def MOCK_LLM_CONFIG(self):
+        self._check_initialized()
+        return self._mock_llm_config
+
+    @property
+    def REDIS_CONFIG(self):
+        self._check_initialized()
+        return self._redis_config
+
     @property
     def redis_client(self):
         self._check_initialized()
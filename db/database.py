@@ -1,5 +1,5 @@
 import logging
-from data.init_configs import DB_CONFIG
+from data.init_configs import get_config
 
 from db.database_protocol import ClientBase
 from db.sqlite.manager import AsyncDatabaseManager
@@ -15,8 +15,9 @@ class Database:
         self.logger = logging.getLogger(self.__class__.__name__)
     
     async def setup(self):
-        if DB_CONFIG.DB_TYPE == "sqlite":
-            self.sqlite_manager = AsyncDatabaseManager(DB_CONFIG.SQLITE_PATH)
+        db_config = get_config().DB_CONFIG
+        if db_config.DB_TYPE == "sqlite":
+            self.sqlite_manager = AsyncDatabaseManager(db_config.SQLITE_PATH)
             await self.sqlite_manager.connect()
             
             self.repo: ClientBase = ClientFactory.create(
@@ -24,7 +25,7 @@ class Database:
                 self.sqlite_manager
             )
             await self.repo.create_tables()
-            self.logger.info(f"✅ SQLite подключена: {DB_CONFIG.SQLITE_PATH}")
+            self.logger.info(f"✅ SQLite подключена: {db_config.SQLITE_PATH}")
         else:
             self.sqlalchemy_manager = SQLAlchemyManager()
             self.sqlalchemy_manager.init()
@@ -35,8 +36,9 @@ class Database:
                 DatabaseType.SQLALCHEMY, 
                 session
             )
+            await self.repo.create_tables()
 
-            db_url = DB_CONFIG.url
+            db_url = db_config.url
             safe_url = db_url.split('@')[1] if '@' in db_url else db_url
             self.logger.info(f"✅ PostgreSQL подключена: {safe_url}")
     
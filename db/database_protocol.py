@@ -1,4 +1,5 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
 from abc import ABC, abstractmethod
 
 from src.models.client_model import ClientModel
@@ -27,6 +28,11 @@ class ClientBase(ABC):
         """Получить всех клиентов"""
         ...
 
+    @abstractmethod
+    def iter_clients(self, batch_size: int = 500, after_tg_id: Optional[int] = None) -> AsyncIterator[List[ClientModel]]:
+        """Клиенты страницами по возрастанию tg_id, начиная после after_tg_id"""
+        ...
+
     @abstractmethod
     async def client_exists(self, tg_id: int) -> bool:
         """Проверить существование клиента"""
@@ -34,17 +40,22 @@ class ClientBase(ABC):
 
     @abstractmethod
     async def update_client_fields(self, tg_id: int, **fields) -> bool:
-        """Обновить произвольные поля клиента"""
+        """Обновить произвольные поля клиента одним запросом; False, если клиента нет"""
+        ...
+
+    @abstractmethod
+    async def update_clients_fields(self, updates: Dict[int, dict]) -> int:
+        """Обновить поля многих клиентов одной транзакцией, вернуть число обновленных"""
         ...
 
     @abstractmethod
     async def update_lead_status(self, tg_id: int, new_status: str) -> bool:
-        """Обновить статус лида"""
+        """Обновить статус лида; False, если клиента нет"""
         ...
 
     @abstractmethod
     async def update_project_info(self, tg_id: int, project_info: str) -> bool:
-        """Обновить информацию о проекте"""
+        """Обновить информацию о проекте; False, если клиента нет"""
         ...
 
     @abstractmethod
@@ -54,7 +65,18 @@ class ClientBase(ABC):
 
     @abstractmethod
     async def update_message_history(self, tg_id: int, history: List[BaseMessage]) -> bool:
-        """Обновить всю историю сообщений"""
+        """Заменить всю историю сообщений одним запросом; False, если клиента нет"""
+        ...
+
+    @abstractmethod
+    async def append_message(
+        self,
+        tg_id: int,
+        source: str,
+        content: str,
+        timestamp: Optional[datetime] = None,
+    ) -> bool:
+        """Дописать сообщение в историю одним запросом, без чтения истории; False, если клиента нет"""
         ...
 
     @abstractmethod
@@ -1,12 +1,12 @@
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import JSON, cast, func, select, text, update, delete
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm.attributes import flag_modified
 
-from db.sqlalchemy.models import Base
+from db.sqlalchemy.models import Base, Users, users_migrations_sql
 from db.database_protocol import ClientBase
 from src.models.messages import BaseMessage
 from src.models.client_model import ClientModel, to_client_model
@@ -18,10 +18,14 @@ class ClientORM(ClientBase):
     
     async def create_tables(self) -> bool:
         try:
-            async with self.session.begin():
-                await self.session.run_sync(Base.metadata.create_all)
+            connection = await self.session.connection()
+            await connection.run_sync(Base.metadata.create_all)
+            for sql in users_migrations_sql:
+                await self.session.execute(text(sql))
+            await self.session.commit()
             return True
         except Exception as e:
+            await self.session.rollback()
             self.logger.error(f"Ошибка при создании таблиц: {e}", exc_info=True)
             return False
 
@@ -71,13 +75,21 @@ class ClientORM(ClientBase):
             self.logger.error(f"Ошибка при добавления пользователя: {e}", exc_info=True)
             return False
 
+    @staticmethod
+    def _client_model(user: Optional[Users]) -> Optional[ClientModel]:
+        """ClientModel из строки users: история хранится в track_addresses"""
+        if user is None:
+            return None
+        data = {column.key: getattr(user, column.key) for column in Users.__table__.columns}
+        data["message_history"] = data.pop("track_addresses") or []
+        return to_client_model(data)
+
     async def get_client(self, tg_id: int) -> Optional[ClientModel]:
         try:
             result = await self.session.execute(
-                select(ClientModel).where(ClientModel.tg_id == tg_id)
+                select(Users).where(Users.tg_id == tg_id)
             )
-            client = result.scalar_one_or_none()
-            return await to_client_model(client)
+            return self._client_model(result.scalar_one_or_none())
         except Exception as e:
             self.logger.error(f"Ошибка при получении пользователя {tg_id}: {e}")
             return None
@@ -96,66 +108,119 @@ class ClientORM(ClientBase):
             self.logger.error(f"Ошибка при получении всех пользователей: {e}")
             return []
 
+    async def iter_clients(
+        self,
+        batch_size: int = 500,
+        after_tg_id: Optional[int] = None,
+    ) -> AsyncIterator[List[ClientModel]]:
+        after = after_tg_id
+        while True:
+            query = select(Users).order_by(Users.tg_id).limit(batch_size)
+            if after is not None:
+                query = query.where(Users.tg_id > after)
+            # ошибку чтения не глотаем: молча оборванный обход выглядел бы как конец таблицы
+            rows = (await self.session.execute(query)).scalars().all()
+            if not rows:
+                return
+            client_models = []
+            for u in rows:
+                client_model = self._client_model(u)
+                if client_model:
+                    client_models.append(client_model)
+            yield client_models
+            after = rows[-1].tg_id
+
     async def client_exists(self, tg_id: int) -> bool:
         try:
             result = await self.session.execute(
-                select(ClientModel.tg_id).where(ClientModel.tg_id == tg_id).limit(1)
+                select(Users.tg_id).where(Users.tg_id == tg_id).limit(1)
             )
             return result.scalar_one_or_none() is not None
         except Exception as e:
             self.logger.error(f"Ошибка при проверке существования пользователя {tg_id}: {e}")
             return False
 
+    async def _update_row(self, tg_id: int, **values) -> bool:
+        """UPDATE ... RETURNING в текущей транзакции: одна команда и признак, что строка клиента нашлась"""
+        result = await self.session.execute(
+            update(Users).where(Users.tg_id == tg_id).values(**values).returning(Users.tg_id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def _update_returning(self, tg_id: int, **values) -> bool:
+        """_update_row с фиксацией: без commit запись пропала бы, а блокировка строки висела бы до конца сессии"""
+        try:
+            found = await self._update_row(tg_id, **values)
+            await self.session.commit()
+            return found
+        except Exception:
+            await self.session.rollback()
+            raise
+
     async def update_client_fields(self, tg_id: int, **fields) -> bool:
         if not fields:
             return False
         try:
-            await self.session.execute(
-                update(ClientModel).where(ClientModel.tg_id == tg_id).values(**fields)
-            )
-            return True
+            return await self._update_returning(tg_id, **fields)
         except Exception as e:
             self.logger.error(f"Ошибка при обновлении пользователя {tg_id}: {e}")
             return False
 
+    async def update_clients_fields(self, updates: Dict[int, dict]) -> int:
+        updated = 0
+        try:
+            # вся пачка - одна транзакция
+            for tg_id, fields in updates.items():
+                if not fields:
+                    continue
+                updated += await self._update_row(tg_id, **fields)
+            await self.session.commit()
+            return updated
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error(f"Ошибка пакетного обновления {len(updates)} пользователей: {e}")
+            return 0
+
     async def update_lead_status(self, tg_id: int, new_status: str) -> bool:
         """Обновляет статус лида"""
         return await self.update_client_fields(tg_id, lead_status=new_status)
 
-    async def add_message_to_history(
+    async def append_message(
         self, 
         tg_id: int, 
         source: str, 
         content: str,
         timestamp: Optional[datetime] = None
     ) -> bool:
+        message_data = {
+            "source": source,
+            "content": content,
+            "timestamp": (timestamp or datetime.now()).isoformat()
+        }
+        # дописываем на стороне PostgreSQL: история не читается и не пересылается целиком
+        appended = cast(
+            func.coalesce(cast(Users.track_addresses, JSONB), cast([], JSONB))
+            .op("||", return_type=JSONB)(cast([message_data], JSONB)),
+            JSON,
+        )
         try:
-            result = await self.session.execute(
-                select(ClientModel).where(ClientModel.tg_id == tg_id)
-            )
-            client = result.scalar_one_or_none()
-            if not client:
-                self.logger.warning(f"Пользователь {tg_id} не найден")
-                return False
-            
-            message_data = {
-                "source": source,
-                "content": content,
-                "timestamp": (timestamp or datetime.now()).isoformat()
-            }
-            
-            if client.message_history is None:
-                client.message_history = []
-            
-            client.message_history.append(message_data)
-            
-            flag_modified(client, "message_history")
-            
-            return True
+            if await self._update_returning(tg_id, track_addresses=appended):
+                return True
+            self.logger.warning(f"Пользователь {tg_id} не найден")
+            return False
         except Exception as e:
             self.logger.error(f"Ошибка при добавлении сообщения в историю для {tg_id}: {e}", exc_info=True)
             return False
 
+    async def add_message_to_history(
+        self, 
+        tg_id: int, 
+        source: str, 
+        content: str,
+        timestamp: Optional[datetime] = None
+    ) -> bool:
+        return await self.append_message(tg_id, source, content, timestamp)
+
     async def get_message_history(self, tg_id: int) -> List[BaseMessage]:
         try:
             client = await self.get_client(tg_id)
@@ -205,17 +270,12 @@ class ClientORM(ClientBase):
     
     async def update_message_history(self, tg_id: int, history: List[BaseMessage]) -> bool:
         try:
-            result = await self.session.execute(
-            select(ClientModel).where(ClientModel.tg_id == tg_id)
-            )
-            client = result.scalar_one_or_none()
-            if not client:
-                self.logger.warning(f"Пользователь {tg_id} не найден")
-                return False
-
-            client.message_history = [msg.model_dump() for msg in history]
-            flag_modified(client, "message_history")
-            return True
+            if await self._update_returning(
+                tg_id, track_addresses=[msg.model_dump(mode="json") for msg in history]
+            ):
+                return True
+            self.logger.warning(f"Пользователь {tg_id} не найден")
+            return False
         except Exception as e:
             self.logger.error(f"Ошибка при обновлении истории сообщений для {tg_id}: {e}", exc_info=True)
             return False
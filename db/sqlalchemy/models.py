@@ -22,4 +22,14 @@ class Users(Base):
     full_name: Mapped[strnullable] 
     client_project_info: Mapped[strnullable] 
     lead_status: Mapped[strnullable] 
-    track_addresses: Mapped[list[BaseMessage]] = mapped_column(MutableList.as_mutable(JSON), default=[])
\ No newline at end of file
+    history_summary: Mapped[strnullable]
+    summarized_count: Mapped[int] = mapped_column(Integer, default=0)
+    track_addresses: Mapped[list[BaseMessage]] = mapped_column(MutableList.as_mutable(JSON), default=[])
+
+
+# create_all не меняет существующие таблицы: колонки, добавленные в Users
+# после первого запуска, досоздаются этими командами (повторный запуск безопасен)
+users_migrations_sql = [
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS history_summary VARCHAR",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS summarized_count INTEGER DEFAULT 0",
+]
@@ -1,4 +1,4 @@
-from data.init_configs import DB_CONFIG
+from data.init_configs import get_config
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
 class SQLAlchemyManager:
@@ -11,7 +11,7 @@ class SQLAlchemyManager:
         if self.engine is not None:
             return  
         
-        database_url = DB_CONFIG.url()
+        database_url = get_config().DB_CONFIG.url
         
         self.engine = create_async_engine(
             database_url,
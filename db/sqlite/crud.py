@@ -1,19 +1,24 @@
 import json
 import logging
+import sqlite3
 from datetime import datetime
-from typing import List, Optional
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional
 
 from db.sqlite.manager import AsyncDatabaseManager
 from db.sqlite.schemas import (
     create_clients_table_sql,
+    add_summary_columns_sql,
     insert_client_sql,
     select_client_sql,
     select_all_clients_sql,
+    select_clients_page_sql,
     delete_client_sql,
     delete_all_clients_sql,
     client_exists_sql,
     select_clients_by_status_sql,
-    select_message_history_sql,
+    update_message_history_sql,
+    append_message_sql,
 )
 
 from src.models.messages import BaseMessage
@@ -29,30 +34,37 @@ class ClientSQL(ClientBase):
     async def create_tables(self) -> bool:
         try:
             await self.db.execute(create_clients_table_sql())
+            for sql in add_summary_columns_sql():
+                try:
+                    await self.db.execute(sql)
+                except sqlite3.OperationalError as e:
+                    # колонка уже есть - у SQLite нет ADD COLUMN IF NOT EXISTS
+                    if "duplicate column name" not in str(e):
+                        raise
             return True
         except Exception as e:
             self.logger.error(f"Ошибка при создании таблиц: {e}")
             return False
 
+    @staticmethod
+    def _message_dict(source: str, content: str, timestamp) -> dict:
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+        elif timestamp is None:
+            timestamp = datetime.now().isoformat()
+        return {"source": source, "content": content, "timestamp": timestamp}
+
+    def _dump_history(self, messages: List[BaseMessage]) -> str:
+        return json.dumps([
+            self._message_dict(msg.source, msg.content, msg.timestamp)
+            for msg in messages or []
+        ])
+
     async def add_client(self, client: ClientModel) -> bool:
         try:
-            message_history = []
-            for msg in client.message_history:
-                timestamp = msg.timestamp
-                if isinstance(timestamp, datetime):
-                    timestamp = timestamp.isoformat()
-                elif timestamp is None:
-                    timestamp = datetime.now().isoformat()
-                
-                message_history.append({
-                    "source": msg.source,
-                    "content": msg.content,
-                    "timestamp": timestamp
-                })
-            
             await self.db.execute(insert_client_sql(), {
                 "tg_id": client.tg_id,
-                "message_history": json.dumps(message_history),
+                "message_history": self._dump_history(client.message_history),
                 "age": client.age,
                 "full_name": client.full_name or "",
                 "username": client.username or "",
@@ -95,6 +107,29 @@ class ClientSQL(ClientBase):
             self.logger.error(f"Ошибка при получении всех клиентов: {e}")
             return []
 
+    async def iter_clients(
+        self,
+        batch_size: int = 500,
+        after_tg_id: Optional[int] = None,
+    ) -> AsyncIterator[List[ClientModel]]:
+        after = after_tg_id if after_tg_id is not None else -(2 ** 63)
+        while True:
+            rows = await self.db.fetchall(
+                select_clients_page_sql(),
+                {"after": after, "limit": batch_size},
+            )
+            if not rows:
+                return
+            clients = []
+            for row in rows:
+                if row.get("message_history"):
+                    row["message_history"] = json.loads(row["message_history"])
+                client = to_client_model(row)
+                if client:
+                    clients.append(client)
+            yield clients
+            after = rows[-1]["tg_id"]
+
     async def client_exists(self, tg_id: int) -> bool:
         try:
             row = await self.db.fetchone(client_exists_sql(), {"tg_id": tg_id})
@@ -114,19 +149,45 @@ class ClientSQL(ClientBase):
             set_clause = ", ".join(f"{k} = :{k}" for k in fields)
             sql = f"UPDATE clients SET {set_clause} WHERE tg_id = :tg_id"
             fields["tg_id"] = tg_id
-            await self.db.execute(sql, fields)
-            return True
+            # changes() = 0 - клиента нет, отдельная проверка не нужна
+            return await self.db.execute(sql, fields) > 0
         except Exception as e:
             self.logger.error(f"Ошибка при обновлении клиента {tg_id}: {e}")
             return False
 
+    async def update_clients_fields(self, updates: Dict[int, dict]) -> int:
+        # один executemany на каждый набор обновляемых колонок
+        groups: Dict[tuple, List[dict]] = defaultdict(list)
+        for tg_id, fields in updates.items():
+            if fields:
+                groups[tuple(sorted(fields))].append({**fields, "tg_id": tg_id})
+
+        updated = 0
+        for columns, params in groups.items():
+            set_clause = ", ".join(f"{k} = :{k}" for k in columns)
+            try:
+                updated += await self.db.executemany(f"UPDATE clients SET {set_clause} WHERE tg_id = :tg_id", params)
+            except Exception as e:
+                self.logger.error(f"Ошибка пакетного обновления {len(params)} клиентов: {e}")
+        return updated
+
     async def update_lead_status(self, tg_id: int, new_status: str) -> bool:
         return await self.update_client_fields(tg_id, lead_status=new_status)
 
     async def update_project_info(self, tg_id: int, project_info: str) -> bool:
         return await self.update_client_fields(tg_id, client_project_info=project_info)
 
-    async def update_message_history(
+    async def update_message_history(self, tg_id: int, history: List[BaseMessage]) -> bool:
+        try:
+            return await self.db.execute(
+                update_message_history_sql(),
+                {"tg_id": tg_id, "message_history": self._dump_history(history)},
+            ) > 0
+        except Exception as e:
+            self.logger.error(f"Ошибка при обновлении истории сообщений для {tg_id}: {e}", exc_info=True)
+            return False
+
+    async def append_message(
         self, 
         tg_id: int, 
         source: str, 
@@ -134,28 +195,16 @@ class ClientSQL(ClientBase):
         timestamp: Optional[datetime] = None
     ) -> bool:
         try:
-            row = await self.db.fetchone(
-                select_message_history_sql(), 
-                {"tg_id": tg_id}
+            appended = await self.db.execute(
+                append_message_sql(),
+                {
+                    "tg_id": tg_id,
+                    "message": json.dumps(self._message_dict(source, content, timestamp)),
+                },
             )
-            
-            if not row:
+            if not appended:
                 self.logger.warning(f"Клиент {tg_id} не найден")
-                return False
-            
-            message_history = []
-            if row.get("message_history"):
-                message_history = json.loads(row["message_history"])
-            
-            message_data = {
-                "source": source,
-                "content": content,
-                "timestamp": (timestamp or datetime.now()).isoformat()
-            }
-            message_history.append(message_data)
-            
-            await self.update_client_fields(tg_id, message_history=message_history)
-            return True
+            return appended > 0
         except Exception as e:
             self.logger.error(f"Ошибка при добавлении сообщения в историю для {tg_id}: {e}", exc_info=True)
             return False
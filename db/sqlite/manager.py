@@ -21,13 +21,22 @@ class AsyncDatabaseManager:
         except Exception as e:
             print(f"⚠️ Ошибка при закрытии БД: {e}")
 
-    async def execute(self, query: str, params: Dict = None):
+    async def execute(self, query: str, params: Dict = None) -> int:
+        """Выполнить запрос, вернуть число затронутых строк (changes())"""
         await self.connect()
         if params:
-            await self._conn.execute(query, params)
+            cursor = await self._conn.execute(query, params)
         else:
-            await self._conn.execute(query)
+            cursor = await self._conn.execute(query)
         await self._conn.commit()
+        return cursor.rowcount
+
+    async def executemany(self, query: str, params: List[Dict]) -> int:
+        """Один запрос на много наборов параметров в одной транзакции"""
+        await self.connect()
+        cursor = await self._conn.executemany(query, params)
+        await self._conn.commit()
+        return cursor.rowcount
 
     async def fetchall(self, query: str, params: Dict = None) -> List[Dict]:
         await self.connect()
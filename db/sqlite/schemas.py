@@ -9,11 +9,21 @@ def create_clients_table_sql() -> str:
         email TEXT,
         tg_nick TEXT,
         client_project_info TEXT,
-        lead_status TEXT DEFAULT 'new'
+        lead_status TEXT DEFAULT 'new',
+        history_summary TEXT,
+        summarized_count INTEGER DEFAULT 0
     )
     """
 
 
+def add_summary_columns_sql() -> list[str]:
+    """Колонки резюме истории для таблиц, созданных до их появления"""
+    return [
+        "ALTER TABLE clients ADD COLUMN history_summary TEXT",
+        "ALTER TABLE clients ADD COLUMN summarized_count INTEGER DEFAULT 0",
+    ]
+
+
 def insert_client_sql() -> str:
     return """
     INSERT OR IGNORE INTO clients (
@@ -35,6 +45,10 @@ def select_all_clients_sql() -> str:
     return "SELECT * FROM clients"
 
 
+def select_clients_page_sql() -> str:
+    return "SELECT * FROM clients WHERE tg_id > :after ORDER BY tg_id LIMIT :limit"
+
+
 def delete_client_sql() -> str:
     return "DELETE FROM clients WHERE tg_id = :tg_id"
 
@@ -55,6 +69,19 @@ def select_message_history_sql() -> str:
     return "SELECT message_history FROM clients WHERE tg_id = :tg_id"
 
 
+def update_message_history_sql() -> str:
+    return "UPDATE clients SET message_history = :message_history WHERE tg_id = :tg_id"
+
+
+def append_message_sql() -> str:
+    # история дописывается на стороне SQLite - без чтения и перезаписи всей строки
+    return """
+    UPDATE clients
+    SET message_history = json_insert(COALESCE(NULLIF(message_history, ''), '[]'), '$[#]', json(:message))
+    WHERE tg_id = :tg_id
+    """
+
+
 def update_lead_status_sql() -> str:
     return "UPDATE clients SET lead_status = :lead_status WHERE tg_id = :tg_id"
 
@@ -0,0 +1,122 @@
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+from src.enum.queue import PriorityClass
+
+LEAD_PRIORITY: Dict[str, PriorityClass] = {
+    "qualified": PriorityClass.HIGH,
+    "new": PriorityClass.NORMAL,
+    "not_interested": PriorityClass.LOW,
+}
+
+
+class FairScheduler:
+    """
+    Очередь готовых к обработке пользователей с deficit round robin.
+
+    Пользователи распределены по классам приоритета, внутри класса -
+    по кругу (каждый ход пользователя возвращает его в конец очереди).
+    Классы обслуживаются пропорционально весам: за один обход класс
+    получает `weight` ходов, поэтому низкий приоритет не голодает.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, int]] = None, max_known_users: int = 100_000):
+        weights = weights or {}
+        self._classes = list(PriorityClass)
+        self._quantum = {cls: max(1, int(weights.get(cls.value, 1))) for cls in self._classes}
+        self._queues: Dict[PriorityClass, Deque] = {cls: deque() for cls in self._classes}
+        self._deficit = {cls: 0 for cls in self._classes}
+        self._current = 0
+        # кредит выдается при переходе к классу; первый класс текущий с самого начала
+        self._deficit[self._classes[self._current]] = self._quantum[self._classes[self._current]]
+        self._items = asyncio.Semaphore(0)
+
+        self._priorities: OrderedDict = OrderedDict()
+        self._max_known_users = max_known_users
+        self.served = {cls.value: 0 for cls in self._classes}
+
+    def set_priority(self, key, lead_status: Optional[str]) -> None:
+        """Запомнить класс пользователя по статусу лида"""
+        self._priorities[key] = LEAD_PRIORITY.get(lead_status, PriorityClass.NORMAL)
+        self._priorities.move_to_end(key)
+        if len(self._priorities) > self._max_known_users:
+            self._priorities.popitem(last=False)
+
+    def priority_of(self, key) -> PriorityClass:
+        return self._priorities.get(key, PriorityClass.NORMAL)
+
+    def put_nowait(self, key) -> None:
+        self._queues[self.priority_of(key)].append(key)
+        self._items.release()
+
+    async def get(self):
+        await self._items.acquire()
+
+        while True:
+            cls = self._classes[self._current]
+            queue = self._queues[cls]
+            if queue and self._deficit[cls] >= 1:
+                self._deficit[cls] -= 1
+                self.served[cls.value] += 1
+                return queue.popleft()
+
+            if not queue:
+                # пустой класс не копит кредит
+                self._deficit[cls] = 0
+
+            self._current = (self._current + 1) % len(self._classes)
+            following = self._classes[self._current]
+            if self._queues[following]:
+                self._deficit[following] += self._quantum[following]
+
+    def qsize(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> dict:
+        return {
+            "ready": {cls.value: len(queue) for cls, queue in self._queues.items()},
+            "served": dict(self.served),
+        }
+
+
+class UserRateLimiter:
+    """Token bucket на пользователя: не больше `per_minute` ходов в минуту"""
+
+    def __init__(self, per_minute: float, burst: int = 1, max_known_users: int = 100_000):
+        self._rate = per_minute / 60
+        self._burst = max(1, burst)
+        self._buckets: OrderedDict = OrderedDict()
+        self._max_known_users = max_known_users
+        # пользователи, которые сейчас ждут токен: повторный delay() того же
+        # ожидания - не новое ограничение
+        self._throttling: set = set()
+        self.throttled = 0
+
+    def _refill(self, key) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - updated) * self._rate)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self._max_known_users:
+            evicted, _ = self._buckets.popitem(last=False)
+            self._throttling.discard(evicted)
+        return tokens
+
+    def delay(self, key) -> float:
+        """Сколько секунд ждать до следующего разрешенного хода"""
+        tokens = self._refill(key)
+        if tokens >= 1:
+            self._throttling.discard(key)
+            return 0.0
+        if key not in self._throttling:
+            self._throttling.add(key)
+            self.throttled += 1
+        return (1 - tokens) / self._rate
+
+    def consume(self, key) -> None:
+        self._throttling.discard(key)
+        tokens, updated = self._buckets.get(key, (self._burst, time.monotonic()))
+        self._buckets[key] = (tokens - 1, updated)
@@ -0,0 +1,10 @@
+from .base import EventQueue
+from .memory import MemoryEventQueue
+from .redis_streams import RedisStreamEventQueue
+from .dedup import UpdateDeduplicator
+from .admission import AdmissionController, RedisOverflowStore
+
+__all__ = [
+    'EventQueue', 'MemoryEventQueue', 'RedisStreamEventQueue',
+    'UpdateDeduplicator', 'AdmissionController', 'RedisOverflowStore'
+]
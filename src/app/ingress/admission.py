@@ -0,0 +1,211 @@
+import time
+import asyncio
+from typing import Optional
+
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.models.messages import BaseMessage
+from src.app.ingress.base import EventQueue
+from src.enum.queue import AdmissionResult, OverloadPolicy
+
+
+# пустой список - счетчики пользователей могли остаться от упавшего процесса
+_POP_SCRIPT = """
+local payload = redis.call('LPOP', KEYS[1])
+if not payload then
+    redis.call('DEL', KEYS[2])
+end
+return payload
+"""
+
+_RELEASE_SCRIPT = """
+local left = redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+if left <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return left
+"""
+
+
+class RedisOverflowStore:
+    """
+    Список в Redis для сообщений, не поместившихся во входящую очередь.
+
+    Рядом, в хэше `{key}:users`, - сколько сообщений каждого пользователя
+    выгружено и еще не вернулось в очередь. Хэш общий для всех процессов,
+    которые пишут в этот список, и меняется атомарно вместе с ним.
+    """
+
+    def __init__(self, redis: Redis, key: str = "tg:overflow"):
+        self._redis = redis
+        self._key = key
+        self._users_key = f"{key}:users"
+        self._pop_script = redis.register_script(_POP_SCRIPT)
+        self._release_script = redis.register_script(_RELEASE_SCRIPT)
+
+    async def push(self, item: BaseMessage) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._key, item.model_dump_json())
+            pipe.hincrby(self._users_key, str(item.tg_id), 1)
+            await pipe.execute()
+
+    async def push_front(self, item: BaseMessage) -> None:
+        """Вернуть сообщение в голову списка - его черед следующий"""
+        # счетчик не трогаем: release для этого сообщения еще не вызывался
+        await self._redis.lpush(self._key, item.model_dump_json())
+
+    async def pop(self) -> Optional[BaseMessage]:
+        """Следующее сообщение; пользователь числится в overflow до release"""
+        payload = await self._pop_script(keys=[self._key, self._users_key])
+        if payload is None:
+            return None
+        return BaseMessage.model_validate_json(payload)
+
+    async def release(self, item: BaseMessage) -> None:
+        """Сообщение из pop() поставлено в очередь"""
+        await self._release_script(keys=[self._users_key], args=[str(item.tg_id)])
+
+    async def pending(self, tg_id: int | str | None) -> int:
+        """Сколько сообщений пользователя выгружено и еще не в очереди"""
+        count = await self._redis.hget(self._users_key, str(tg_id))
+        return int(count) if count is not None else 0
+
+    async def size(self) -> int:
+        return await self._redis.llen(self._key)
+
+
+class AdmissionController:
+    """
+    Допуск сообщений во входящую очередь с ограниченным ожиданием.
+
+    Если за `max_wait_seconds` место в очереди не освободилось, применяется
+    политика перегрузки: отказ, выгрузка в overflow-хранилище с фоновым
+    возвратом в очередь или вытеснение самого старого сообщения.
+    Вебхук никогда не ждет дольше `max_wait_seconds`.
+
+    Пока у пользователя есть сообщения в overflow, его новые сообщения
+    тоже идут в overflow, за ними - иначе они обогнали бы выгруженные
+    и нарушили порядок сообщений пользователя.
+    """
+
+    def __init__(
+        self,
+        queue: EventQueue,
+        *,
+        max_wait_seconds: float = 0.05,
+        policy: OverloadPolicy = OverloadPolicy.REJECT,
+        overflow: Optional[RedisOverflowStore] = None,
+    ):
+        if policy == OverloadPolicy.SPILL and overflow is None:
+            raise ValueError("Для политики spill нужно overflow-хранилище")
+
+        self._queue = queue
+        self._max_wait = max_wait_seconds
+        self._policy = policy
+        self._overflow = overflow
+        self._drain_task: Optional[asyncio.Task] = None
+
+        self.counters = {result.value: 0 for result in AdmissionResult}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._admitted = 0
+
+    async def admit(self, item: BaseMessage) -> AdmissionResult:
+        """
+        Поставить сообщение в очередь или применить политику перегрузки
+
+        Args:
+            item: Входящее сообщение
+
+        Returns:
+            AdmissionResult с итогом допуска
+        """
+        started = time.perf_counter()
+        try:
+            if await self._behind_overflow(item):
+                result = await self._spill(item)
+            elif await self._queue.put_within(item, self._max_wait):
+                result = AdmissionResult.ACCEPTED
+            else:
+                result = await self._on_overload(item)
+        finally:
+            waited = time.perf_counter() - started
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._admitted += 1
+
+        self.counters[result.value] += 1
+        if result != AdmissionResult.ACCEPTED:
+            logger.warning(
+                f"Очередь переполнена ({self._queue.qsize()}), "
+                f"сообщение от {item.tg_id}: {result}"
+            )
+        return result
+
+    async def _behind_overflow(self, item: BaseMessage) -> bool:
+        """Сообщение должно встать в overflow за более ранними того же пользователя"""
+        if self._policy != OverloadPolicy.SPILL:
+            return False
+        return await self._overflow.pending(item.tg_id) > 0
+
+    async def _spill(self, item: BaseMessage) -> AdmissionResult:
+        await self._overflow.push(item)
+        self._ensure_drain()
+        return AdmissionResult.SPILLED
+
+    async def _on_overload(self, item: BaseMessage) -> AdmissionResult:
+        if self._policy == OverloadPolicy.SPILL:
+            return await self._spill(item)
+
+        if self._policy == OverloadPolicy.DROP_OLDEST:
+            dropped = self._queue.drop_oldest()
+            if dropped is not None:
+                logger.warning(f"Вытеснено сообщение от {dropped.tg_id}")
+                await self._queue.put(item)
+                return AdmissionResult.DROPPED_OLDEST
+
+        return AdmissionResult.REJECTED
+
+    def start(self) -> None:
+        """Дослать сообщения, оставшиеся в overflow с прошлого запуска"""
+        if self._policy == OverloadPolicy.SPILL:
+            self._ensure_drain()
+
+    def _ensure_drain(self) -> None:
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        """Возвращает сообщения из overflow в очередь, пока хранилище не опустеет"""
+        while True:
+            item = await self._overflow.pop()
+            if item is None:
+                return
+            try:
+                # здесь можно ждать сколько угодно - это не путь вебхука
+                await self._queue.put(item)
+            except asyncio.CancelledError:
+                # остановка во время ожидания места - сообщение не теряем
+                await self._overflow.push_front(item)
+                raise
+            await self._overflow.release(item)
+            await asyncio.sleep(0)
+
+    async def stop(self) -> None:
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            await asyncio.gather(self._drain_task, return_exceptions=True)
+
+    async def stats(self) -> dict:
+        """Глубина очереди, время ожидания допуска и итоги по политике"""
+        result = {
+            "queue_depth": self._queue.qsize(),
+            "policy": self._policy.value,
+            "wait_avg_ms": (self._wait_total / self._admitted * 1000) if self._admitted else 0.0,
+            "wait_max_ms": self._wait_max * 1000,
+            **self.counters,
+        }
+        if self._overflow is not None:
+            result["overflow_depth"] = await self._overflow.size()
+        return result
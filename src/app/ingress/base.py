@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from src.models.messages import BaseMessage
+
+
+class EventQueue(ABC):
+    """Входящая очередь сообщений Telegram"""
+
+    @abstractmethod
+    async def put(self, item: BaseMessage) -> None:
+        """Положить сообщение в очередь"""
+        ...
+
+    async def put_within(self, item: BaseMessage, timeout: float) -> bool:
+        """
+        Положить сообщение, если место найдется за `timeout` секунд
+
+        По умолчанию put() не прерывается: у очереди без предела емкости ждать
+        нечего, а прерванная отправка могла уже дойти до бэкенда.
+
+        Returns:
+            False - места не нашлось, сообщение не поставлено
+        """
+        await self.put(item)
+        return True
+
+    @abstractmethod
+    async def get(self) -> BaseMessage:
+        """Забрать следующее сообщение, ожидая при пустой очереди"""
+        ...
+
+    @abstractmethod
+    async def ack(self, item: BaseMessage) -> None:
+        """Подтвердить обработку сообщения, полученного через get()"""
+        ...
+
+    @abstractmethod
+    def qsize(self) -> int:
+        """Количество сообщений, ожидающих в локальном буфере"""
+        ...
+
+    def drop_oldest(self) -> Optional[BaseMessage]:
+        """Выбросить самое старое сообщение, если бэкенд это поддерживает"""
+        return None
+
+    async def pending(self) -> List[BaseMessage]:
+        """Выданные, но не подтвержденные сообщения, которые бэкенд доставит повторно"""
+        return []
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from typing import Optional
+
+from loguru import logger
+from redis.asyncio import Redis
+
+
+class UpdateDeduplicator:
+    """
+    Отбрасывает повторные доставки update_id от Telegram.
+
+    Первый уровень - ограниченный LRU в памяти процесса, второй
+    (опционально) - Redis SET NX с TTL, общий для всех воркеров.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 10_000,
+        redis: Optional[Redis] = None,
+        ttl_seconds: int = 3600,
+        key_prefix: str = "tg:update:",
+    ):
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self._max_size = max_size
+        self._redis = redis
+        self._ttl_seconds = ttl_seconds
+        self._key_prefix = key_prefix
+
+        self.accepted = 0
+        self.duplicates = 0
+
+    def _remember(self, update_id: int) -> bool:
+        """True, если update_id уже встречался в этом процессе"""
+        if update_id in self._seen:
+            self._seen.move_to_end(update_id)
+            return True
+        self._seen[update_id] = None
+        if len(self._seen) > self._max_size:
+            self._seen.popitem(last=False)
+        return False
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """
+        Проверяет и запоминает update_id
+
+        Args:
+            update_id: update_id из обновления Telegram
+
+        Returns:
+            True если обновление уже было принято ранее
+        """
+        duplicate = self._remember(update_id)
+
+        if not duplicate and self._redis is not None:
+            try:
+                created = await self._redis.set(
+                    f"{self._key_prefix}{update_id}", 1,
+                    nx=True, ex=self._ttl_seconds,
+                )
+                duplicate = not created
+            except Exception as exp:
+                logger.warning(f"Redis недоступен для дедупликации, только локальный кэш: {exp}")
+
+        if duplicate:
+            self.duplicates += 1
+            logger.info(f"Повторная доставка update_id={update_id} отброшена")
+        else:
+            self.accepted += 1
+        return duplicate
+
+    async def forget(self, update_id: int) -> None:
+        """Забыть update_id, если обновление не удалось поставить в очередь"""
+        self._seen.pop(update_id, None)
+        self.accepted -= 1
+        if self._redis is not None:
+            try:
+                await self._redis.delete(f"{self._key_prefix}{update_id}")
+            except Exception as exp:
+                logger.warning(f"Не удалось удалить update_id={update_id} из Redis: {exp}")
+
+    def stats(self) -> dict:
+        """Сколько доставок принято и сколько повторов отброшено"""
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "cached_ids": len(self._seen),
+        }
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+
+from src.models.messages import BaseMessage
+from src.app.ingress.base import EventQueue
+
+
+class MemoryEventQueue(EventQueue):
+    """Очередь внутри процесса поверх asyncio.Queue, теряется при рестарте"""
+
+    def __init__(self, maxsize: int = 0):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def put(self, item: BaseMessage) -> None:
+        await self._queue.put(item)
+
+    async def put_within(self, item: BaseMessage, timeout: float) -> bool:
+        # отмененный asyncio.Queue.put сообщение не ставит - прерывать безопасно
+        try:
+            await asyncio.wait_for(self._queue.put(item), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def get(self) -> BaseMessage:
+        return await self._queue.get()
+
+    async def ack(self, item: BaseMessage) -> None:
+        self._queue.task_done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def drop_oldest(self) -> Optional[BaseMessage]:
+        try:
+            item = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        self._queue.task_done()
+        return item
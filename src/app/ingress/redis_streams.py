@@ -0,0 +1,264 @@
+import os
+import time
+import socket
+import asyncio
+import zlib
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from src.models.messages import BaseMessage
+from src.app.ingress.base import EventQueue
+
+
+class RedisStreamEventQueue(EventQueue):
+    """
+    Очередь поверх Redis Streams с consumer group.
+
+    Сообщения раскладываются по `partitions` стримам по tg_id, поэтому
+    сообщения одного пользователя всегда лежат в одном стриме по порядку.
+    Консьюмер читает только свои партиции (`owned_partitions`) - чтобы
+    порядок по пользователю сохранялся между хостами, партиции между
+    хостами не должны пересекаться. Неподтвержденные записи упавших
+    консьюмеров забираются через XPENDING + XCLAIM после `claim_idle_ms`.
+    Свои неподтвержденные записи (остались от прошлого запуска с тем же
+    `consumer`) читаются заново из истории консьюмера перед новыми.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        stream: str = "tg:events",
+        group: str = "agents",
+        consumer: Optional[str] = None,
+        partitions: int = 1,
+        owned_partitions: Optional[List[int]] = None,
+        maxlen: Optional[int] = 100_000,
+        batch_size: int = 10,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60_000,
+    ):
+        if partitions < 1:
+            raise ValueError("Количество партиций должно быть больше 0")
+
+        self._redis = redis
+        self._group = group
+        self._consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self._partitions = partitions
+        self._streams = [f"{stream}:{p}" for p in range(partitions)]
+        owned = owned_partitions if owned_partitions is not None else range(partitions)
+        self._owned = [self._streams[p] for p in owned]
+        self._maxlen = maxlen
+        self._batch_size = batch_size
+        self._block_ms = block_ms
+        self._claim_idle_ms = claim_idle_ms
+
+        self._buffer: Deque[Tuple[str, str, BaseMessage]] = deque()
+        self._inflight: Dict[int, Tuple[str, str, BaseMessage]] = {}
+        self._groups_ready = False
+        self._groups_lock = asyncio.Lock()
+        self._last_claim = 0.0
+        # позиция чтения своих pending-записей по стриму, пока они не кончились
+        self._recover_from: Dict[str, str] = {stream: "0" for stream in self._owned}
+
+    def partition_for(self, tg_id: int | str | None) -> str:
+        """Стрим, в который попадают сообщения пользователя"""
+        if self._partitions == 1:
+            return self._streams[0]
+        # crc32 стабилен между процессами в отличие от hash()
+        return self._streams[zlib.crc32(str(tg_id).encode()) % self._partitions]
+
+    async def _ensure_groups(self) -> None:
+        if self._groups_ready:
+            return
+        async with self._groups_lock:
+            if self._groups_ready:
+                return
+            for stream in self._owned:
+                try:
+                    await self._redis.xgroup_create(
+                        stream, self._group, id="0", mkstream=True
+                    )
+                except ResponseError as exp:
+                    if "BUSYGROUP" not in str(exp):
+                        raise
+            self._groups_ready = True
+            logger.info(
+                f"Redis Streams группа {self._group} готова: "
+                f"consumer={self._consumer}, streams={self._owned}"
+            )
+
+    async def put(self, item: BaseMessage) -> None:
+        await self._redis.xadd(
+            self.partition_for(item.tg_id),
+            {"payload": item.model_dump_json()},
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+
+    def _parse_entries(self, stream: str | bytes, entries) -> List[Tuple[str, str, BaseMessage]]:
+        if isinstance(stream, bytes):
+            stream = stream.decode()
+        parsed: List[Tuple[str, str, BaseMessage]] = []
+        for entry_id, fields in entries:
+            if isinstance(entry_id, bytes):
+                entry_id = entry_id.decode()
+            if not fields:
+                # запись удалена из стрима по MAXLEN, пока висела в pending
+                continue
+            payload = fields.get(b"payload") or fields.get("payload")
+            try:
+                message = BaseMessage.model_validate_json(payload)
+            except Exception as exp:
+                logger.error(f"Не удалось разобрать запись {stream}/{entry_id}: {exp}")
+                continue
+            parsed.append((stream, entry_id, message))
+        return parsed
+
+    def _buffer_entries(self, stream: str | bytes, entries) -> None:
+        self._buffer.extend(self._parse_entries(stream, entries))
+
+    @staticmethod
+    def _text(value: str | bytes) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _stale_entry_ids(self, stream: str) -> List[str]:
+        """
+        Зависшие записи других консьюмеров
+
+        Свои записи не трогаем: они могут дольше `claim_idle_ms` ждать в
+        буфере пула воркеров и после перехвата обработались бы второй раз.
+        """
+        stale: List[str] = []
+        start = "-"
+        while len(stale) < self._batch_size:
+            page = await self._redis.xpending_range(
+                stream,
+                self._group,
+                min=start,
+                max="+",
+                count=self._batch_size,
+                idle=self._claim_idle_ms,
+            )
+            for entry in page:
+                if self._text(entry["consumer"]) != self._consumer:
+                    stale.append(self._text(entry["message_id"]))
+            if len(page) < self._batch_size:
+                break
+            # следующая страница - строго после последней записи
+            start = f"({self._text(page[-1]['message_id'])}"
+        return stale[:self._batch_size]
+
+    async def _reclaim(self) -> None:
+        """Забрать записи, зависшие у упавших консьюмеров"""
+        now = time.monotonic()
+        if now - self._last_claim < self._claim_idle_ms / 1000:
+            return
+        self._last_claim = now
+
+        for stream in self._owned:
+            entry_ids = await self._stale_entry_ids(stream)
+            if not entry_ids:
+                continue
+            # XCLAIM сам перепроверяет простой: запись, которую успели
+            # подтвердить или перехватить, не вернется
+            claimed = await self._redis.xclaim(
+                stream,
+                self._group,
+                self._consumer,
+                min_idle_time=self._claim_idle_ms,
+                message_ids=entry_ids,
+            )
+            if claimed:
+                logger.warning(f"Перехвачено {len(claimed)} зависших записей из {stream}")
+                self._buffer_entries(stream, claimed)
+
+    async def _recover_own(self) -> None:
+        """Прочитать свои записи, выданные прошлому запуску и не подтвержденные"""
+        response = await self._redis.xreadgroup(
+            self._group,
+            self._consumer,
+            dict(self._recover_from),
+            count=self._batch_size,
+        )
+        recovered = 0
+        for stream, entries in response or []:
+            stream = self._text(stream)
+            if not entries:
+                del self._recover_from[stream]
+                continue
+            # история консьюмера идет по id: следующая страница - после последней записи
+            self._recover_from[stream] = self._text(entries[-1][0])
+            before = len(self._buffer)
+            self._buffer_entries(stream, entries)
+            recovered += len(self._buffer) - before
+        if not response:
+            self._recover_from.clear()
+        if recovered:
+            logger.warning(f"Повторно выдано {recovered} неподтвержденных записей консьюмера {self._consumer}")
+
+    async def get(self) -> BaseMessage:
+        await self._ensure_groups()
+
+        while self._recover_from and not self._buffer:
+            await self._recover_own()
+
+        while not self._buffer:
+            await self._reclaim()
+            if self._buffer:
+                break
+
+            response = await self._redis.xreadgroup(
+                self._group,
+                self._consumer,
+                {stream: ">" for stream in self._owned},
+                count=self._batch_size,
+                block=self._block_ms,
+            )
+            for stream, entries in response or []:
+                self._buffer_entries(stream, entries)
+
+        stream, entry_id, message = self._buffer.popleft()
+        self._inflight[id(message)] = (stream, entry_id, message)
+        return message
+
+    async def ack(self, item: BaseMessage) -> None:
+        delivery = self._inflight.pop(id(item), None)
+        if delivery is None:
+            return
+        stream, entry_id, _ = delivery
+        await self._redis.xack(stream, self._group, entry_id)
+
+    def qsize(self) -> int:
+        return len(self._buffer)
+
+    async def pending(self) -> List[BaseMessage]:
+        """Неподтвержденные записи группы по своим партициям - всех консьюмеров"""
+        await self._ensure_groups()
+        messages: List[BaseMessage] = []
+        for stream in self._owned:
+            start = "-"
+            while True:
+                page = await self._redis.xpending_range(
+                    stream, self._group, min=start, max="+", count=self._batch_size
+                )
+                for entry in page:
+                    entry_id = self._text(entry["message_id"])
+                    entries = await self._redis.xrange(stream, min=entry_id, max=entry_id, count=1)
+                    messages.extend(message for _, _, message in self._parse_entries(stream, entries))
+                if len(page) < self._batch_size:
+                    break
+                start = f"({self._text(page[-1]['message_id'])}"
+        return messages
+
+    async def lag(self) -> int:
+        """Количество записей в pending у группы по своим партициям"""
+        total = 0
+        for stream in self._owned:
+            info = await self._redis.xpending(stream, self._group)
+            total += info.get("pending", 0) if isinstance(info, dict) else 0
+        return total
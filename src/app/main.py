@@ -2,23 +2,30 @@ import asyncio
 from fastapi import FastAPI
 from chain import MultiAgentChain
 from src.app.routers import telegram
+from src.app.telegram_queue import admission_controller
 
 async def lifespan(app: FastAPI):
     chain = MultiAgentChain()
-    graph = await chain.build_workflow()
+    app.state.chain = chain
+    admission_controller.start()
 
     app.state.agent_task = asyncio.create_task(
-        graph.ainvoke({})
+        chain.run()
     )
 
     print("🚀 Агент запущен")
 
     yield  
 
+    # даем начатым сообщениям завершиться до SHUTDOWN_DEADLINE_SECONDS
+    await chain.shutdown()
+
     task = getattr(app.state, "agent_task", None)
     if task:
         task.cancel()
         print("🛑 Агент остановлен")
 
+    await admission_controller.stop()
+
 app = FastAPI(title="Telegram Webhook", lifespan=lifespan)
 app.include_router(telegram.router)
\ No newline at end of file
@@ -0,0 +1,54 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from src.models.client_model import ClientModel
+
+ClientLoader = Callable[[int | str], Awaitable[Optional[ClientModel]]]
+
+
+class ClientPrefetcher:
+    """
+    Предзагрузка карточек клиентов, чьи сообщения стоят в очереди.
+
+    Пока воркеры заняты LLM-вызовами, запись клиента для следующего
+    готового пользователя уже читается из БД, и препроцессинг забирает
+    готовый результат вместо последовательного запроса.
+    """
+
+    def __init__(self, loader: ClientLoader, max_entries: int = 256):
+        self._loader = loader
+        self._max_entries = max_entries
+        self._tasks: OrderedDict[int | str, asyncio.Task] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, tg_id: int | str | None) -> None:
+        """Начать чтение клиента в фоне, если оно еще не начато"""
+        if tg_id is None or tg_id in self._tasks:
+            return
+        if len(self._tasks) >= self._max_entries:
+            _, oldest = self._tasks.popitem(last=False)
+            oldest.cancel()
+        self._tasks[tg_id] = asyncio.create_task(self._loader(tg_id))
+
+    async def take(self, tg_id: int | str) -> Optional[ClientModel]:
+        """Забрать предзагруженного клиента или прочитать его сейчас"""
+        task = self._tasks.pop(tg_id, None)
+        if task is not None:
+            try:
+                client = await task
+                self.hits += 1
+                return client
+            except asyncio.CancelledError:
+                raise
+            except Exception as exp:
+                logger.warning(f"Предзагрузка клиента {tg_id} не удалась: {exp}")
+
+        self.misses += 1
+        return await self._loader(tg_id)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "in_flight": len(self._tasks)}
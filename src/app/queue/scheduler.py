@@ -1,5 +1,8 @@
+import time
+
 from src.app.queue.tasks import send_tg_message_for_client, cancel_scheduled_message
 from data.configs.redis_config import redis_client
+from utils.deadline import remaining
 
 def schedule_tg_message(
     tg_id: int,
@@ -15,8 +18,13 @@ def schedule_tg_message(
             cancel_scheduled_message.delay(old_task_id.decode())
             redis_client.delete(user_key)
 
+        # отложенная отправка сохраняет запас времени, оставшийся у сообщения
+        left = remaining()
+        deadline = None if left is None else time.time() + _delay + max(0.0, left)
+
         result = send_tg_message_for_client.apply_async(
             args=[tg_id, message],
+            kwargs={"deadline": deadline},
             countdown=_delay
         )
 
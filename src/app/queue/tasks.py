@@ -1,3 +1,4 @@
+import time
 import asyncio
 from celery import shared_task
 
@@ -23,7 +24,7 @@ def run_async(coro):
     max_retries=3,
     default_retry_delay=5,
 )
-def send_tg_message_for_client(self, tg_id: int, message: str) -> None:
+def send_tg_message_for_client(self, tg_id: int, message: str, deadline: float | None = None) -> None:
     task_id = self.request.id
     redis_key = f"tg:task:{task_id}"
 
@@ -33,6 +34,9 @@ def send_tg_message_for_client(self, tg_id: int, message: str) -> None:
     try:
         run_async(_send_tg_message_async(tg_id, message))
     except Exception as exc:
+        if deadline is not None and time.time() + self.default_retry_delay >= deadline:
+            # повтор придет уже после дедлайна сообщения
+            raise
         raise self.retry(exc=exc)
     finally:
         redis_client.delete(redis_key)
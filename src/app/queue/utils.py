@@ -6,6 +6,6 @@ async def _send_tg_message_async(
 ) -> bool:
     sender = TelegramSender()
     return await sender.send_message(
-        recipient_id=str(tg_id),
+        chat_id=str(tg_id),
         content=message
     )
\ No newline at end of file
@@ -0,0 +1,141 @@
+import time
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from src.enum.tg import TelegramParseMode
+from src.app.fair_scheduler import UserRateLimiter
+from src.app.routers.router_models import TelegramSender
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+BOT_LIMIT_KEY = "__bot__"
+
+
+class ReplyStreamer:
+    """
+    Потоковая отправка ответа в Telegram.
+
+    Первое сообщение уходит, когда модель выдала `first_tokens` чанков,
+    дальше оно дополняется через editMessageText. Правки не чаще лимитов
+    Telegram: `chat_limiter` - на чат, `bot_limiter` - на бота в целом.
+    Промежуточная правка, не прошедшая лимит, пропускается - ее текст
+    войдет в следующую. Промежуточный текст без разметки: недописанный
+    Markdown Telegram отклоняет.
+    """
+
+    def __init__(
+        self,
+        sender: TelegramSender,
+        chat_id: int | str,
+        *,
+        chat_limiter: UserRateLimiter,
+        bot_limiter: UserRateLimiter,
+        first_tokens: int = 8,
+    ):
+        self._sender = sender
+        self._chat_id = chat_id
+        self._chat_limiter = chat_limiter
+        self._bot_limiter = bot_limiter
+        self._first_tokens = max(1, first_tokens)
+
+        self._message_id: Optional[int] = None
+        self._shown = ""
+        self._tokens = 0
+        self._failed = False
+
+        self.first_visible_at: Optional[float] = None
+        self.edits = 0
+        self.skipped = 0
+
+    def _throttled(self) -> bool:
+        return (
+            self._chat_limiter.delay(self._chat_id) > 0
+            or self._bot_limiter.delay(BOT_LIMIT_KEY) > 0
+        )
+
+    async def _wait_limits(self) -> None:
+        delay = max(
+            self._chat_limiter.delay(self._chat_id),
+            self._bot_limiter.delay(BOT_LIMIT_KEY),
+        )
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _consume(self) -> None:
+        self._chat_limiter.consume(self._chat_id)
+        self._bot_limiter.consume(BOT_LIMIT_KEY)
+
+    async def update(self, text: str) -> None:
+        """
+        Новый чанк модели
+
+        Args:
+            text: Весь текст текущего хода модели
+        """
+        self._tokens += 1
+        if self._failed or self._tokens < self._first_tokens or not text.strip():
+            return
+        if self._throttled():
+            self.skipped += 1
+            return
+
+        preview = text[:TELEGRAM_MAX_MESSAGE_LENGTH]
+        if self._message_id is None:
+            await self._send_first(preview, TelegramParseMode.NONE)
+        elif preview != self._shown:
+            await self._edit(preview, TelegramParseMode.NONE)
+
+    async def _send_first(self, text: str, parse_mode: TelegramParseMode) -> bool:
+        self._consume()
+        self._message_id = await self._sender.send_message_get_id(
+            content=text, chat_id=str(self._chat_id), parse_mode=parse_mode,
+        )
+        if self._message_id is None:
+            # Telegram недоступен - не долбим его на каждом чанке
+            self._failed = True
+            return False
+        self._shown = text
+        self.first_visible_at = time.perf_counter()
+        return True
+
+    async def _edit(self, text: str, parse_mode: TelegramParseMode) -> bool:
+        self._consume()
+        ok = await self._sender.edit_message_text(
+            self._message_id, text, chat_id=str(self._chat_id), parse_mode=parse_mode,
+        )
+        if ok:
+            self._shown = text
+            self.edits += 1
+        return ok
+
+    async def finish(self, text: Optional[str]) -> None:
+        """
+        Финальный текст ответа: последняя правка с разметкой,
+        хвост длиннее лимита Telegram уходит отдельными сообщениями
+        """
+        if not text:
+            return
+        chunks = [
+            text[i:i + TELEGRAM_MAX_MESSAGE_LENGTH]
+            for i in range(0, len(text), TELEGRAM_MAX_MESSAGE_LENGTH)
+        ]
+
+        await self._wait_limits()
+        if self._message_id is None:
+            sent = await self._send_first(chunks[0], TelegramParseMode.MARKDOWN)
+            if not sent:
+                await self._wait_limits()
+                sent = await self._send_first(chunks[0], TelegramParseMode.NONE)
+            if not sent:
+                logger.error(f"Не удалось отправить ответ в чат {self._chat_id}")
+                return
+        elif not await self._edit(chunks[0], TelegramParseMode.MARKDOWN) and chunks[0] != self._shown:
+            # разметку Telegram не принял - оставляем текст как есть
+            await self._wait_limits()
+            await self._edit(chunks[0], TelegramParseMode.NONE)
+
+        for chunk in chunks[1:]:
+            await self._wait_limits()
+            self._consume()
+            await self._sender.send_message(content=chunk, chat_id=str(self._chat_id))
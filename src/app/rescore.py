@@ -0,0 +1,265 @@
+"""
+Пакетная переоценка лидов ResearchAgent.
+
+Нужна после смены промпта или схемы research: клиенты читаются из БД
+страницами по tg_id, research идет со своим лимитом конкурентности
+(отдельно от живого трафика), результаты пишутся пакетно после каждой
+страницы, и туда же - в файл чекпоинта - последний обработанный tg_id
+и клиенты, на которых research упал. Повторный запуск с тем же
+чекпоинтом продолжает с места остановки и повторяет упавших.
+
+Запуск: python -m src.app.rescore [--concurrency 4] [--page-size 200]
+    [--checkpoint data/rescore_checkpoint.json] [--llm GetGigaChat] [--dry-run]
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel
+
+from db.database_protocol import ClientBase
+from src.models.client_model import ClientModel
+from src.models.messages import BaseMessage, Source
+from src.core.agents.limiter import AdaptiveLimiter
+from src.core.agents.models.base import BaseAgentSingleton
+
+RESEARCH_FIELDS = ("lead_status", "client_project_info")
+
+
+class LeadRescorer:
+    """
+    Переоценка всех клиентов research-агентом.
+
+    Конкурентность ограничена собственным AdaptiveLimiter: при росте
+    задержек бэкенда (например, от живого трафика) задача сама снижает
+    число параллельных запросов. Чекпоинт пишется только после записи
+    страницы в БД, поэтому страница, прерванная на середине, будет
+    переоценена заново. Клиенты с ошибкой research запоминаются в
+    чекпоинте и повторяются в конце прогона, так что ни один клиент
+    не будет пропущен.
+    """
+
+    def __init__(
+        self,
+        agent: BaseAgentSingleton,
+        repo: ClientBase,
+        *,
+        concurrency: int = 4,
+        page_size: int = 200,
+        checkpoint_path: Optional[str] = None,
+        dry_run: bool = False,
+    ):
+        self._agent = agent
+        self._repo = repo
+        self._page_size = page_size
+        self._checkpoint_path = checkpoint_path
+        self._dry_run = dry_run
+        self._limiter = AdaptiveLimiter(
+            f"rescore:{agent.__class__.__name__}",
+            initial=concurrency,
+            max_limit=concurrency,
+        )
+
+        self.processed = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_tg_id: Optional[int] = None
+        self.failed_tg_ids: List[int] = []
+        # упавшие в прошлый раз, до чьего повтора очередь еще не дошла
+        self._retry_pending: List[int] = []
+        self.retried = 0
+        self._seconds = 0.0
+
+    def _load_checkpoint(self) -> None:
+        if not self._checkpoint_path or not os.path.exists(self._checkpoint_path):
+            return
+        with open(self._checkpoint_path, encoding="utf-8") as f:
+            state = json.load(f)
+        self.last_tg_id = state.get("last_tg_id")
+        self.processed = state.get("processed", 0)
+        self.updated = state.get("updated", 0)
+        self.skipped = state.get("skipped", 0)
+        self.failed = state.get("failed", 0)
+        self.failed_tg_ids = state.get("failed_tg_ids", [])
+        logger.info(f"Переоценка продолжается после tg_id={self.last_tg_id}, уже {self.processed} клиентов")
+
+    def _save_checkpoint(self) -> None:
+        if not self._checkpoint_path:
+            return
+        state = {
+            "last_tg_id": self.last_tg_id,
+            "processed": self.processed,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "failed_tg_ids": self.failed_tg_ids + self._retry_pending,
+        }
+        tmp_path = f"{self._checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        # замена атомарна: прерванная запись не портит чекпоинт
+        os.replace(tmp_path, self._checkpoint_path)
+
+    @staticmethod
+    def _last_client_message(client: ClientModel) -> Tuple[Optional[BaseMessage], ClientModel]:
+        """Последнее сообщение клиента и клиент с историей до него, как на живом ходе"""
+        history = client.message_history or []
+        for i in range(len(history) - 1, -1, -1):
+            if history[i].source == Source.CLIENT and history[i].content:
+                return history[i], client.model_copy(update={"message_history": history[:i]})
+        return None, client
+
+    async def _score(self, client: ClientModel) -> Optional[dict]:
+        message, context = self._last_client_message(client)
+        if message is None:
+            self.skipped += 1
+            return None
+        try:
+            research = await self._agent.execute(context, message, use_cache=False, limiter=self._limiter)
+        except Exception as exp:
+            self.failed += 1
+            self.failed_tg_ids.append(client.tg_id)
+            logger.error(f"Ошибка переоценки клиента {client.tg_id}: {exp}")
+            return None
+
+        result = research.model_dump() if isinstance(research, BaseModel) else dict(research or {})
+        return {
+            field: result[field]
+            for field in RESEARCH_FIELDS
+            if result.get(field) is not None and result[field] != getattr(client, field)
+        }
+
+    async def _rescore_page(self, page: List[ClientModel]) -> None:
+        results = await asyncio.gather(*(self._score(client) for client in page))
+        updates: Dict[int, dict] = {
+            client.tg_id: fields
+            for client, fields in zip(page, results)
+            if fields
+        }
+        if updates and not self._dry_run:
+            self.updated += await self._repo.update_clients_fields(updates)
+        elif updates:
+            self.updated += len(updates)
+
+    async def _retry_failed(self) -> None:
+        """Один повтор клиентов, на которых research упал, в том числе в прошлых запусках"""
+        retry, self.failed_tg_ids = self.failed_tg_ids, []
+        if not retry:
+            return
+        logger.info(f"Повтор переоценки {len(retry)} клиентов с ошибкой research")
+        for start in range(0, len(retry), self._page_size):
+            batch = retry[start:start + self._page_size]
+            self._retry_pending = retry[start + self._page_size:]
+            # повторно упавших _score посчитает заново
+            self.failed -= len(batch)
+            self.retried += len(batch)
+            clients = await asyncio.gather(*(self._repo.get_client(tg_id) for tg_id in batch))
+            # клиента, удаленного с прошлой попытки, переоценивать не нужно
+            await self._rescore_page([client for client in clients if client is not None])
+            self._save_checkpoint()
+
+    async def run(self) -> dict:
+        """Переоценить всех клиентов после чекпоинта, вернуть статистику"""
+        self._load_checkpoint()
+        started = time.perf_counter()
+        processed_before = self.processed
+
+        async for page in self._repo.iter_clients(self._page_size, after_tg_id=self.last_tg_id):
+            await self._rescore_page(page)
+            self.processed += len(page)
+            self.last_tg_id = page[-1].tg_id
+            self._save_checkpoint()
+
+            elapsed = time.perf_counter() - started
+            rate = (self.processed - processed_before) / elapsed * 60 if elapsed else 0.0
+            logger.info(
+                f"Переоценено {self.processed} клиентов (до tg_id={self.last_tg_id}), "
+                f"изменено {self.updated}, {rate:.1f} клиентов/мин, лимит {self._limiter.limit}"
+            )
+
+        await self._retry_failed()
+        if self.failed_tg_ids:
+            logger.warning(
+                f"После повтора research не удался для {len(self.failed_tg_ids)} клиентов, "
+                f"они останутся в чекпоинте до следующего запуска"
+            )
+        self._seconds += time.perf_counter() - started
+        return self.stats(processed_before)
+
+    def stats(self, processed_before: int = 0) -> dict:
+        done = self.processed - processed_before
+        return {
+            "processed": self.processed,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "retried": self.retried,
+            "failed_pending": len(self.failed_tg_ids),
+            "last_tg_id": self.last_tg_id,
+            "clients_per_minute": done / self._seconds * 60 if self._seconds else 0.0,
+            "limiter": self._limiter.stats(),
+        }
+
+
+def _research_llm(name: Optional[str]):
+    from data.init_configs import get_config
+    from src.core.agents.models.base import BaseLLM
+    from src.models.research import ResearchResult
+
+    offline = get_config().MOCK_LLM_CONFIG.MOCK_LLM_ENABLED
+    llm_classes = {cls.__name__: cls for cls in BaseLLM.__subclasses__() if cls.offline == offline}
+    if not llm_classes:
+        raise RuntimeError("Нет зарегистрированных LLM классов")
+    if name is None:
+        name = next(iter(llm_classes))
+    if name not in llm_classes:
+        raise RuntimeError(f"LLM {name} не найдена, доступны: {', '.join(llm_classes)}")
+    return llm_classes[name]().with_structured_output(ResearchResult)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--checkpoint", default="data/rescore_checkpoint.json")
+    parser.add_argument("--llm", default=None, help="Класс BaseLLM, по умолчанию первый найденный")
+    parser.add_argument("--dry-run", action="store_true", help="Не писать результаты в БД")
+    args = parser.parse_args()
+
+    from data.init_configs import init
+    init()
+
+    from db.database import database
+    from src.core.agents.agent_singleton import ResearchAgent
+    from src.core.agents.prompts import ResearchSystemPromptTemplate
+
+    await database.setup()
+    try:
+        agent = ResearchAgent(
+            llm=_research_llm(args.llm),
+            system_prompt=ResearchSystemPromptTemplate.get_system_prompt(),
+        )
+        rescorer = LeadRescorer(
+            agent,
+            database.get(),
+            concurrency=args.concurrency,
+            page_size=args.page_size,
+            checkpoint_path=args.checkpoint,
+            dry_run=args.dry_run,
+        )
+        stats = await rescorer.run()
+        logger.success(
+            f"Переоценка завершена: {stats['processed']} клиентов, изменено {stats['updated']}, "
+            f"ошибок {stats['failed']}, {stats['clients_per_minute']:.1f} клиентов/мин"
+        )
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,30 +1,63 @@
 import aiohttp
+from typing import Optional
+from loguru import logger
+
 from src.enum.tg import TelegramParseMode
 from data.init_configs import get_config
 
 config = get_config()
-BOT_TOKEN = config.TG_SETTINGS.bot_token
-TG_API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+BOT_TOKEN = config.TG_SETTINGS.BOT_TOKEN
+TG_API_BASE = f"https://api.telegram.org/bot{BOT_TOKEN}"
+TG_API_URL = f"{TG_API_BASE}/sendMessage"
 
 class TelegramSender:
+    async def _call(self, method: str, payload: dict) -> Optional[dict]:
+        """
+        Вызов метода Bot API
+
+        Returns:
+            Поле result ответа или None при ошибке
+        """
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{TG_API_BASE}/{method}", json=payload) as response:
+                if response.status == 200:
+                    return (await response.json()).get("result")
+                logger.warning(f"Telegram {method}: {response.status} {await response.text()}")
+                return None
+
+    @staticmethod
+    def _payload(chat_id, content, parse_mode: TelegramParseMode | None) -> dict:
+        payload = {"chat_id": chat_id, "text": content}
+        if parse_mode is not None and parse_mode.value is not None:
+            payload["parse_mode"] = parse_mode.value
+        return payload
+
     async def send_message(
         self,
         content: str | None = None,
-        chat_id: str | None = None, 
+        chat_id: str | None = None,
         parse_mode: TelegramParseMode | None = TelegramParseMode.MARKDOWN,
     ) -> bool:
-        payload = {
-            "chat_id": chat_id,
-            "text": content,
-            'parse_mode': parse_mode
-        }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                TG_API_URL, 
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    return True
-                else:
-                    return False
-                
+        return await self.send_message_get_id(content, chat_id, parse_mode) is not None
+
+    async def send_message_get_id(
+        self,
+        content: str | None = None,
+        chat_id: str | None = None,
+        parse_mode: TelegramParseMode | None = TelegramParseMode.MARKDOWN,
+    ) -> Optional[int]:
+        """sendMessage, возвращает message_id отправленного сообщения"""
+        result = await self._call("sendMessage", self._payload(chat_id, content, parse_mode))
+        return result.get("message_id") if result else None
+
+    async def edit_message_text(
+        self,
+        message_id: int,
+        content: str,
+        chat_id: str | None = None,
+        parse_mode: TelegramParseMode | None = TelegramParseMode.MARKDOWN,
+    ) -> bool:
+        """editMessageText для ранее отправленного сообщения"""
+        payload = self._payload(chat_id, content, parse_mode)
+        payload["message_id"] = message_id
+        return await self._call("editMessageText", payload) is not None
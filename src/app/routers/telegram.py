@@ -1,58 +1,64 @@
-import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
-from fastapi import APIRouter, HTTPException
+import time
+from loguru import logger
+from pydantic import ValidationError
+from fastapi import APIRouter, HTTPException, Request
 
 from data.init_configs import get_config
-from src.models.messages import BaseMessage, Source
-from src.app.telegram_queue import telegram_event_queue
+from src.enum.queue import AdmissionResult
+from src.models.telegram import TelegramUpdate, to_base_message
+from src.app.telegram_queue import admission_controller, update_deduplicator
+from utils.deadline import get_retry_budget
 
 router = APIRouter()
 config = get_config()
 
-class TelegramUpdate(BaseModel):
-    update_id: int
-    message: Optional[dict] = Field(default=None)
-    edited_message: Optional[dict] = Field(default=None)
-    channel_post: Optional[dict] = Field(default=None)
-
 
 @router.post("/tg_webhook")
-async def telegram_webhook(update: TelegramUpdate):
+async def telegram_webhook(request: Request):
     """
     POST endpoint для обработки входящих обновлений от Telegram  
 
+    Тело разбирается напрямую в типизированный TelegramUpdate,
+    без промежуточного dict.
+
     Пример структуры update:
     {'message_id':, 'from': {'id': , 'is_bot': , 'first_name': '', 'username': '', 
     'language_code': '', 'is_premium': }, 
     'chat': {'id': , 'first_name': '', 'username': '', 'type': ''}, 'date': , 'text': ''}
     """
     try:
-        message = update.message or update.edited_message or update.channel_post
-        print(f"Получено обновление от Telegram: {message}")
-        if not message:
-            return {"status": "ignored", "reason": "В сообщении нет данных"}
-        user_info: dict = message.get("from", {})
-        from_info: dict = message.get('from', {})
+        update = TelegramUpdate.model_validate_json(await request.body())
+    except ValidationError as e:
+        logger.warning(f"Некорректное обновление Telegram: {e.error_count()} ошибок")
+        return {"status": "ignored", "reason": "Некорректное обновление"}
+
+    try:
+        if await update_deduplicator.is_duplicate(update.update_id):
+            # 200, чтобы Telegram перестал ретраить доставку
+            return {"status": "ok", "duplicate": True}
 
-        tg_id = user_info.get("id")
-        content = message.get("text", "")
-        tg_nick = from_info.get('username', "")
-        message_date = datetime.datetime.fromtimestamp(message.get("date", datetime.datetime.now().timestamp()))
+        message = update.payload
+        if message is None:
+            return {"status": "ignored", "reason": "В сообщении нет данных"}
 
-        item = BaseMessage(
-            timestamp=message_date,
-            source=Source.CLIENT,
-            content=content,
-            tg_nick=tg_nick,
-            tg_id=tg_id,
-        )
+        item = to_base_message(message)
+        deadline_seconds = config.BASE_CONFIG.MESSAGE_DEADLINE_SECONDS
+        if deadline_seconds:
+            # отсчет от приема вебхука, время в очереди тоже входит в дедлайн
+            item.deadline = time.time() + deadline_seconds
+        logger.debug(f"Получено обновление {update.update_id} от {item.tg_id}")
 
-        await telegram_event_queue.put(item)
+        # ждем место в очереди не дольше ADMISSION_MAX_WAIT_SECONDS
+        result = await admission_controller.admit(item)
+        if result == AdmissionResult.REJECTED:
+            # 200, иначе Telegram начнет ретраить и усилит перегрузку
+            return {'status': 'rejected', 'reason': 'Очередь переполнена'}
         return {'status': 'ok'}
         
     except Exception as e:
         print(f"❌ КРИТИЧЕСКАЯ ОШИБКА: {str(e)}")
+        # даем Telegram доставить обновление повторно
+        await update_deduplicator.forget(update.update_id)
         raise HTTPException(status_code=500, detail="Произошла ошибка при обработке обновления Telegram")
 
 @router.get("/tg_webhook")
@@ -66,3 +72,13 @@ async def verify_webhook():
         "bot_token_configured": True
     }
 
+@router.get("/tg_webhook/stats")
+async def webhook_stats():
+    """
+    GET endpoint со статистикой входящих обновлений
+    """
+    return {
+        "dedup": update_deduplicator.stats(),
+        "admission": await admission_controller.stats(),
+        "retries": get_retry_budget().stats(),
+    }
@@ -0,0 +1,116 @@
+import time
+import asyncio
+from typing import Callable, Dict
+
+from loguru import logger
+
+from db.database_protocol import ClientBase
+from src.models.client_model import ClientModel
+from src.models.messages import BaseMessage, Source
+from src.core.agents.models.base import BaseAgentSingleton
+from src.core.agents.limiter import AdaptiveLimiter
+from src.core.agents.prompts import SummaryPromptTemplates
+from utils.deadline import deadline_scope
+
+
+class HistorySummarizer:
+    """
+    Фоновое сворачивание старой части истории клиента в скользящее резюме.
+
+    После хода клиента, если несвернутых сообщений набралось не меньше
+    `keep_recent + fold_batch`, все, кроме последних `keep_recent`, дописываются
+    в резюме агентом резюме. Работает вне критического пути: ход клиента
+    не ждет резюме, а следующий ход подхватит его из БД.
+    На клиента одновременно идет не больше одного сворачивания.
+
+    Сворачивания идут через собственный AdaptiveLimiter на `concurrency`
+    запросов: фоновая работа не занимает слоты лимитера бэкенда, которые
+    нужны ходам клиентов, и не сбивает его замеры.
+    """
+
+    def __init__(
+        self,
+        agent: BaseAgentSingleton,
+        repo: Callable[[], ClientBase],
+        *,
+        keep_recent: int = 10,
+        fold_batch: int = 10,
+        concurrency: int = 2,
+    ):
+        self._agent = agent
+        self._repo = repo
+        self._keep_recent = keep_recent
+        self._fold_batch = max(1, fold_batch)
+        self._tasks: Dict[int | str, asyncio.Task] = {}
+        self._limiter = AdaptiveLimiter(
+            f"summary:{agent.__class__.__name__}",
+            initial=concurrency,
+            max_limit=concurrency,
+        )
+
+        self.folds = 0
+        self.folded_messages = 0
+        self.errors = 0
+        self._seconds = 0.0
+
+    def schedule(self, client_model: ClientModel) -> None:
+        """Запустить сворачивание, если у клиента накопилось достаточно сообщений"""
+        tg_id = client_model.tg_id
+        if tg_id is None or tg_id in self._tasks:
+            return
+
+        tail = len(client_model.message_history or []) - client_model.summarized_count
+        if tail < self._keep_recent + self._fold_batch:
+            return
+
+        task = asyncio.create_task(self._fold(client_model))
+        self._tasks[tg_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(tg_id, None))
+
+    async def _fold(self, client_model: ClientModel) -> None:
+        history = client_model.message_history or []
+        start = client_model.summarized_count
+        end = len(history) - self._keep_recent
+        transcript = SummaryPromptTemplates.format_transcript(history[start:end])
+
+        started = time.perf_counter()
+        try:
+            # задача наследует дедлайн хода, но клиент резюме не ждет
+            with deadline_scope(None):
+                summary = await self._agent.execute(
+                    client_model,
+                    BaseMessage(content=transcript, source=Source.CLIENT, tg_id=client_model.tg_id),
+                    limiter=self._limiter,
+                )
+            saved = await self._repo().update_client_fields(
+                client_model.tg_id,
+                history_summary=summary.content,
+                summarized_count=end,
+            )
+            if not saved:
+                raise RuntimeError("резюме не сохранено в БД")
+        except Exception as exp:
+            self.errors += 1
+            logger.error(f"Ошибка сворачивания истории клиента {client_model.tg_id}: {exp}")
+            return
+        finally:
+            self._seconds += time.perf_counter() - started
+
+        self.folds += 1
+        self.folded_messages += end - start
+        logger.info(f"История клиента {client_model.tg_id}: свернуто {end - start} сообщений")
+
+    async def stop(self) -> None:
+        """Дождаться начатых сворачиваний"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "folds": self.folds,
+            "folded_messages": self.folded_messages,
+            "errors": self.errors,
+            "in_flight": len(self._tasks),
+            "limiter": self._limiter.stats(),
+            "avg_seconds": self._seconds / (self.folds + self.errors) if self.folds + self.errors else 0.0,
+        }
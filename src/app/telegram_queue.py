@@ -1,4 +1,29 @@
-import asyncio
 from data.init_configs import get_config
+from src.enum.queue import QueueBackend, OverloadPolicy
+from src.app.ingress import (
+    EventQueue, UpdateDeduplicator, AdmissionController, RedisOverflowStore
+)
+from src.factories.queue_factory import QueueFactory
+
 config = get_config()
-telegram_event_queue: asyncio.Queue = asyncio.Queue(maxsize=config.BASE_CONFIG.MAX_CONCURRENT_EXECUTE)
\ No newline at end of file
+telegram_event_queue: EventQueue = QueueFactory.create(
+    QueueBackend(config.BASE_CONFIG.QUEUE_BACKEND),
+    config,
+)
+
+update_deduplicator = UpdateDeduplicator(
+    max_size=config.BASE_CONFIG.DEDUP_CACHE_SIZE,
+    redis=config.redis_client if config.BASE_CONFIG.DEDUP_USE_REDIS else None,
+    ttl_seconds=config.BASE_CONFIG.DEDUP_TTL_SECONDS,
+)
+
+overload_policy = OverloadPolicy(config.BASE_CONFIG.OVERLOAD_POLICY)
+admission_controller = AdmissionController(
+    telegram_event_queue,
+    max_wait_seconds=config.BASE_CONFIG.ADMISSION_MAX_WAIT_SECONDS,
+    policy=overload_policy,
+    overflow=(
+        RedisOverflowStore(config.redis_client)
+        if overload_policy == OverloadPolicy.SPILL else None
+    ),
+)
@@ -0,0 +1,314 @@
+import time
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from loguru import logger
+from pydantic import BaseModel
+
+from src.models.messages import BaseMessage
+from src.app.ingress.base import EventQueue
+from src.app.fair_scheduler import FairScheduler, UserRateLimiter
+
+MessageHandler = Callable[[BaseMessage | List[BaseMessage]], Awaitable[object]]
+
+
+class WorkerStats(BaseModel):
+    """
+    Статистика одного воркера пула
+
+    Args:
+        worker_id (int): Номер воркера
+        processed (int): Количество обработанных сообщений
+        turns (int): Количество вызовов обработчика (пачка сообщений - один ход)
+        errors (int): Количество сообщений, завершившихся ошибкой
+        busy_seconds (float): Суммарное время обработки сообщений
+        uptime_seconds (float): Время жизни воркера
+        utilisation (float): Доля времени, проведенного в обработке (0..1)
+    """
+    worker_id: int
+    processed: int = 0
+    turns: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    uptime_seconds: float = 0.0
+    utilisation: float = 0.0
+
+
+class UserWorkerPool:
+    """
+    Пул воркеров, разбирающий очередь сообщений конкурентно.
+
+    Сообщения одного tg_id обрабатываются строго по порядку и никогда
+    параллельно, сообщения разных пользователей - параллельно в пределах
+    `workers` одновременно активных пользователей.
+
+    При `debounce_seconds > 0` пользователь попадает к воркеру только после
+    паузы без новых сообщений (или при накоплении `max_burst` сообщений),
+    и воркер получает всю пачку разом - список вместо одного сообщения.
+
+    Порядок обслуживания готовых пользователей задает FairScheduler
+    (DRR по классам приоритета из lead_status), `rate_per_minute` ограничивает
+    число ходов одного пользователя, а `max_pending_per_user` не дает одному
+    пользователю занять весь буфер `max_pending`.
+    """
+
+    def __init__(
+        self,
+        handler: MessageHandler,
+        *,
+        source: EventQueue,
+        workers: int,
+        max_pending: int = 1000,
+        debounce_seconds: float = 0.0,
+        max_burst: int = 1,
+        max_pending_per_user: int = 50,
+        priority_weights: Optional[Dict[str, int]] = None,
+        rate_per_minute: float = 0.0,
+        rate_burst: int = 1,
+        on_ready: Optional[Callable[[int | str | None], None]] = None,
+    ):
+        if workers < 1:
+            raise ValueError("Количество воркеров должно быть больше 0")
+
+        self._handler = handler
+        self._source = source
+        self._workers_count = workers
+        self._max_pending = max_pending
+        self._debounce_seconds = debounce_seconds
+        self._max_burst = max(1, max_burst) if debounce_seconds > 0 else 1
+
+        self._pending: Dict[int | str | None, Deque[BaseMessage]] = {}
+        self._ready = FairScheduler(priority_weights)
+        self._rate_limiter = (
+            UserRateLimiter(rate_per_minute, rate_burst) if rate_per_minute > 0 else None
+        )
+        self._max_pending_per_user = max_pending_per_user
+        self._on_ready = on_ready
+        self._pending_total = 0
+        self.dropped = 0
+
+        # пользователи в очереди готовых или в обработке
+        self._scheduled: Set[int | str | None] = set()
+        self._timers: Dict[int | str | None, asyncio.TimerHandle] = {}
+        self._last_arrival: Dict[int | str | None, float] = {}
+        self._capacity = asyncio.Condition()
+
+        self._busy = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._draining = False
+
+        self._stats: List[WorkerStats] = []
+        self._started_at: float = 0.0
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """Количество сообщений, ожидающих обработки внутри пула"""
+        return self._pending_total
+
+    @property
+    def active_users(self) -> int:
+        """Количество пользователей с непустой очередью сообщений"""
+        return len(self._pending)
+
+    def set_priority(self, key, lead_status: Optional[str]) -> None:
+        """Класс приоритета пользователя по ClientModel.lead_status"""
+        self._ready.set_priority(key, lead_status)
+
+    def _mark_ready(self, key) -> None:
+        self._timers.pop(key, None)
+        self._scheduled.add(key)
+        self._ready.put_nowait(key)
+        if self._on_ready is not None:
+            # пользователь не в обработке - его данные можно начать готовить заранее
+            self._on_ready(key)
+
+    def _schedule(self, key, delay: float) -> None:
+        """Поставить пользователя к воркерам через delay секунд тишины"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        if len(self._pending[key]) >= self._max_burst:
+            delay = 0.0
+        if self._rate_limiter is not None:
+            delay = max(delay, self._rate_limiter.delay(key))
+
+        if delay <= 0:
+            self._mark_ready(key)
+        else:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(delay, self._mark_ready, key)
+
+    async def _dispatch(self) -> None:
+        """Раскладывает сообщения из общей очереди по очередям пользователей"""
+        while True:
+            async with self._capacity:
+                await self._capacity.wait_for(
+                    lambda: self._pending_total < self._max_pending
+                )
+
+            item: BaseMessage = await self._source.get()
+            key = item.tg_id
+
+            user_queue = self._pending.setdefault(key, deque())
+            if len(user_queue) >= self._max_pending_per_user:
+                self.dropped += 1
+                logger.warning(f"Пользователь {key} превысил лимит очереди, сообщение отброшено")
+                await self._ack(item)
+                continue
+
+            user_queue.append(item)
+            self._last_arrival[key] = time.monotonic()
+            self._pending_total += 1
+
+            if key not in self._scheduled:
+                # пользователь не в обработке - ждем паузу и ставим в очередь готовых
+                self._schedule(key, self._debounce_seconds)
+
+    async def _worker(self, stats: WorkerStats) -> None:
+        while True:
+            key = await self._ready.get()
+            if self._draining:
+                # сообщения остаются неподтвержденными и будут доставлены повторно
+                return
+            self._busy += 1
+            self._idle.clear()
+            if self._rate_limiter is not None:
+                self._rate_limiter.consume(key)
+            user_queue = self._pending[key]
+            batch_size = min(len(user_queue), self._max_burst)
+            batch = [user_queue.popleft() for _ in range(batch_size)]
+
+            started = time.perf_counter()
+            try:
+                await self._handler(batch[0] if batch_size == 1 else batch)
+                stats.processed += batch_size
+                stats.turns += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exp:
+                stats.errors += batch_size
+                logger.error(f"Ошибка обработки сообщения от {key}: {exp}")
+            finally:
+                stats.busy_seconds += time.perf_counter() - started
+                for item in batch:
+                    await self._ack(item)
+                self._pending_total -= batch_size
+
+                if user_queue:
+                    # в конец очереди готовых, чтобы не держать воркер за одним пользователем
+                    self._scheduled.discard(key)
+                    quiet_left = (
+                        self._last_arrival[key] + self._debounce_seconds - time.monotonic()
+                    )
+                    self._schedule(key, quiet_left)
+                else:
+                    del self._pending[key]
+                    self._last_arrival.pop(key, None)
+                    self._scheduled.discard(key)
+
+                self._busy -= 1
+                if not self._busy:
+                    self._idle.set()
+
+                async with self._capacity:
+                    self._capacity.notify()
+
+    async def _ack(self, item: BaseMessage) -> None:
+        # подтверждаем и после ошибки, иначе сообщение будет вечно переобрабатываться
+        try:
+            await self._source.ack(item)
+        except Exception as exp:
+            logger.error(f"Не удалось подтвердить сообщение от {item.tg_id}: {exp}")
+
+    def start(self) -> None:
+        """Запуск диспетчера и воркеров"""
+        if self._tasks:
+            return
+
+        self._started_at = time.monotonic()
+        self._stats = [WorkerStats(worker_id=i) for i in range(self._workers_count)]
+
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        for stats in self._stats:
+            self._tasks.append(asyncio.create_task(self._worker(stats)))
+
+        logger.info(f"Пул воркеров запущен: workers={self._workers_count}")
+
+    async def stop(self) -> None:
+        """Остановка диспетчера и воркеров"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        logger.info("Пул воркеров остановлен")
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Плавная остановка: не брать новые сообщения и дождаться текущих
+
+        Args:
+            timeout: Сколько секунд ждать завершения начатых сообщений
+
+        Returns:
+            True если все начатые сообщения завершились до дедлайна
+        """
+        self._draining = True
+        if self._tasks:
+            # первая задача - диспетчер
+            self._tasks[0].cancel()
+
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            drained = True
+        except asyncio.TimeoutError:
+            logger.warning(f"Дедлайн остановки истек, в обработке {self._busy} сообщений")
+            drained = False
+
+        await self.stop()
+        return drained
+
+    async def join(self) -> None:
+        """Ожидание завершения всех задач пула"""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self, max_concurrent: Optional[int] = None) -> dict:
+        """
+        Снимок утилизации пула
+
+        Args:
+            max_concurrent: MAX_CONCURRENT_EXECUTE для сравнения размера пула
+
+        Returns:
+            dict со статистикой по каждому воркеру и по пулу в целом
+        """
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        workers = []
+        for stats in self._stats:
+            stats.uptime_seconds = uptime
+            stats.utilisation = stats.busy_seconds / uptime if uptime else 0.0
+            workers.append(stats.model_dump())
+
+        total_utilisation = (
+            sum(w["utilisation"] for w in workers) / len(workers) if workers else 0.0
+        )
+        result = {
+            "workers": workers,
+            "utilisation": total_utilisation,
+            "pending": self._pending_total,
+            "active_users": len(self._pending),
+            "source_qsize": self._source.qsize(),
+            "dropped": self.dropped,
+            "scheduler": self._ready.stats(),
+        }
+        if self._rate_limiter is not None:
+            result["throttled"] = self._rate_limiter.throttled
+        if max_concurrent is not None:
+            result["max_concurrent_execute"] = max_concurrent
+        return result
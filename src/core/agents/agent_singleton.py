@@ -1,3 +1,4 @@
+from typing import Optional, TYPE_CHECKING
 from langchain.messages import AnyMessage, AIMessage, SystemMessage
 from pydantic import BaseModel
 
@@ -5,12 +6,50 @@ from src.enum.client import Source
 from src.models.messages import BaseMessage
 from src.models.client_model import ClientModel
 from src.core.agents.models.base import BaseAgentSingleton, BaseLLM
-from src.core.agents.prompts import DialogPromptTemplates, ResearchPromptTemplates
+from src.core.agents.prompts import DialogPromptTemplates, ResearchPromptTemplates, SummaryPromptTemplates
+from src.factories.semantic_cache_factory import SemanticCacheFactory
 from src.exceptions.agent_exp import AgentEnum, AgentInitializationException, LLMException
 
+if TYPE_CHECKING:
+    from src.core.agents.semantic_cache import SemanticCache
+
 class DialogAgent(BaseAgentSingleton):
     def __init__(self, *, llm: BaseLLM, system_prompt: SystemMessage):
         super().__init__(llm=llm, system_prompt=system_prompt)
+        if not hasattr(self, "_semantic_cache"):
+            from data.init_configs import get_config
+            self._semantic_cache: Optional[SemanticCache] = SemanticCacheFactory.create(
+                get_config().BASE_CONFIG
+            )
+
+    async def _cached_result(self, client_model, user_message, cache_key) -> Optional[BaseModel]:
+        cached = await super()._cached_result(client_model, user_message, cache_key)
+        if cached is not None or not self._semantic_applicable(client_model):
+            return cached
+
+        answer = await self._semantic_cache.lookup(user_message.content)
+        if answer is None:
+            return None
+        return BaseMessage(content=answer, source=Source.AGENT, tg_id=client_model.tg_id)
+
+    async def _remember_result(self, client_model, user_message, cache_key, result) -> None:
+        await super()._remember_result(client_model, user_message, cache_key, result)
+        if self._semantic_applicable(client_model) and isinstance(result, BaseMessage):
+            await self._semantic_cache.store(user_message.content, result.content)
+
+    def _semantic_applicable(self, client_model: ClientModel) -> bool:
+        """Семантический кэш только для первых сообщений диалога"""
+        return (
+            self._semantic_cache is not None
+            and self._semantic_cache.applicable(len(client_model.message_history or []))
+        )
+
+    def semantic_cache_stats(self) -> Optional[dict]:
+        return self._semantic_cache.stats() if self._semantic_cache is not None else None
+
+    def flush_semantic_cache(self) -> None:
+        if self._semantic_cache is not None:
+            self._semantic_cache.flush()
 
     def _get_init_exception(self, exp: Exception) -> Exception:
         return AgentInitializationException(agent=AgentEnum.DIALOG, exp=exp)
@@ -22,6 +61,7 @@ class DialogAgent(BaseAgentSingleton):
         return await DialogPromptTemplates.build_messages(
             client=client_model,
             message=user_message,
+            budget=self._prompt_budget(),
         )
     async def _get_model_response_result(self,result_raw: dict, *, client_model: ClientModel) -> dict:
         ai_messages = [
@@ -37,7 +77,7 @@ class DialogAgent(BaseAgentSingleton):
 
         return BaseMessage(
             content=ai_messages[-1].content,
-            source=Source.agent,
+            source=Source.AGENT,
             tg_id=client_model.tg_id,
         )
 
@@ -55,6 +95,7 @@ class ResearchAgent(BaseAgentSingleton):
         return await ResearchPromptTemplates.build_message(
             client=client_model,
             message=user_message,
+            budget=self._prompt_budget(),
         )
     
     async def _get_model_response_result(self, result_raw: dict, *, client_model: ClientModel) -> BaseModel:
@@ -77,3 +118,38 @@ class ResearchAgent(BaseAgentSingleton):
 
         return schema(**structured_response)
 
+
+class SummaryAgent(BaseAgentSingleton):
+    def __init__(self, *, llm: BaseLLM, system_prompt: SystemMessage):
+        super().__init__(llm=llm, system_prompt=system_prompt)
+
+    def _get_init_exception(self, exp: Exception) -> Exception:
+        return AgentInitializationException(agent=AgentEnum.SUMMARY, exp=exp)
+
+    def _get_execute_exception(self, exp: Exception) -> Exception:
+        return LLMException(agent=AgentEnum.SUMMARY, exp=exp, message="Ошибка при выполнении execute")
+
+    async def _build_messages(self, client_model, user_message) -> list[AnyMessage]:
+        return await SummaryPromptTemplates.build_messages(
+            client=client_model,
+            message=user_message,
+        )
+
+    async def _get_model_response_result(self, result_raw: dict, *, client_model: ClientModel) -> BaseMessage:
+        ai_messages = [
+                msg for msg in result_raw.get("messages", [])
+                if isinstance(msg, AIMessage)
+            ]
+
+        if not ai_messages or not ai_messages[-1].content:
+            raise LLMException(
+                agent=AgentEnum.SUMMARY,
+                exp=None,
+                message="LLM не вернула резюме"
+            )
+
+        return BaseMessage(
+            content=ai_messages[-1].content,
+            source=Source.AGENT,
+            tg_id=client_model.tg_id,
+        )
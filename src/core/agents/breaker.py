@@ -0,0 +1,254 @@
+import time
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from langgraph.errors import GraphBubbleUp
+from langchain_core.language_models import BaseChatModel
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain.agents.middleware.model_fallback import ModelFallbackMiddleware
+
+from src.enum.breaker import BreakerState
+from src.exceptions.agent_exp import BackendUnavailableException, LimiterRejectedException
+from utils.deadline import allow_retry
+
+
+class CircuitBreaker:
+    """
+    Автомат LLM-бэкенда: closed -> open -> half_open -> closed.
+
+    В closed учитываются последние `window` вызовов; если их не меньше
+    `min_calls` и доля неудачных (ошибка или дольше `slow_call_seconds`)
+    достигла `error_rate`, автомат размыкается. В open вызовы не идут
+    `open_seconds`, затем пропускается до `half_open_probes` пробных:
+    удача замыкает автомат, неудача снова размыкает.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call_seconds: float = 0.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=max(1, window))
+        self._min_calls = max(1, min_calls)
+        self._error_rate = error_rate
+        self._slow_call_seconds = slow_call_seconds
+        self._open_seconds = open_seconds
+        self._half_open_probes = max(1, half_open_probes)
+
+        self.state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+
+        self.calls = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.opened = 0
+
+    def _transition(self, state: BreakerState, reason: str) -> None:
+        previous, self.state = self.state, state
+        if state == BreakerState.OPEN:
+            self._opened_at = time.monotonic()
+            self.opened += 1
+            logger.warning(f"Автомат {self.name}: {previous} -> {state} ({reason})")
+        else:
+            logger.info(f"Автомат {self.name}: {previous} -> {state} ({reason})")
+        if state != BreakerState.HALF_OPEN:
+            self._probes = 0
+        if state == BreakerState.CLOSED:
+            self._outcomes.clear()
+
+    def available(self) -> bool:
+        """Можно ли сейчас звать бэкенд, без занятия пробного слота"""
+        if self.state == BreakerState.OPEN:
+            return time.monotonic() - self._opened_at >= self._open_seconds
+        if self.state == BreakerState.HALF_OPEN:
+            return self._probes < self._half_open_probes
+        return True
+
+    def allow(self) -> bool:
+        """Пропустить вызов; в half_open занимает пробный слот до record/release"""
+        if self.state == BreakerState.OPEN:
+            if time.monotonic() - self._opened_at < self._open_seconds:
+                self.short_circuited += 1
+                return False
+            self._transition(BreakerState.HALF_OPEN, f"прошло {self._open_seconds:g} с")
+        if self.state == BreakerState.HALF_OPEN:
+            if self._probes >= self._half_open_probes:
+                self.short_circuited += 1
+                return False
+            self._probes += 1
+        return True
+
+    def release(self) -> None:
+        """Вызов отменен до результата - пробный слот освобождается без оценки"""
+        if self.state == BreakerState.HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.calls += 1
+        slow = bool(self._slow_call_seconds) and latency > self._slow_call_seconds
+        failed = not ok or slow
+        if failed:
+            self.failures += 1
+
+        if self.state == BreakerState.HALF_OPEN:
+            if failed:
+                self._transition(BreakerState.OPEN, "пробный вызов неудачен")
+            else:
+                self._transition(BreakerState.CLOSED, "пробный вызов успешен")
+            return
+        if self.state == BreakerState.OPEN:
+            # ответ вызова, начатого до размыкания
+            return
+
+        self._outcomes.append((ok, slow))
+        if len(self._outcomes) < self._min_calls:
+            return
+        rate = sum(1 for ok, slow in self._outcomes if not ok or slow) / len(self._outcomes)
+        if rate >= self._error_rate:
+            self._transition(
+                BreakerState.OPEN,
+                f"неудачных {rate:.0%} из {len(self._outcomes)}"
+                + (f", последний {latency:.1f} с" if slow else ""),
+            )
+
+    def stats(self) -> dict:
+        recent = len(self._outcomes)
+        return {
+            "state": str(self.state),
+            "error_rate": (
+                sum(1 for ok, slow in self._outcomes if not ok or slow) / recent if recent else 0.0
+            ),
+            "calls": self.calls,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "opened": self.opened,
+            "open_for_seconds": (
+                time.monotonic() - self._opened_at if self.state == BreakerState.OPEN else 0.0
+            ),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+# бэкенды, уже занятые этим логическим вызовом модели: при дублировании
+# HedgingMiddleware основной и дублирующий запросы делят одно множество
+_claimed_backends: ContextVar[Optional[Set[str]]] = ContextVar("claimed_backends", default=None)
+# имя обертки BaseLLM по id модели, которую она отдала
+_backends: Dict[int, str] = {}
+
+
+def register_backend(name: str, model: BaseChatModel) -> None:
+    _backends[id(model)] = name
+
+
+def backend_of(model: BaseChatModel) -> str:
+    """Имя бэкенда модели: класс обертки BaseLLM, если модель зарегистрирована"""
+    return _backends.get(id(model), model.__class__.__name__)
+
+
+@contextmanager
+def claim_backends(backends: Set[str]):
+    """
+    Задачи, созданные внутри блока, видят общее множество занятых бэкендов
+
+    Множество изменяемое: бэкенд, занятый одной задачей, сразу виден другой.
+    """
+    token = _claimed_backends.set(backends)
+    try:
+        yield backends
+    finally:
+        _claimed_backends.reset(token)
+
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    breaker = _breakers.get(backend)
+    if breaker is None:
+        from data.init_configs import get_config
+        base_config = get_config().BASE_CONFIG
+        breaker = CircuitBreaker(
+            backend,
+            window=base_config.BREAKER_WINDOW,
+            min_calls=base_config.BREAKER_MIN_CALLS,
+            error_rate=base_config.BREAKER_ERROR_RATE,
+            slow_call_seconds=base_config.BREAKER_SLOW_CALL_SECONDS,
+            open_seconds=base_config.BREAKER_OPEN_SECONDS,
+            half_open_probes=base_config.BREAKER_HALF_OPEN_PROBES,
+        )
+        _breakers[backend] = breaker
+    return breaker
+
+
+def breaker_stats() -> dict:
+    """Состояние автоматов всех бэкендов"""
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+
+class BreakerFallbackMiddleware(ModelFallbackMiddleware):
+    """
+    ModelFallbackMiddleware с автоматами: бэкенды с разомкнутым автоматом
+    пропускаются сразу, без ожидания их таймаута. Если пропущены все,
+    вызов падает с BackendUnavailableException. Переход к следующей модели
+    после ошибки - повтор: он идет из общего бюджета и в пределах дедлайна.
+    Бэкенды, которые уже вызывает параллельный запрос того же хода
+    (`claim_backends`), в цепочку не попадают.
+    """
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ):
+        candidates: List[BaseChatModel] = [request.model]
+        candidates += [model for model in self.models if model is not request.model]
+
+        claimed = _claimed_backends.get()
+        last_exception: Optional[Exception] = None
+        skipped: List[str] = []
+        for model in candidates:
+            if claimed is not None and model is not request.model and backend_of(model) in claimed:
+                # этот бэкенд уже отвечает на тот же запрос в другой задаче
+                continue
+            breaker = get_breaker(backend_of(model))
+            if not breaker.allow():
+                skipped.append(breaker.name)
+                continue
+            if last_exception is not None and not allow_retry("fallback"):
+                breaker.release()
+                break
+            if claimed is not None:
+                claimed.add(breaker.name)
+
+            started = time.perf_counter()
+            try:
+                response = await handler(
+                    request if model is request.model else request.override(model=model)
+                )
+            except (asyncio.CancelledError, GraphBubbleUp):
+                breaker.release()
+                raise
+            except LimiterRejectedException as exp:
+                # бэкенд не вызывался - перегружена своя очередь, автомату оценивать нечего
+                breaker.release()
+                last_exception = exp
+                continue
+            except Exception as exp:
+                breaker.record(time.perf_counter() - started, ok=False)
+                last_exception = exp
+                continue
+            breaker.record(time.perf_counter() - started, ok=True)
+            return response
+
+        if last_exception is not None:
+            raise last_exception
+        raise BackendUnavailableException(skipped)
@@ -0,0 +1,141 @@
+import json
+import time
+import hashlib
+import importlib
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from langchain.messages import AnyMessage
+
+
+def messages_cache_key(messages: List[AnyMessage], *, model: str, response_format: Any = None) -> str:
+    """
+    Стабильный ключ кэша для списка сообщений LLM
+
+    Args:
+        messages: Вывод _build_messages
+        model: Идентичность модели (класс и параметры генерации)
+        response_format: _response_format модели, если есть
+
+    Returns:
+        sha256 hex
+    """
+    schema = None
+    if isinstance(response_format, dict):
+        schema = response_format.get("schema")
+        schema = getattr(schema, "__qualname__", repr(schema)), response_format.get("method")
+    elif response_format is not None:
+        schema = getattr(response_format, "__qualname__", repr(response_format))
+
+    payload = json.dumps(
+        {
+            "model": model,
+            "response_format": schema,
+            "messages": [[type(msg).__name__, msg.content] for msg in messages],
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _dump(value: BaseModel) -> str:
+    cls = type(value)
+    return json.dumps({
+        "type": f"{cls.__module__}:{cls.__qualname__}",
+        "data": value.model_dump(mode="json"),
+    })
+
+
+def _load(raw: bytes | str) -> BaseModel:
+    payload = json.loads(raw)
+    module, qualname = payload["type"].split(":")
+    cls = getattr(importlib.import_module(module), qualname)
+    return cls.model_validate(payload["data"])
+
+
+class ResponseCache:
+    """
+    Кэш ответов агента: LRU в памяти процесса и опционально Redis,
+    общий для всех воркеров. Кэшируются только pydantic-результаты.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        ttl_seconds: int = 0,
+        max_entries: int = 1024,
+        redis: Optional[Redis] = None,
+    ):
+        self._name = name
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._redis = redis
+        self._local: OrderedDict[str, tuple[float, BaseModel]] = OrderedDict()
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    async def get(self, key: str) -> Optional[BaseModel]:
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                self.hits += 1
+                return value.model_copy(deep=True)
+            del self._local[key]
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(f"agent:cache:{self._name}:{key}")
+                if raw is not None:
+                    value = _load(raw)
+                    self._put_local(key, value)
+                    self.redis_hits += 1
+                    return value.model_copy(deep=True)
+            except Exception as exp:
+                logger.warning(f"Redis-кэш {self._name} недоступен: {exp}")
+
+        self.misses += 1
+        return None
+
+    def _put_local(self, key: str, value: BaseModel) -> None:
+        self._local[key] = (time.monotonic() + self._ttl, value)
+        self._local.move_to_end(key)
+        if len(self._local) > self._max_entries:
+            self._local.popitem(last=False)
+
+    async def set(self, key: str, value: Any) -> None:
+        if not isinstance(value, BaseModel):
+            return
+        self._put_local(key, value.model_copy(deep=True))
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    f"agent:cache:{self._name}:{key}", _dump(value), ex=self._ttl
+                )
+            except Exception as exp:
+                logger.warning(f"Redis-кэш {self._name} недоступен: {exp}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "ttl_seconds": self._ttl,
+            "entries": len(self._local),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
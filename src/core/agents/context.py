@@ -0,0 +1,242 @@
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from langchain.messages import AnyMessage, HumanMessage, AIMessage, SystemMessage
+
+from src.models.messages import BaseMessage, Source
+from src.models.client_model import ClientModel
+
+# служебные токены роли и разделителей на каждое сообщение чата
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# история идет в промпт отдельными сообщениями, а не в JSON профиля
+HISTORY_FIELDS = {"message_history", "history_summary", "summarized_count"}
+
+
+class TokenCounter:
+    """
+    Подсчет токенов через tiktoken с LRU-кэшем по тексту.
+
+    История клиента на каждом ходе та же, что и на прошлом, плюс пара
+    новых сообщений - из кэша берутся все, кроме новых, и бюджет
+    считается без повторной токенизации.
+    Без tiktoken (или без файла кодировки офлайн) - оценка по байтам.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base", max_entries: int = 50_000):
+        self._max_entries = max_entries
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding)
+        except Exception as exp:
+            logger.warning(f"⚠ tiktoken {encoding} недоступен ({exp}), токены оцениваются по длине")
+
+        self.hits = 0
+        self.misses = 0
+
+    def _encode_len(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        # кириллица в UTF-8 - 2 байта на символ, ~2 символа на токен
+        return len(text.encode()) // 4 + 1
+
+    def count(self, text: str) -> int:
+        """Число токенов в тексте сообщения вместе со служебными"""
+        cached = self._counts.get(text)
+        if cached is not None:
+            self._counts.move_to_end(text)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        tokens = self._encode_len(text) + MESSAGE_OVERHEAD_TOKENS
+        self._counts[text] = tokens
+        if len(self._counts) > self._max_entries:
+            self._counts.popitem(last=False)
+        return tokens
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cached_texts": len(self._counts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_token_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    global _token_counter
+    if _token_counter is None:
+        from data.init_configs import get_config
+        _token_counter = TokenCounter(get_config().BASE_CONFIG.PROMPT_TOKEN_ENCODING)
+    return _token_counter
+
+
+def fit_history(
+    history: List[BaseMessage],
+    *,
+    budget: Optional[int],
+    summary: Optional[str] = None,
+    counter: Optional[TokenCounter] = None,
+    window_step: int = 1,
+) -> List[AnyMessage]:
+    """
+    Последние сообщения истории, помещающиеся в бюджет токенов
+
+    Args:
+        history: Несвернутая часть истории клиента, от старых к новым
+        budget: Сколько токенов можно отдать истории, None - без ограничения
+        summary: Резюме более ранней части истории, если есть
+        counter: TokenCounter, по умолчанию общий
+        window_step: Начало окна сдвигается кратно этому числу сообщений,
+            чтобы префикс промпта не менялся на каждом ходе; при коротком
+            окне - кратно половине его длины
+
+    Returns:
+        HumanMessage/AIMessage от старых к новым; перед ними SystemMessage
+        с резюме и, если старые сообщения не поместились, - сколько опущено
+    """
+    history = [msg for msg in history or [] if msg.content and msg.source in (Source.CLIENT, Source.AGENT)]
+    messages: List[AnyMessage] = []
+    if summary:
+        messages.append(SystemMessage(content=f"Краткое содержание более раннего диалога:\n{summary}"))
+
+    if budget is not None:
+        counter = counter or get_token_counter()
+        if summary:
+            budget = max(0, budget - counter.count(messages[0].content))
+
+    kept: List[BaseMessage] = []
+    used = 0
+    for msg in reversed(history):
+        if budget is not None:
+            tokens = counter.count(msg.content)
+            if used + tokens > budget:
+                break
+            used += tokens
+        kept.append(msg)
+
+    omitted = len(history) - len(kept)
+    # шаг не больше половины помещающегося: округление начала окна вверх
+    # выбрасывает меньше половины того, что влезло в бюджет
+    step = min(window_step, len(kept) // 2)
+    if omitted and step > 1:
+        omitted = -(-omitted // step) * step
+        kept = kept[:len(history) - omitted]
+
+    if omitted:
+        messages.append(SystemMessage(
+            content=f"Более ранние сообщения диалога ({omitted}) опущены."
+        ))
+    for msg in reversed(kept):
+        if msg.source == Source.CLIENT:
+            messages.append(HumanMessage(content=msg.content))
+        else:
+            messages.append(AIMessage(content=msg.content))
+    return messages
+
+
+class TurnContext:
+    """
+    Общая часть промпта агентов на один ход: профиль клиента и история,
+    собранные один раз и переиспользуемые диалогом и research.
+
+    Префикс байт-стабилен между ходами: профиль сериализуется
+    детерминированно, а окно истории при нехватке бюджета сдвигается
+    блоками по `window_step` сообщений. Пока клиент и начало окна не
+    менялись, новый промпт начинается с предыдущего, и провайдерский
+    кэш префикса (KV-кэш Ollama) пересчитывает только хвост.
+    """
+
+    _turns: "OrderedDict[int, TurnContext]" = OrderedDict()
+    _max_turns = 1024
+
+    def __init__(self, message: BaseMessage, *, window_step: int = 1, counter: Optional[TokenCounter] = None):
+        self.message = message
+        self._window_step = window_step
+        self._counter = counter
+        self._profiles: Dict[int, Tuple[ClientModel, SystemMessage]] = {}
+        self._histories: Dict[tuple, List[AnyMessage]] = {}
+
+        self.builds = 0
+        self.reuses = 0
+
+    @classmethod
+    def of(cls, message: BaseMessage) -> "TurnContext":
+        """Контекст хода для сообщения: один объект на все агенты хода"""
+        ctx = cls._turns.get(id(message))
+        if ctx is not None and ctx.message is message:
+            return ctx
+
+        from data.init_configs import get_config
+        ctx = cls(message, window_step=get_config().BASE_CONFIG.PROMPT_WINDOW_STEP)
+        cls._turns[id(message)] = ctx
+        if len(cls._turns) > cls._max_turns:
+            cls._turns.popitem(last=False)
+        return ctx
+
+    def profile(self, client: ClientModel) -> SystemMessage:
+        cached = self._profiles.get(id(client))
+        if cached is not None and cached[0] is client:
+            return cached[1]
+
+        client_json = json.dumps(
+            client.model_dump(exclude_none=True, exclude=HISTORY_FIELDS),
+            ensure_ascii=False,
+            indent=2,
+            sort_keys=True,
+            default=str,
+        )
+        profile = SystemMessage(
+            content=f"Данные клиента:\n{client_json}, история сообщений асисстента и клиента далее."
+        )
+        self._profiles[id(client)] = (client, profile)
+        return profile
+
+    def history(self, client: ClientModel, budget: Optional[int]) -> List[AnyMessage]:
+        # research может заменить клиента копией с новым статусом, история у копии та же
+        history = client.message_history or []
+        key = (id(history), len(history), client.summarized_count, client.history_summary, budget)
+        cached = self._histories.get(key)
+        if cached is not None:
+            self.reuses += 1
+            return cached
+
+        self.builds += 1
+        messages = fit_history(
+            history[client.summarized_count:],
+            summary=client.history_summary,
+            budget=budget,
+            counter=self._counter,
+            window_step=self._window_step,
+        )
+        self._histories[key] = messages
+        return messages
+
+    def build(self, client: ClientModel, budget: Optional[int] = None) -> List[AnyMessage]:
+        """
+        Сообщения для LLM: профиль, история в пределах бюджета, текущее сообщение
+
+        Args:
+            client: Клиент хода
+            budget: Бюджет токенов без системного промпта агента, None - без ограничения
+        """
+        profile = self.profile(client)
+        history_budget = None
+        if budget is not None:
+            counter = self._counter or get_token_counter()
+            history_budget = max(0, budget - counter.count(profile.content) - counter.count(self.message.content))
+
+        return [
+            profile,
+            *self.history(client, history_budget),
+            HumanMessage(content=self.message.content),
+        ]
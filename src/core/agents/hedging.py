@@ -0,0 +1,196 @@
+import time
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from loguru import logger
+from langgraph.errors import GraphBubbleUp
+from langchain_core.language_models import BaseChatModel
+from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, ModelResponse
+
+from src.core.agents.context import get_token_counter
+from src.core.agents.breaker import backend_of, claim_backends, get_breaker
+
+# при потоковой выдаче чанки двух моделей смешались бы в одном сообщении
+_hedging_disabled: ContextVar[bool] = ContextVar("hedging_disabled", default=False)
+
+
+@contextmanager
+def no_hedging():
+    """Вызовы модели внутри блока идут без дублирования"""
+    token = _hedging_disabled.set(True)
+    try:
+        yield
+    finally:
+        _hedging_disabled.reset(token)
+
+
+def _percentile(samples: Deque[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgingMiddleware(AgentMiddleware):
+    """
+    Дублирование медленных запросов к модели на запасной бэкенд.
+
+    Если основная модель не ответила за `percentile` своей недавней
+    задержки, тот же запрос уходит первой запасной модели другого бэкенда.
+    Побеждает первый успешный ответ, проигравший отменяется; ошибка одной
+    из моделей не мешает дождаться другой. Пока у бэкенда меньше
+    `min_samples` замеров, запросы к нему не дублируются.
+
+    Оба запроса делят множество занятых бэкендов (`claim_backends`), и
+    BreakerFallbackMiddleware внутри не переводит один из них на бэкенд,
+    который уже вызывает другой: на ход - не больше одного вызова бэкенда.
+    """
+
+    def __init__(
+        self,
+        *models: BaseChatModel,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        super().__init__()
+        self.models: List[BaseChatModel] = list(models)
+        self._percentile = min(max(percentile, 0.0), 1.0)
+        self._min_samples = max(1, min_samples)
+        self._window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.cancelled = 0
+        self.wasted_tokens = 0
+
+    def _record(self, model: BaseChatModel, latency: float) -> None:
+        samples = self._latencies.setdefault(backend_of(model), deque(maxlen=self._window))
+        samples.append(latency)
+
+    def _hedge_delay(self, model: BaseChatModel) -> Optional[float]:
+        samples = self._latencies.get(backend_of(model))
+        if not samples or len(samples) < self._min_samples:
+            return None
+        return _percentile(samples, self._percentile)
+
+    def _secondary(self, model: BaseChatModel, claimed: set) -> Optional[BaseChatModel]:
+        if not get_breaker(backend_of(model)).available():
+            # основной и так будет пропущен цепочкой запасных моделей
+            return None
+        return next(
+            (
+                m for m in self.models
+                if backend_of(m) != backend_of(model)
+                and backend_of(m) not in claimed
+                and get_breaker(backend_of(m)).available()
+            ),
+            None,
+        )
+
+    @staticmethod
+    def _prompt_tokens(request: ModelRequest) -> int:
+        counter = get_token_counter()
+        tokens = sum(counter.count(str(msg.content)) for msg in request.messages)
+        if request.system_message is not None:
+            tokens += counter.count(str(request.system_message.content))
+        return tokens
+
+    @staticmethod
+    def _response_tokens(response) -> int:
+        messages = getattr(response, "result", None) or [response]
+        return sum(
+            (getattr(msg, "usage_metadata", None) or {}).get("total_tokens", 0)
+            for msg in messages
+        )
+
+    async def _timed(self, request: ModelRequest, handler: Callable[[ModelRequest], Awaitable]):
+        started = time.perf_counter()
+        try:
+            response = await handler(request)
+        except asyncio.CancelledError:
+            # отмененный проигравший - медленный хвост; без него окно занижало бы
+            # задержку дублирования. Время до отмены - нижняя оценка его задержки
+            self._record(request.model, time.perf_counter() - started)
+            raise
+        self._record(request.model, time.perf_counter() - started)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ):
+        self.calls += 1
+        primary = request.model
+        delay = None if _hedging_disabled.get() else self._hedge_delay(primary)
+        if delay is None or self._secondary(primary, set()) is None:
+            return await self._timed(request, handler)
+
+        claimed = {backend_of(primary)}
+        with claim_backends(claimed):
+            primary_task = asyncio.ensure_future(self._timed(request, handler))
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+        if done:
+            return primary_task.result()
+
+        # основной мог за это время уйти по цепочке запасных на другой бэкенд
+        secondary = self._secondary(primary, claimed)
+        if secondary is None:
+            return await primary_task
+
+        self.hedged += 1
+        logger.debug(f"Хедж: {backend_of(primary)} молчит {delay:.2f} с, дублируем на {backend_of(secondary)}")
+        claimed.add(backend_of(secondary))
+        with claim_backends(claimed):
+            hedge_task = asyncio.ensure_future(self._timed(request.override(model=secondary), handler))
+        pending = {primary_task, hedge_task}
+        winner = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # обе задачи могли завершиться в одном wait: успех важнее ошибки
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    break
+                for task in done:
+                    if isinstance(task.exception(), GraphBubbleUp) or not pending:
+                        raise task.exception()
+        finally:
+            for task in (primary_task, hedge_task):
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                    self.cancelled += 1
+                    # промпт проигравший бэкенд уже обработал
+                    self.wasted_tokens += self._prompt_tokens(request)
+                elif not task.cancelled() and task.exception() is None:
+                    # оба ответили одновременно - второй ответ выброшен
+                    self.wasted_tokens += self._response_tokens(task.result())
+
+        if winner is hedge_task:
+            self.hedge_wins += 1
+        return winner.result()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "cancelled": self.cancelled,
+            "wasted_tokens": self.wasted_tokens,
+            "hedge_delay_seconds": {
+                backend: _percentile(samples, self._percentile)
+                for backend, samples in self._latencies.items()
+                if len(samples) >= self._min_samples
+            },
+        }
@@ -0,0 +1,224 @@
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from loguru import logger
+from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, ModelResponse
+
+from src.core.agents.breaker import backend_of
+from src.exceptions.agent_exp import LimiterRejectedException
+
+
+class AdaptiveLimiter:
+    """
+    Адаптивный лимит одновременных запросов к LLM-бэкенду (AIMD).
+
+    Каждый успешный ответ с задержкой не выше `latency_tolerance` x базовой
+    добавляет к лимиту 1/limit (примерно +1 за "круг" запросов). Ошибка или
+    задержка выше допуска умножает лимит на `backoff`, но не чаще раза на
+    круг: запросы, начатые до последнего снижения, его уже не снижают.
+    Базовая задержка - медленно дрейфующий минимум наблюдаемых, как в Vegas.
+    Запрос, прождавший в очереди дольше `queue_timeout`, отклоняется.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.7,
+        queue_timeout: Optional[float] = None,
+    ):
+        self.name = name
+        self._min = max(1, min_limit)
+        self._max = max(self._min, max_limit)
+        self._limit = float(min(max(initial, self._min), self._max))
+        self._tolerance = latency_tolerance
+        self._backoff = backoff
+        self._queue_timeout = queue_timeout
+
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._baseline: Optional[float] = None
+        self._latency_ewma: Optional[float] = None
+
+        self.completed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.decreases = 0
+        self._queued = 0
+        self._queue_seconds = 0.0
+        self._queue_max = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    async def _acquire(self) -> None:
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self._queue_timeout)
+        except BaseException as exp:
+            if waiter.done() and not waiter.cancelled():
+                # слот уже выдан, но ждущий ушел - возвращаем
+                self._in_flight -= 1
+                self._wake()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(exp, asyncio.TimeoutError):
+                self.rejected += 1
+                raise LimiterRejectedException(self.name, self._queue_timeout) from None
+            raise
+
+    def _release(self, started: float, latency: float, ok: Optional[bool]) -> None:
+        self._in_flight -= 1
+        if ok is not None:
+            self._on_sample(started, latency, ok)
+        self._wake()
+
+    def _on_sample(self, started: float, latency: float, ok: bool) -> None:
+        self.completed += 1
+        if ok:
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                # минимум медленно дрейфует вверх, если бэкенд стал медленнее насовсем
+                self._baseline += (latency - self._baseline) * 0.01
+            self._latency_ewma = latency if self._latency_ewma is None else (
+                0.9 * self._latency_ewma + 0.1 * latency
+            )
+        else:
+            self.errors += 1
+
+        overloaded = not ok or latency > self._tolerance * self._baseline
+        if not overloaded:
+            self._limit = min(self._max, self._limit + 1 / self._limit)
+            return
+
+        if started < self._last_decrease:
+            return
+        previous = self.limit
+        self._limit = max(self._min, self._limit * self._backoff)
+        self._last_decrease = time.perf_counter()
+        self.decreases += 1
+        if self.limit != previous:
+            logger.info(
+                f"Лимит {self.name}: {previous} -> {self.limit} "
+                f"({'ошибка' if not ok else f'задержка {latency:.1f} с'})"
+            )
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Слот на один запрос к бэкенду, задержка и исход идут в расчет лимита"""
+        queued = time.perf_counter()
+        await self._acquire()
+        started = time.perf_counter()
+        waited = started - queued
+        self._queued += 1
+        self._queue_seconds += waited
+        self._queue_max = max(self._queue_max, waited)
+
+        ok: Optional[bool] = False
+        try:
+            yield
+            ok = True
+        except asyncio.CancelledError:
+            # отмена (например, спекулятивного диалога) ничего не говорит о бэкенде
+            ok = None
+            raise
+        finally:
+            self._release(started, time.perf_counter() - started, ok)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "queue_avg_ms": self._queue_seconds / self._queued * 1000 if self._queued else 0.0,
+            "queue_max_ms": self._queue_max * 1000,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "errors": self.errors,
+            "decreases": self.decreases,
+            "latency_baseline_seconds": self._baseline,
+            "latency_ewma_seconds": self._latency_ewma,
+        }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+# свой лимитер фоновой задачи вместо общих лимитеров бэкендов
+_limiter_override: ContextVar[Optional[AdaptiveLimiter]] = ContextVar("limiter_override", default=None)
+
+
+def get_limiter(backend: str) -> AdaptiveLimiter:
+    """Общий лимитер бэкенда: агенты на одной модели делят одну квоту"""
+    limiter = _limiters.get(backend)
+    if limiter is None:
+        from data.init_configs import get_config
+        base_config = get_config().BASE_CONFIG
+        limiter = AdaptiveLimiter(
+            backend,
+            initial=base_config.MAX_CONCURRENT_EXECUTE,
+            min_limit=base_config.LIMITER_MIN_CONCURRENCY,
+            max_limit=base_config.LIMITER_MAX_CONCURRENCY,
+            latency_tolerance=base_config.LIMITER_LATENCY_TOLERANCE,
+            backoff=base_config.LIMITER_BACKOFF,
+            queue_timeout=base_config.LIMITER_QUEUE_TIMEOUT_SECONDS or None,
+        )
+        _limiters[backend] = limiter
+    return limiter
+
+
+def limiter_stats() -> dict:
+    """Метрики лимитеров всех бэкендов"""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
+
+
+@contextmanager
+def use_limiter(limiter: Optional[AdaptiveLimiter]):
+    """Вызовы модели внутри блока идут через `limiter`; None - через лимитеры бэкендов"""
+    token = _limiter_override.set(limiter)
+    try:
+        yield
+    finally:
+        _limiter_override.reset(token)
+
+
+class LimiterMiddleware(AgentMiddleware):
+    """
+    Слот лимитера на каждый вызов модели.
+
+    Стоит внутри цепочки запасных моделей: вызов идет через лимитер того
+    бэкенда, который действительно отвечает, и каждый вызов - отдельный
+    замер AIMD. Ошибка, после которой fallback ушел на другой бэкенд,
+    снижает лимит именно упавшего бэкенда.
+    """
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ):
+        limiter = _limiter_override.get() or get_limiter(backend_of(request.model))
+        async with limiter.acquire():
+            return await handler(request)
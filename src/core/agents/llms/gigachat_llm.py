@@ -3,6 +3,7 @@ from langchain_community.llms.gigachat import GigaChat
 from langchain_core.language_models import BaseChatModel
 
 from src.core.agents.models.base import BaseLLM
+from src.core.agents.transport import LLMTransport, pool_gigachat_client
 
 class GetGigaChat(BaseLLM):
     _llm: GigaChat = None
@@ -28,6 +29,7 @@ class GetGigaChat(BaseLLM):
                 top_p=self._base_llm_config.TOP_P,
                 verbose=self._base_llm_config.VERBOSE,
             )
+            pool_gigachat_client(self._llm, LLMTransport.from_config(), self.__class__.__name__)
             self._initialized = True
             logger.success(f'✓ GetGigaChat инициализирован - {self!r}')
         
@@ -0,0 +1,323 @@
+import re
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from loguru import logger
+from pydantic import PrivateAttr
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.enum.llm import LatencyDistribution
+from src.exceptions.agent_exp import MockLLMException
+from src.core.agents.models.base import BaseLLM
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def _tool_spec(tool: Any) -> dict:
+    """Имя и JSON-схема аргументов инструмента; инструменты structured output без функции"""
+    function = convert_to_openai_tool(tool)["function"]
+    return {
+        "name": function["name"],
+        "parameters": function.get("parameters", {}),
+        "structured": (
+            isinstance(tool, BaseTool)
+            and getattr(tool, "func", None) is None
+            and getattr(tool, "coroutine", None) is None
+        ),
+    }
+
+
+def _example_value(schema: dict) -> Any:
+    """Допустимое значение по JSON-схеме поля"""
+    if "default" in schema:
+        return schema["default"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for option in schema.get("anyOf", []):
+        if option.get("type") != "null":
+            return _example_value(option)
+    kind = schema.get("type")
+    if kind == "string":
+        return "mock".ljust(schema.get("minLength", 0), "_")
+    if kind == "integer":
+        return int(schema.get("minimum", 0))
+    if kind == "number":
+        return float(schema.get("minimum", 0))
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        return []
+    if kind == "object":
+        return _example_args(schema, {})
+    return None
+
+
+def _example_args(schema: dict, preset: Dict[str, Any]) -> dict:
+    return {
+        name: preset[name] if name in preset else _example_value(field)
+        for name, field in schema.get("properties", {}).items()
+    }
+
+
+class MockChatModel(BaseChatModel):
+    """
+    Чат-модель без сети для нагрузочных тестов.
+
+    Отвечает по шаблонам, вызывает привязанные инструменты и заполняет
+    structured output по схеме. Задержка до первого токена берется из
+    распределения, дальше ответ генерируется со скоростью
+    `tokens_per_second`; часть вызовов падает или зависает.
+    """
+
+    model: str = "mock"
+    answers: List[str] = ["{message}"]
+    structured_answer: Dict[str, Any] = {}
+    latency_distribution: LatencyDistribution = LatencyDistribution.FIXED
+    latency_ms: float = 300.0
+    latency_jitter_ms: float = 0.0
+    tokens_per_second: float = 0.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 30.0
+    tool_call_rate: float = 0.0
+    tools_allowed: List[str] = []
+    seed: Optional[int] = None
+
+    _rng: random.Random = PrivateAttr()
+    _counters: Dict[str, float] = PrivateAttr()
+
+    def model_post_init(self, context: Any) -> None:
+        super().model_post_init(context)
+        self._rng = random.Random(self.seed)
+        self._counters = dict.fromkeys(("calls", "tool_calls", "errors", "timeouts", "seconds"), 0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[str] = None, **kwargs):
+        return self.bind(tools=[_tool_spec(tool) for tool in tools], tool_choice=tool_choice, **kwargs)
+
+    def first_token_seconds(self) -> float:
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+        distribution = self.latency_distribution
+        if distribution == LatencyDistribution.EXPONENTIAL and mean > 0:
+            value = self._rng.expovariate(1 / mean)
+        elif distribution == LatencyDistribution.FIXED or jitter <= 0 or mean <= 0:
+            value = mean
+        elif distribution == LatencyDistribution.UNIFORM:
+            value = self._rng.uniform(mean - jitter, mean + jitter)
+        elif distribution == LatencyDistribution.NORMAL:
+            value = self._rng.gauss(mean, jitter)
+        else:
+            # среднее latency_ms и отклонение latency_jitter_ms, длинный хвост
+            sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2))
+            value = self._rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        return max(0.0, value) / 1000
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[dict]], tool_choice: Any) -> AIMessage:
+        tools = tools or []
+        actions = [
+            tool for tool in tools
+            if not tool["structured"] and (not self.tools_allowed or tool["name"] in self.tools_allowed)
+        ]
+        structured = [tool for tool in tools if tool["structured"]]
+        # один раунд инструментов на ход: после их результата модель отвечает
+        after_tools = bool(messages) and isinstance(messages[-1], ToolMessage)
+
+        if actions and not after_tools and (
+            self._rng.random() < self.tool_call_rate or (tool_choice in ("any", "required") and not structured)
+        ):
+            tool = self._rng.choice(actions)
+            return self._tool_call(tool, _example_args(tool["parameters"], {}))
+        if structured:
+            tool = structured[0]
+            return self._tool_call(tool, _example_args(tool["parameters"], self.structured_answer))
+
+        message = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        text = message.text if message is not None else ""
+        return AIMessage(content=self._rng.choice(self.answers).replace("{message}", text))
+
+    @staticmethod
+    def _tool_call(tool: dict, args: dict) -> AIMessage:
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": tool["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}],
+        )
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], tokens: List[str]) -> dict:
+        # оценка без токенизатора: ~4 символа на токен
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4 + 1
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(tokens),
+            "total_tokens": input_tokens + len(tokens),
+        }
+
+    def _plan(self, messages: List[BaseMessage], kwargs: dict) -> tuple[AIMessage, List[str], float, Optional[str]]:
+        """Ответ, его токены, задержка до первого токена и имитируемый сбой"""
+        message = self._respond(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        if message.tool_calls:
+            tokens = _TOKEN_RE.findall(json.dumps(message.tool_calls[0]["args"], ensure_ascii=False))
+        else:
+            tokens = _TOKEN_RE.findall(message.content)
+        message.usage_metadata = self._usage(messages, tokens)
+
+        roll = self._rng.random()
+        failure = None
+        if roll < self.timeout_rate:
+            failure = "timeout"
+        elif roll < self.timeout_rate + self.error_rate:
+            failure = "error"
+        delay = self.first_token_seconds()
+
+        self._counters["calls"] += 1
+        self._counters["tool_calls"] += bool(message.tool_calls)
+        if failure:
+            self._counters[f"{failure}s"] += 1
+        self._counters["seconds"] += (
+            self.timeout_seconds if failure == "timeout"
+            else delay if failure
+            else delay + len(tokens) * self._token_seconds()
+        )
+        return message, tokens, delay, failure
+
+    def stats(self) -> dict:
+        """Вызовы, сбои и среднее время, проведенное в модели"""
+        calls = self._counters["calls"]
+        return {
+            **{key: int(value) for key, value in self._counters.items() if key != "seconds"},
+            "mean_seconds": self._counters["seconds"] / calls if calls else 0.0,
+        }
+
+    def _fail(self, failure: str) -> Exception:
+        if failure == "timeout":
+            return TimeoutError(f"[{self.model}] Имитация таймаута через {self.timeout_seconds:g} с")
+        return MockLLMException(self.model)
+
+    def _token_seconds(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, tokens, delay, failure = self._plan(messages, kwargs)
+        time.sleep(self.timeout_seconds if failure == "timeout" else delay)
+        if failure:
+            raise self._fail(failure)
+        time.sleep(len(tokens) * self._token_seconds())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, tokens, delay, failure = self._plan(messages, kwargs)
+        await asyncio.sleep(self.timeout_seconds if failure == "timeout" else delay)
+        if failure:
+            raise self._fail(failure)
+        await asyncio.sleep(len(tokens) * self._token_seconds())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, message: AIMessage, tokens: List[str]) -> Iterator[AIMessageChunk]:
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[{
+                    "name": call["name"],
+                    "args": json.dumps(call["args"], ensure_ascii=False),
+                    "id": call["id"],
+                    "index": 0,
+                }],
+                usage_metadata=message.usage_metadata,
+            )
+            return
+        for i, token in enumerate(tokens):
+            yield AIMessageChunk(
+                content=token,
+                usage_metadata=message.usage_metadata if i == len(tokens) - 1 else None,
+            )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message, tokens, delay, failure = self._plan(messages, kwargs)
+        time.sleep(self.timeout_seconds if failure == "timeout" else delay)
+        if failure:
+            raise self._fail(failure)
+        for i, chunk in enumerate(self._chunks(message, tokens)):
+            if i:
+                time.sleep(self._token_seconds())
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        message, tokens, delay, failure = self._plan(messages, kwargs)
+        await asyncio.sleep(self.timeout_seconds if failure == "timeout" else delay)
+        if failure:
+            raise self._fail(failure)
+        for i, chunk in enumerate(self._chunks(message, tokens)):
+            if i:
+                await asyncio.sleep(self._token_seconds())
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+
+class GetMockLLM(BaseLLM):
+    offline = True
+
+    _llm: MockChatModel = None
+    _initialized: bool = False
+    _mock_config = None
+
+    def get_llm(self) -> MockChatModel:
+        if not self._initialized:
+            from data.init_configs import get_config
+
+            config = get_config()
+            self._mock_config = config.MOCK_LLM_CONFIG
+
+            self._llm = MockChatModel(
+                model=self.__class__.__name__,
+                answers=self._mock_config.MOCK_LLM_ANSWERS,
+                structured_answer=self._mock_config.MOCK_LLM_STRUCTURED_ANSWER,
+                latency_distribution=self._mock_config.MOCK_LLM_LATENCY_DISTRIBUTION,
+                latency_ms=self._mock_config.MOCK_LLM_LATENCY_MS,
+                latency_jitter_ms=self._mock_config.MOCK_LLM_LATENCY_JITTER_MS,
+                tokens_per_second=self._mock_config.MOCK_LLM_TOKENS_PER_SECOND,
+                error_rate=self._mock_config.MOCK_LLM_ERROR_RATE,
+                timeout_rate=self._mock_config.MOCK_LLM_TIMEOUT_RATE,
+                # зависший бэкенд отвечает не раньше таймаута клиента
+                timeout_seconds=config.BASE_LLM_CONFIG.TIMEOUT,
+                tool_call_rate=self._mock_config.MOCK_LLM_TOOL_CALL_RATE,
+                tools_allowed=self._mock_config.MOCK_LLM_TOOLS,
+                seed=self._mock_config.MOCK_LLM_SEED,
+            )
+
+            self._initialized = True
+            logger.success(f"✓ GetMockLLM инициализирован: {self}")
+
+        return self._llm
+
+    def __repr__(self) -> str:
+        if not self._initialized:
+            return f"{self.__class__.__name__}(not initialized)"
+
+        return (
+            f"{self.__class__.__name__}("
+            f"latency={self._mock_config.MOCK_LLM_LATENCY_DISTRIBUTION}:"
+            f"{self._mock_config.MOCK_LLM_LATENCY_MS:g}±{self._mock_config.MOCK_LLM_LATENCY_JITTER_MS:g}ms, "
+            f"tokens_per_second={self._mock_config.MOCK_LLM_TOKENS_PER_SECOND:g}, "
+            f"error_rate={self._mock_config.MOCK_LLM_ERROR_RATE:g}, "
+            f"timeout_rate={self._mock_config.MOCK_LLM_TIMEOUT_RATE:g})"
+        )
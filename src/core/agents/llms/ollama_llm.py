@@ -3,6 +3,7 @@ from langchain_ollama import ChatOllama
 
 from data.init_configs import get_config
 from src.core.agents.models.base import BaseLLM
+from src.core.agents.transport import LLMTransport
 
 
 class GetOllamaLLM(BaseLLM):
@@ -20,6 +21,9 @@ class GetOllamaLLM(BaseLLM):
             
             self._llm = ChatOllama(
                 model=self._ollama_config.OLLAMA_MODEL,
+                keep_alive=self._ollama_config.OLLAMA_KEEP_ALIVE,
+                # агенты ходят в Ollama асинхронно - общий пул только у async-клиента
+                async_client_kwargs=LLMTransport.from_config().client_kwargs(self.__class__.__name__),
                 max_tokens=self._base_llm_config.MAX_TOKENS,
                 temperature=self._base_llm_config.TEMPERATURE,
                 timeout=self._base_llm_config.TIMEOUT,
@@ -1,17 +1,26 @@
 import asyncio
-from typing import Any, Optional, Dict, TYPE_CHECKING
+from typing import Any, Awaitable, Callable, Optional, Dict, TYPE_CHECKING
 from abc import ABC, abstractmethod
 
 from langchain_core.runnables import Runnable
-from langchain.messages import SystemMessage, AnyMessage
+from langchain.messages import SystemMessage, AnyMessage, ToolMessage, AIMessageChunk
 from langchain_core.language_models import BaseChatModel
 from pydantic import BaseModel 
 
 from src.models.client_model import ClientModel
 from src.models.messages import BaseMessage
-from src.exceptions.agent_exp import AgentExecutionException
+from src.exceptions.agent_exp import (
+    AgentExecutionException,
+    BackendUnavailableException,
+    LimiterRejectedException,
+)
 
 from src.factories.agent_factory import AgentFactory
+from src.core.agents.cache import ResponseCache, messages_cache_key
+from src.core.agents.context import get_token_counter
+from src.core.agents.limiter import AdaptiveLimiter, get_limiter, use_limiter
+from src.core.agents.breaker import backend_of
+from src.core.agents.hedging import no_hedging
 
 from utils.decorators import retry_async
 from utils.retry_handlers import log_retry_simple
@@ -19,6 +28,8 @@ from utils.retry_handlers import log_retry_simple
 class BaseLLM(ABC):
     _instance = None
     _response_format: Any = None 
+    # бэкенд без сети (mock): используется только при MOCK_LLM_ENABLED, и тогда только он
+    offline: bool = False
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -62,14 +73,26 @@ class BaseAgentSingleton(ABC):
         from data.init_configs import get_config
         base_config = get_config().BASE_CONFIG
 
-        self._execution_semaphore = asyncio.Semaphore(
-            base_config.MAX_CONCURRENT_EXECUTE
+        self._cache = ResponseCache(
+            name=self.__class__.__name__,
+            ttl_seconds=base_config.AGENT_CACHE_TTL.get(self.__class__.__name__, 0),
+            max_entries=base_config.AGENT_CACHE_MAX_ENTRIES,
+            redis=get_config().redis_client if base_config.AGENT_CACHE_USE_REDIS else None,
         )
         self._llm = llm
         self.system_prompt = system_prompt
         self.agent: Optional[Runnable] = None
         self._agent_initialized: bool = False
 
+    @property
+    def _limiter(self) -> AdaptiveLimiter:
+        """
+        Лимитер бэкенда агента: общий для всех агентов на этом бэкенде,
+        слот в нем занимает LimiterMiddleware на каждый вызов модели
+        """
+        from data.init_configs import get_config
+        return get_limiter(backend_of(get_config().MIDDLEWARE_SERVICE.chat_model(self._llm)))
+
     async def _ensure_agent_async(self) -> None:
         if self._agent_initialized:
             return
@@ -90,6 +113,14 @@ class BaseAgentSingleton(ABC):
         """кастомное исключение инициализации агента"""
         ...
 
+    def _prompt_budget(self) -> Optional[int]:
+        """Бюджет токенов на сообщения промпта за вычетом системного промпта агента"""
+        from data.init_configs import get_config
+        budget = get_config().BASE_CONFIG.PROMPT_TOKEN_BUDGET.get(self.__class__.__name__)
+        if not budget:
+            return None
+        return max(0, budget - get_token_counter().count(self.system_prompt.content))
+
     @abstractmethod
     async def _build_messages(self, client_model: ClientModel, user_message: BaseMessage) -> list[AnyMessage]:
         """список сообщений для LLM"""
@@ -103,44 +134,193 @@ class BaseAgentSingleton(ABC):
         client_model: ClientModel,
     ) -> BaseMessage | dict | BaseModel: ...
 
+    async def _cache_key(self, client_model: ClientModel, user_message: BaseMessage) -> str:
+        """Ключ кэша по сообщениям для LLM, без идентификаторов клиента"""
+        # tg_id и ник не влияют на ответ - одинаковые ходы разных клиентов дают один ключ
+        anonymous = client_model.model_copy(update={"tg_id": None, "tg_nick": None})
+        messages = await self._build_messages(anonymous, user_message)
+        return messages_cache_key(
+            [self.system_prompt, *messages],
+            model=repr(self._llm),
+            response_format=getattr(self._llm, "_response_format", None),
+        )
+
+    def _rebind_cached_result(self, result: BaseModel, client_model: ClientModel) -> BaseModel:
+        """Привязать закэшированный результат к текущему клиенту"""
+        if isinstance(result, BaseMessage):
+            return result.model_copy(update={"tg_id": client_model.tg_id})
+        return result
+
+    async def _cached_result(
+        self,
+        client_model: ClientModel,
+        user_message: BaseMessage,
+        cache_key: Optional[str],
+    ) -> Optional[BaseModel]:
+        """Ответ из кэша до вызова LLM; наследники могут добавить свои уровни"""
+        if cache_key is None:
+            return None
+        cached = await self._cache.get(cache_key)
+        if cached is None:
+            return None
+        return self._rebind_cached_result(cached, client_model)
+
+    async def _remember_result(
+        self,
+        client_model: ClientModel,
+        user_message: BaseMessage,
+        cache_key: Optional[str],
+        result: BaseModel,
+    ) -> None:
+        """Сохранить ответ LLM, вызванный без инструментов"""
+        if cache_key is not None:
+            await self._cache.set(cache_key, result)
+
     async def execute(
         self, 
         client_model: ClientModel, 
-        user_message: BaseMessage
+        user_message: BaseMessage,
+        *,
+        use_cache: bool = True,
+        limiter: Optional[AdaptiveLimiter] = None,
     ) -> BaseMessage | Dict | BaseModel:
-        
+        """
+        Args:
+            limiter: Свой лимитер вместо общего лимитера бэкенда,
+                например для фоновых пакетных задач
+        """
         from data.init_configs import get_config
         base_config = get_config().BASE_CONFIG
         runnable_config = get_config().RUNNABLE_CONFIG
 
+        cache_key = None
+        if use_cache:
+            if self._cache.enabled:
+                cache_key = await self._cache_key(client_model, user_message)
+            cached = await self._cached_result(client_model, user_message, cache_key)
+            if cached is not None:
+                return cached
+
+        # ответы, при которых агент вызывал инструменты, не кэшируем - их эффекты не повторятся
+        used_tools = False
+
         @retry_async(
             on_retry=log_retry_simple,
             attempts=base_config.ATTEMPS_FOR_RETRY,
             backoff=base_config.BACKOFF,
             delay=base_config.DELAY,
+            # все автоматы разомкнуты - повтор через секунды ничего не даст
+            no_retry_on=(BackendUnavailableException,),
+            layer="execute",
         )
         async def _execute_with_retry():
+            nonlocal used_tools
             await self._ensure_agent_async()
 
-            async with self._execution_semaphore:
-                try:
-                    messages = await self._build_messages(client_model, user_message)
+            try:
+                messages = await self._build_messages(client_model, user_message)
+                with use_limiter(limiter):
                     result_raw: dict = await self.agent.ainvoke(
                         {"messages": messages},
                         config=runnable_config,
                     )
+                used_tools = any(
+                    isinstance(msg, ToolMessage) for msg in result_raw.get("messages", [])
+                )
 
-                    return await self._get_model_response_result(
-                        result_raw,
-                        client_model=client_model,
-                    )
+                return await self._get_model_response_result(
+                    result_raw,
+                    client_model=client_model,
+                )
+
+            except (AgentExecutionException, BackendUnavailableException, LimiterRejectedException):
+                raise
+            except Exception as exp:
+                raise self._get_execute_exception(exp)
+
+        result = await _execute_with_retry()
+        if use_cache and not used_tools:
+            await self._remember_result(client_model, user_message, cache_key, result)
+        return result
+
+    async def execute_stream(
+        self,
+        client_model: ClientModel,
+        user_message: BaseMessage,
+        on_text: Callable[[str], Awaitable[None]],
+        *,
+        use_cache: bool = True,
+    ) -> BaseMessage | Dict | BaseModel:
+        """
+        execute с потоковой выдачей текста модели
+
+        `on_text` вызывается после каждого текстового чанка с полным текстом
+        текущего хода модели; после вызова инструмента текст начинается заново.
+        Без повторов: часть ответа уже могла быть показана клиенту.
+        Ответ из кэша возвращается целиком, без вызовов `on_text`.
+
+        Returns:
+            То же, что execute
+        """
+        from data.init_configs import get_config
+        runnable_config = get_config().RUNNABLE_CONFIG
+
+        cache_key = None
+        if use_cache:
+            if self._cache.enabled:
+                cache_key = await self._cache_key(client_model, user_message)
+            cached = await self._cached_result(client_model, user_message, cache_key)
+            if cached is not None:
+                return cached
+
+        await self._ensure_agent_async()
+        try:
+            messages = await self._build_messages(client_model, user_message)
+            result_raw: dict = {}
+            text, turn_id = "", None
+            # частичный текст уже уходит клиенту - без дублирования на второй бэкенд
+            with no_hedging():
+                async for mode, payload in self.agent.astream(
+                    {"messages": messages},
+                    config=runnable_config,
+                    stream_mode=["messages", "values"],
+                ):
+                    if mode == "values":
+                        result_raw = payload
+                        continue
+                    chunk, _ = payload
+                    if not isinstance(chunk, AIMessageChunk) or not isinstance(chunk.content, str):
+                        continue
+                    if not chunk.content:
+                        continue
+                    if chunk.id != turn_id:
+                        turn_id, text = chunk.id, ""
+                    text += chunk.content
+                    await on_text(text)
+
+            used_tools = any(
+                isinstance(msg, ToolMessage) for msg in result_raw.get("messages", [])
+            )
+            result = await self._get_model_response_result(
+                result_raw,
+                client_model=client_model,
+            )
+        except (AgentExecutionException, BackendUnavailableException, LimiterRejectedException):
+            raise
+        except Exception as exp:
+            raise self._get_execute_exception(exp)
+
+        if use_cache and not used_tools:
+            await self._remember_result(client_model, user_message, cache_key, result)
+        return result
 
-                except AgentExecutionException:
-                    raise
-                except Exception as exp:
-                    raise self._get_execute_exception(exp)
+    def limiter_stats(self) -> dict:
+        """Текущий лимит, очередь и отказы лимитера бэкенда, на который уходят вызовы агента"""
+        return self._limiter.stats()
 
-        return await _execute_with_retry()
+    def cache_stats(self) -> dict:
+        """Попадания и промахи кэша ответов агента"""
+        return self._cache.stats()
 
     @abstractmethod
     def _get_execute_exception(self, exp: Exception) -> Exception:
@@ -156,5 +336,5 @@ class BaseAgentSingleton(ABC):
             f"agent={agent_status}, "
             f"tools={tools_count}, "
             f"llm={self._llm.__class__.__name__}, "
-            f"max_concurrent={self._execution_semaphore._value})"
+            f"concurrency_limit={self._limiter.limit})"
         )
\ No newline at end of file
@@ -1,8 +1,9 @@
-import json
-from langchain.messages import SystemMessage, HumanMessage, AIMessage
+from typing import Optional
+from langchain.messages import SystemMessage, HumanMessage
 
 from src.models.client_model import ClientModel
 from src.models.messages import BaseMessage, Source
+from src.core.agents.context import TurnContext
 
 class DialogSystemPromptTemplate:
     @staticmethod
@@ -22,63 +23,69 @@ class DialogPromptTemplates:
         cls,
         client: ClientModel,
         message: BaseMessage,
+        budget: Optional[int] = None,
     ) -> list:
+        return TurnContext.of(message).build(client, budget)
 
-        messages: list = []
 
-        client_json = json.dumps(
-            client.model_dump(exclude_none=True, exclude={"message_history"}),
-            ensure_ascii=False,
-            indent=2,
-        )
-        messages.append(
-            SystemMessage(content=f"Данные клиента:\n{client_json}, история сообщений асисстента и клиента далее.")
-        )
-
-        for msg in client.message_history or []:
-            if not msg.content:
-                continue
-
-            if msg.source == Source.CLIENT:
-                messages.append(HumanMessage(content=msg.content))
-            elif msg.source == Source.AGENT:
-                messages.append(AIMessage(content=msg.content))
-
-        messages.append(
-            HumanMessage(content=message.content)
+class ResearchSystemPromptTemplate:
+    @staticmethod
+    def get_system_prompt() -> SystemMessage:
+        return SystemMessage(
+            content=(
+                "Ты — аналитик входящих лидов.\n"
+                "По данным клиента и истории диалога определи статус лида: "
+                "new, qualified или not_interested.\n"
+                "Кратко уточни информацию о проекте клиента, если она появилась.\n"
+                "Реши, нужно ли отвечать клиенту на последнее сообщение."
+            )
         )
 
-        return messages
-
-
 class ResearchPromptTemplates: 
     @classmethod
     async def build_message(
         cls,
         client: ClientModel,
         message: BaseMessage,
+        budget: Optional[int] = None,
     ):
-        messages: list = []
+        return TurnContext.of(message).build(client, budget)
 
-        client_json = json.dumps(
-            client.model_dump(exclude_none=True, exclude={"message_history"}),
-            ensure_ascii=False,
-            indent=2,
-        )
-        messages.append(
-            SystemMessage(content=f"Данные клиента:\n{client_json}, история сообщений асисстента и клиента далее.")
+
+class SummarySystemPromptTemplate:
+    @staticmethod
+    def get_system_prompt() -> SystemMessage:
+        return SystemMessage(
+            content=(
+                "Ты ведешь краткое резюме переписки менеджера с клиентом.\n"
+                "Дополни текущее резюме новыми сообщениями.\n"
+                "Сохрани факты о клиенте, его проекте, бюджете, сроках, договоренностях и открытых вопросах.\n"
+                "Пиши по-русски, сжато, не больше 15 предложений. Верни только текст резюме."
+            )
         )
 
-        for msg in client.message_history or []:
-            if not msg.content:
-                continue
 
-            if msg.source == Source.CLIENT:
-                messages.append(HumanMessage(content=msg.content))
-            elif msg.source == Source.AGENT:
-                messages.append(AIMessage(content=msg.content))
+class SummaryPromptTemplates:
+    @classmethod
+    async def build_messages(
+        cls,
+        client: ClientModel,
+        message: BaseMessage,
+    ) -> list:
+        """
+        Args:
+            client: Клиент с текущим резюме в history_summary
+            message: Сворачиваемые сообщения одним текстом (format_transcript)
+        """
+        return [
+            SystemMessage(content=f"Текущее резюме:\n{client.history_summary or 'пока нет'}"),
+            HumanMessage(content=f"Новые сообщения:\n{message.content}"),
+        ]
 
-        messages.append(
-            HumanMessage(content=message.content)
+    @staticmethod
+    def format_transcript(messages: list[BaseMessage]) -> str:
+        return "\n".join(
+            f"{'Клиент' if msg.source == Source.CLIENT else 'Менеджер'}: {msg.content}"
+            for msg in messages
+            if msg.content
         )
-        return messages 
\ No newline at end of file
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from langgraph.errors import GraphBubbleUp
+from langgraph.types import Command
+from langchain.messages import ToolMessage
+from langchain.agents.middleware.tool_retry import ToolRetryMiddleware
+from langchain.agents.middleware._retry import calculate_delay, should_retry_exception
+
+from utils.deadline import allow_retry
+
+
+class BudgetedToolRetryMiddleware(ToolRetryMiddleware):
+    """
+    ToolRetryMiddleware, чьи повторы идут из общего бюджета ретраев
+    и прекращаются, когда пауза перед повтором выходит за дедлайн сообщения.
+    Отказ в повторе обрабатывается как исчерпанные попытки (`on_failure`).
+    """
+
+    async def awrap_tool_call(
+        self,
+        request: Any,
+        handler: Callable[[Any], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        tool_name = request.tool.name if request.tool else request.tool_call["name"]
+        if not self._should_retry_tool(tool_name):
+            return await handler(request)
+
+        attempt = 0
+        while True:
+            try:
+                return await handler(request)
+            except GraphBubbleUp:
+                raise
+            except Exception as exc:
+                if not should_retry_exception(exc, self.retry_on):
+                    raise
+
+                delay = calculate_delay(
+                    attempt,
+                    backoff_factor=self.backoff_factor,
+                    initial_delay=self.initial_delay,
+                    max_delay=self.max_delay,
+                    jitter=self.jitter,
+                )
+                attempt += 1
+                if attempt > self.max_retries or not allow_retry("tool", delay):
+                    return self._handle_failure(tool_name, request.tool_call["id"], exc, attempt)
+                if delay > 0:
+                    await asyncio.sleep(delay)
@@ -0,0 +1,215 @@
+import json
+import os
+import asyncio
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+class SentenceEmbedder:
+    """
+    Эмбеддер предложений на transformers, работает на CPU и только
+    с локальными файлами модели - сеть не нужна.
+    """
+
+    def __init__(self, model_path: str, *, max_length: int = 128):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self._torch = torch
+        self._tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        self._model = AutoModel.from_pretrained(model_path, local_files_only=True).eval()
+        self._max_length = max_length
+        self.dim: int = self._model.config.hidden_size
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Нормированные эмбеддинги (mean pooling по токенам)
+
+        Args:
+            texts: Тексты
+
+        Returns:
+            float32 массив (len(texts), dim) с единичной нормой строк
+        """
+        torch = self._torch
+        with torch.inference_mode():
+            batch = self._tokenizer(
+                [" ".join(text.lower().split()) for text in texts],
+                padding=True,
+                truncation=True,
+                max_length=self._max_length,
+                return_tensors="pt",
+            )
+            hidden = self._model(**batch).last_hidden_state
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, dim=1)
+        return pooled.numpy().astype(np.float32, copy=False)
+
+
+class VectorIndex:
+    """
+    Косинусный top-k по нормированным векторам.
+
+    Векторы лежат в кольцевом буфере на `max_entries` строк: при переполнении
+    перезаписывается самая старая запись. С `path` буфер - memory-mapped
+    .npy файл, а ответы сохраняются рядом в .json, так что индекс
+    переживает рестарт.
+
+    Поиск и добавление идут из потоков, поэтому защищены блокировкой:
+    иначе перезапись строки в кольце могла бы подменить ответ у найденного вектора.
+    """
+
+    def __init__(self, dim: int, *, max_entries: int = 100_000, path: Optional[str] = None):
+        self._dim = dim
+        self._max_entries = max_entries
+        self._path = path
+        self._payloads: List[Optional[str]] = [None] * max_entries
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+        if path is None:
+            self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+            return
+
+        vectors_path = f"{path}.npy"
+        exists = os.path.exists(vectors_path)
+        self._vectors = np.lib.format.open_memmap(
+            vectors_path,
+            mode="r+" if exists else "w+",
+            dtype=np.float32,
+            shape=None if exists else (max_entries, dim),
+        )
+        if self._vectors.shape != (max_entries, dim):
+            raise ValueError(
+                f"Индекс {vectors_path} имеет размер {self._vectors.shape}, "
+                f"ожидался {(max_entries, dim)}"
+            )
+        if exists and os.path.exists(f"{path}.json"):
+            with open(f"{path}.json", encoding="utf-8") as file:
+                meta = json.load(file)
+            self._size, self._next = meta["size"], meta["next"]
+            self._payloads[:self._size] = meta["payloads"]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, vector: np.ndarray, payload: str) -> None:
+        with self._lock:
+            self._vectors[self._next] = vector
+            self._payloads[self._next] = payload
+            self._next = (self._next + 1) % self._max_entries
+            self._size = min(self._size + 1, self._max_entries)
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[float, str]]:
+        """
+        Ближайшие записи по косинусу
+
+        Args:
+            vector: Нормированный запрос (dim,)
+            k: Сколько записей вернуть
+
+        Returns:
+            Список (score, payload) по убыванию score
+        """
+        with self._lock:
+            if not self._size:
+                return []
+            # float64-запрос заставил бы numpy копировать весь индекс в float64
+            scores = self._vectors[:self._size] @ np.asarray(vector, dtype=np.float32)
+            k = min(k, self._size)
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            return [(float(scores[i]), self._payloads[i]) for i in top]
+
+    def flush(self) -> None:
+        """Сбросить memory-mapped буфер и ответы на диск"""
+        if self._path is None:
+            return
+        with self._lock:
+            self._vectors.flush()
+            payloads = self._payloads[:self._size]
+            meta = {"size": self._size, "next": self._next}
+        with open(f"{self._path}.json", "w", encoding="utf-8") as file:
+            json.dump(
+                {**meta, "payloads": payloads},
+                file,
+                ensure_ascii=False,
+            )
+
+
+class SemanticCache:
+    """
+    Семантический кэш ответов на типовые вопросы (цены, сроки, процесс).
+
+    Вопрос кодируется эмбеддером, ответ берется у ближайшего сохраненного
+    вопроса, если косинус не ниже `threshold`. Применяется только к
+    клиентам с короткой историей: дальше ответ зависит от контекста диалога.
+    """
+
+    def __init__(
+        self,
+        *,
+        embedder: SentenceEmbedder,
+        index: VectorIndex,
+        threshold: float = 0.92,
+        max_history: int = 2,
+    ):
+        self._embedder = embedder
+        self._index = index
+        self._threshold = threshold
+        self._max_history = max_history
+
+        self.hits = 0
+        self.misses = 0
+
+    def applicable(self, history_length: int) -> bool:
+        return history_length <= self._max_history
+
+    def _nearest(self, text: str) -> Tuple[np.ndarray, Optional[Tuple[float, str]]]:
+        vector = self._embedder.encode([text])[0]
+        best = self._index.search(vector, k=1)
+        return vector, best[0] if best else None
+
+    async def lookup(self, text: str) -> Optional[str]:
+        """
+        Ответ на близкий по смыслу вопрос
+
+        Args:
+            text: Вопрос клиента
+
+        Returns:
+            Закэшированный ответ или None
+        """
+        # кодирование и полный просмотр индекса - десятки мс CPU, не в event loop
+        _, best = await asyncio.to_thread(self._nearest, text)
+        if best is not None and best[0] >= self._threshold:
+            self.hits += 1
+            logger.debug(f"Семантический кэш: попадание, score={best[0]:.3f}")
+            return best[1]
+        self.misses += 1
+        return None
+
+    async def store(self, text: str, answer: str) -> None:
+        """Запомнить ответ, если близкого вопроса в индексе еще нет"""
+        vector, best = await asyncio.to_thread(self._nearest, text)
+        if best is not None and best[0] >= self._threshold:
+            return
+        await asyncio.to_thread(self._index.add, vector, answer)
+
+    def flush(self) -> None:
+        self._index.flush()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "threshold": self._threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
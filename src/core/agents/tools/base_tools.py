@@ -39,10 +39,8 @@ async def save_message(
     if isinstance(db, Database):
         db = db.get()
 
-    if not await db.client_exists(tg_id):
-        return False
-
-    return await db.update_message_history(tg_id, source, message)
+    # нет клиента - запрос не найдет строку и вернет False, без отдельного client_exists
+    return await db.append_message(tg_id, source, message)
 
 @tool(parse_docstring=True)
 async def update_client_field(
@@ -97,9 +95,6 @@ async def update_client_field(
     if not valid_fields:
         return False
 
-    if not await db.client_exists(tg_id):
-        return False
-
     return await db.update_client_fields(tg_id, **valid_fields)
 
 @tool(parse_docstring=True)
@@ -121,9 +116,6 @@ async def update_client_lead(
     if isinstance(db, Database):
         db = db.get()
 
-    if not await db.client_exists(tg_id):
-        return False
-    
     return await db.update_lead_status(
         tg_id=tg_id, new_status=lead_status
     )
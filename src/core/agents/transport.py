@@ -0,0 +1,157 @@
+from collections import defaultdict
+from typing import Any, Dict
+
+import httpx
+from loguru import logger
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class TransportStats:
+    """Счетчики соединений одного бэкенда по trace-событиям httpcore"""
+
+    def __init__(self):
+        self.requests = 0
+        self.http2_requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event.endswith("send_request_headers.started"):
+            self.requests += 1
+            if event.startswith("http2."):
+                self.http2_requests += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "http2_requests": self.http2_requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_rate": 1 - self.new_connections / self.requests if self.requests else 0.0,
+        }
+
+
+class LLMTransport:
+    """
+    Общий пул соединений для HTTP-клиентов LLM-бэкендов.
+
+    На бэкенд - один AsyncHTTPTransport с явными лимитами и keep-alive,
+    его делят все клиенты этого бэкенда. HTTP/2 включается, если он разрешен
+    в конфиге и установлен h2; для http:// (локальный Ollama) httpx все
+    равно говорит HTTP/1.1. Повторное использование соединений считается
+    по trace-событиям httpcore.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 50,
+        keepalive_expiry: float = 300.0,
+        http2: bool = True,
+    ):
+        if getattr(self, "_transport_initialized", False):
+            return
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = http2 and _http2_available()
+        if http2 and not self._http2:
+            logger.warning("⚠ HTTP/2 для LLM выключен: не установлен пакет h2")
+        self._transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+        self._stats: defaultdict[str, TransportStats] = defaultdict(TransportStats)
+        self._transport_initialized = True
+
+    @classmethod
+    def from_config(cls) -> "LLMTransport":
+        if cls._instance is not None and getattr(cls._instance, "_transport_initialized", False):
+            return cls._instance
+        from data.init_configs import get_config
+        llm_config = get_config().BASE_LLM_CONFIG
+        return cls(
+            max_connections=llm_config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=llm_config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=llm_config.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            http2=llm_config.HTTP2,
+        )
+
+    def transport(self, backend: str, *, verify: Any = True, cert: Any = None) -> httpx.AsyncHTTPTransport:
+        """Пул соединений бэкенда; TLS-настройки берутся при первом вызове"""
+        transport = self._transports.get(backend)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                verify=verify,
+                cert=cert,
+                http2=self._http2,
+                limits=self._limits,
+            )
+            self._transports[backend] = transport
+        return transport
+
+    def client_kwargs(self, backend: str, *, verify: Any = True, cert: Any = None) -> dict:
+        """Аргументы httpx.AsyncClient, подключающие клиента к пулу бэкенда"""
+        stats = self._stats[backend]
+
+        async def attach_trace(request: httpx.Request) -> None:
+            request.extensions["trace"] = stats.trace
+
+        return {
+            "transport": self.transport(backend, verify=verify, cert=cert),
+            "event_hooks": {"request": [attach_trace]},
+        }
+
+    def client(self, backend: str, **kwargs) -> httpx.AsyncClient:
+        """httpx.AsyncClient поверх пула бэкенда; verify и cert уходят в транспорт"""
+        verify = kwargs.pop("verify", True)
+        cert = kwargs.pop("cert", None)
+        return httpx.AsyncClient(**kwargs, **self.client_kwargs(backend, verify=verify, cert=cert))
+
+    def stats(self) -> dict:
+        return {backend: stats.as_dict() for backend, stats in self._stats.items()}
+
+    async def aclose(self) -> None:
+        for transport in self._transports.values():
+            await transport.aclose()
+        self._transports.clear()
+
+
+def pool_gigachat_client(llm: Any, transport: LLMTransport, backend: str) -> bool:
+    """
+    Подменить httpx-клиенты SDK GigaChat (API и авторизации) клиентами
+    поверх общего пула. Настройки адресов и TLS берутся из самого SDK.
+
+    Returns:
+        False, если у SDK нет ожидаемых точек расширения - остаются его клиенты
+    """
+    try:
+        from gigachat.client import _get_auth_kwargs, _get_kwargs
+
+        sdk = llm._client
+        settings = sdk._settings
+        # _aclient и _auth_aclient - cached_property: значение в __dict__ их перекрывает
+        sdk.__dict__["_aclient"] = transport.client(backend, **_get_kwargs(settings))
+        sdk.__dict__["_auth_aclient"] = transport.client(f"{backend}:auth", **_get_auth_kwargs(settings))
+        return True
+    except (ImportError, AttributeError) as exp:
+        logger.warning(f"⚠ Пул соединений для {backend} не подключен: {exp}")
+        return False
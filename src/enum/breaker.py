@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+class BreakerState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
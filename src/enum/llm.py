@@ -0,0 +1,8 @@
+from enum import StrEnum
+
+class LatencyDistribution(StrEnum):
+    FIXED = "fixed"
+    UNIFORM = "uniform"
+    NORMAL = "normal"
+    LOGNORMAL = "lognormal"
+    EXPONENTIAL = "exponential"
@@ -0,0 +1,21 @@
+from enum import StrEnum
+
+class QueueBackend(StrEnum):
+    MEMORY = "memory"
+    REDIS = "redis"
+
+class OverloadPolicy(StrEnum):
+    REJECT = "reject"
+    SPILL = "spill"
+    DROP_OLDEST = "drop_oldest"
+
+class AdmissionResult(StrEnum):
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+    SPILLED = "spilled"
+    DROPPED_OLDEST = "dropped_oldest"
+
+class PriorityClass(StrEnum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
@@ -21,3 +21,19 @@ class AgentExecutionException(AgentException):
 class LLMException(AgentException):
     def __init__(self, agent: AgentEnum, exp: Exception, message: str):
         super().__init__(message=message, agent=agent, exp=exp)
+
+class LimiterRejectedException(Exception):
+    def __init__(self, backend: str, queue_timeout: float | None):
+        self.backend = backend
+        self.queue_timeout = queue_timeout
+        super().__init__(f"[{backend}] Запрос отклонен: нет слота за {queue_timeout} с")
+
+class BackendUnavailableException(Exception):
+    def __init__(self, backends: list[str]):
+        self.backends = backends
+        super().__init__(f"Все LLM-бэкенды недоступны (автомат разомкнут): {', '.join(backends)}")
+
+class MockLLMException(Exception):
+    def __init__(self, backend: str):
+        self.backend = backend
+        super().__init__(f"[{backend}] Имитация ошибки LLM-бэкенда")
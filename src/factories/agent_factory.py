@@ -6,11 +6,15 @@ class AgentFactory:
     async def lc_create_agent(self, llm, system_prompt: SystemMessage) -> Runnable:
         from data.init_configs import get_config
         cfg = get_config()
+        response_format = getattr(llm, "_response_format", None)
+        if isinstance(response_format, dict) and "schema" in response_format:
+            # формат BaseLLM.with_structured_output - create_agent ждет саму схему
+            response_format = response_format["schema"]
         agent = create_agent(
-            model=llm,
+            model=cfg.MIDDLEWARE_SERVICE.chat_model(llm),
             system_prompt=system_prompt,
             middleware=cfg.MIDDLEWARE_SERVICE.middlewares,
-            response_format=getattr(llm, "_response_format", None),
+            response_format=response_format,
         )
 
         return agent
\ No newline at end of file
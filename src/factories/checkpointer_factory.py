@@ -0,0 +1,64 @@
+from loguru import logger
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.enum.client import Source
+from src.models.client_model import ClientModel
+from src.models.messages import BaseMessage
+
+# типы из State графа: без явного разрешения msgpack предупреждает при чтении,
+# а с LANGGRAPH_STRICT_MSGPACK=true не восстанавливает их вовсе
+CHECKPOINT_TYPES = (BaseMessage, ClientModel, Source)
+
+
+class CheckpointerFactory:
+    @staticmethod
+    def serde() -> JsonPlusSerializer:
+        """Сериализатор чекпоинтов с разрешенными типами State"""
+        return JsonPlusSerializer(
+            allowed_msgpack_modules=[(cls.__module__, cls.__name__) for cls in CHECKPOINT_TYPES]
+        )
+
+    @staticmethod
+    async def create(db_config) -> BaseCheckpointSaver:
+        """
+        Создает checkpointer для графа в той же БД, что и репозиторий клиентов
+        
+        Args:
+            db_config: DBConfig (DB_TYPE, CHECKPOINT_SQLITE_PATH, url)
+            
+        Returns:
+            AsyncSqliteSaver, AsyncPostgresSaver или InMemorySaver,
+            если пакет checkpointer'а не установлен
+        """
+        try:
+            if db_config.DB_TYPE == "sqlite":
+                import aiosqlite
+                from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+                conn = await aiosqlite.connect(db_config.CHECKPOINT_SQLITE_PATH)
+                saver = AsyncSqliteSaver(conn, serde=CheckpointerFactory.serde())
+                logger.info(f"✓ Checkpointer SQLite: {db_config.CHECKPOINT_SQLITE_PATH}")
+            else:
+                from psycopg.rows import dict_row
+                from psycopg_pool import AsyncConnectionPool
+                from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+                pool = AsyncConnectionPool(
+                    db_config.url.replace("+asyncpg", ""),
+                    kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+                    open=False,
+                )
+                await pool.open()
+                saver = AsyncPostgresSaver(pool, serde=CheckpointerFactory.serde())
+                logger.info("✓ Checkpointer PostgreSQL")
+        except ImportError as exp:
+            logger.warning(
+                f"⚠ Checkpointer для {db_config.DB_TYPE} недоступен ({exp}), "
+                "прогоны не переживут рестарт"
+            )
+            return InMemorySaver(serde=CheckpointerFactory.serde())
+
+        await saver.setup()
+        return saver
@@ -0,0 +1,32 @@
+from src.enum.queue import QueueBackend
+from src.app.ingress import EventQueue, MemoryEventQueue, RedisStreamEventQueue
+
+class QueueFactory:
+    @staticmethod
+    def create(backend: QueueBackend, config) -> EventQueue:
+        """
+        Создает входящую очередь сообщений в зависимости от бэкенда
+        
+        Args:
+            backend: Тип очереди
+            config: ConfigRegistry с BASE_CONFIG, REDIS_CONFIG и redis_client
+            
+        Returns:
+            Экземпляр EventQueue (MemoryEventQueue или RedisStreamEventQueue)
+        """
+        if backend == QueueBackend.MEMORY:
+            return MemoryEventQueue(maxsize=config.BASE_CONFIG.MAX_CONCURRENT_EXECUTE)
+        elif backend == QueueBackend.REDIS:
+            redis_config = config.REDIS_CONFIG
+            return RedisStreamEventQueue(
+                config.redis_client,
+                stream=redis_config.REDIS_STREAM_NAME,
+                group=redis_config.REDIS_STREAM_GROUP,
+                consumer=redis_config.REDIS_STREAM_CONSUMER,
+                partitions=redis_config.REDIS_STREAM_PARTITIONS,
+                owned_partitions=redis_config.REDIS_STREAM_OWNED_PARTITIONS,
+                maxlen=redis_config.REDIS_STREAM_MAXLEN,
+                claim_idle_ms=redis_config.REDIS_STREAM_CLAIM_IDLE_MS,
+            )
+        else:
+            raise ValueError(f"Неподдерживаемый тип очереди: {backend}")
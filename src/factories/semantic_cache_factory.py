@@ -0,0 +1,42 @@
+from typing import Optional, TYPE_CHECKING
+from loguru import logger
+
+if TYPE_CHECKING:
+    from src.core.agents.semantic_cache import SemanticCache
+
+class SemanticCacheFactory:
+    @staticmethod
+    def create(base_config) -> Optional["SemanticCache"]:
+        """
+        Создает семантический кэш диалогового агента
+
+        Args:
+            base_config: BaseConfig с настройками SEMANTIC_CACHE_*
+
+        Returns:
+            SemanticCache или None, если путь к модели не задан
+            или модель не загрузилась
+        """
+        if not base_config.SEMANTIC_CACHE_MODEL_PATH:
+            return None
+
+        try:
+            from src.core.agents.semantic_cache import SemanticCache, SentenceEmbedder, VectorIndex
+
+            embedder = SentenceEmbedder(base_config.SEMANTIC_CACHE_MODEL_PATH)
+            index = VectorIndex(
+                embedder.dim,
+                max_entries=base_config.SEMANTIC_CACHE_MAX_ENTRIES,
+                path=base_config.SEMANTIC_CACHE_INDEX_PATH or None,
+            )
+        except (ImportError, OSError, ValueError) as exp:
+            logger.warning(f"⚠ Семантический кэш отключен: {exp}")
+            return None
+
+        logger.info(f"✓ Семантический кэш: {base_config.SEMANTIC_CACHE_MODEL_PATH}, записей {len(index)}")
+        return SemanticCache(
+            embedder=embedder,
+            index=index,
+            threshold=base_config.SEMANTIC_CACHE_THRESHOLD,
+            max_history=base_config.SEMANTIC_CACHE_MAX_HISTORY,
+        )
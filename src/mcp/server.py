@@ -40,10 +40,8 @@ async def save_message_to_db(
 
     db_repo = await get_database_repo()
 
-    if not await db_repo.client_exists(tg_id):
-        return False
-
-    return await db_repo.update_message_history(tg_id, source, message)
+    # нет клиента - запрос не найдет строку и вернет False, без отдельного client_exists
+    return await db_repo.append_message(tg_id, source, message)
 
 @server.tool   
 async def update_client_field(
@@ -81,9 +79,6 @@ async def update_client_field(
     if not valid_fields:
         return False
 
-    if not await db_repo.client_exists(tg_id):
-        return False
-
     return await db_repo.update_client_fields(tg_id, **valid_fields)
 
 @server.tool
@@ -103,9 +98,6 @@ async def update_client_lead(
     """
     db_repo = await get_database_repo()
 
-    if not await db_repo.client_exists(tg_id):
-        return False
-    
     return await db_repo.update_lead_status(
         tg_id=tg_id, new_status=lead_status
     )
@@ -1,6 +1,7 @@
 from .client_model import ClientModel
 from .messages import BaseMessage
+from .research import ResearchResult
 
 __all__ = [
-    'BaseMessage', "ClientModel"
+    'BaseMessage', "ClientModel", 'ResearchResult'
 ]
\ No newline at end of file
@@ -15,6 +15,8 @@ class ClientModel(BaseModel):
         client_project_info (Optional[str]): Минимальная информация о проекте клиента
         lead_status (str): Статус лида: new, qualified, not_interested
         message_history (List[BaseMessage]): История сообщений клиента
+        history_summary (Optional[str]): Резюме первых summarized_count сообщений истории
+        summarized_count (int): Сколько сообщений истории свернуто в резюме
     """
     tg_id: Optional[int] = Field(
         default=None,
@@ -58,6 +60,8 @@ class ClientModel(BaseModel):
     # Business
     lead_status: str = Field(default="new", description="Статус лида: new, qualified, not_interested")
     message_history: Union[List[BaseMessage], None] = Field(default_factory=list, description="История сообщений клиента")
+    history_summary: Optional[str] = Field(default=None, description="Скользящее резюме старой части истории")
+    summarized_count: int = Field(default=0, ge=0, description="Сколько первых сообщений истории свернуто в резюме")
 
     @field_validator("tg_id", mode="before")
     @classmethod
@@ -66,6 +70,11 @@ class ClientModel(BaseModel):
             return v
         return int(v)
 
+    @field_validator("summarized_count", mode="before")
+    @classmethod
+    def parse_summarized_count(cls, v):
+        return v or 0
+
     @field_validator("full_name", mode="before")
     @classmethod
     def normalize_full_name(cls, v):
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List
 from src.enum.client import Source
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -10,3 +11,27 @@ class BaseMessage(BaseModel):
     tg_id: int | str | None = None
     tg_nick: str | None = None
     timestamp: datetime = Field(default_factory=datetime.now)
+    # unix time, к которому ответ еще имеет смысл; выставляется на вебхуке
+    deadline: float | None = None
+
+
+def merge_messages(messages: List[BaseMessage]) -> BaseMessage:
+    """
+    Склеивает пачку подряд идущих сообщений одного клиента в одно
+    
+    Args:
+        messages: Сообщения в порядке поступления
+        
+    Returns:
+        BaseMessage с объединенным текстом и данными последнего сообщения;
+        дедлайн - самый ранний в пачке, иначе пачка продлила бы срок первых сообщений
+    """
+    if len(messages) == 1:
+        return messages[0]
+
+    last = messages[-1]
+    deadlines = [msg.deadline for msg in messages if msg.deadline is not None]
+    return last.model_copy(update={
+        "content": "\n".join(msg.content for msg in messages if msg.content),
+        "deadline": min(deadlines) if deadlines else None,
+    })
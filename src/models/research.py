@@ -0,0 +1,20 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class ResearchResult(BaseModel):
+    """
+    Structured output ResearchAgent
+
+    Args:
+        lead_status (str): Статус лида: new, qualified, not_interested
+        should_continue_dialog (bool): Нужно ли отвечать клиенту
+        client_project_info (Optional[str]): Уточненная информация о проекте клиента
+    """
+    lead_status: str = Field(default="new", description="Статус лида: new, qualified, not_interested")
+    should_continue_dialog: bool = Field(default=True, description="Нужно ли отвечать клиенту")
+    client_project_info: Optional[str] = Field(
+        default=None,
+        min_length=5,
+        max_length=300,
+        description="Уточненная информация о проекте клиента"
+    )
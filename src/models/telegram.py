@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.enum.client import Source
+from src.models.messages import BaseMessage
+
+
+class TelegramUser(BaseModel):
+    """Поле from сообщения Telegram, только используемые ключи"""
+    id: int
+    username: Optional[str] = None
+
+
+class TelegramMessage(BaseModel):
+    """Сообщение Telegram, только используемые ключи"""
+    model_config = ConfigDict(populate_by_name=True)
+
+    from_user: Optional[TelegramUser] = Field(default=None, alias="from")
+    date: Optional[int] = None
+    text: str = ""
+
+
+class TelegramUpdate(BaseModel):
+    """
+    Обновление Telegram
+
+    Разбирается сразу из тела запроса через model_validate_json: ключи,
+    которые мы не используем, пропускаются парсером без создания объектов.
+    """
+    update_id: int
+    message: Optional[TelegramMessage] = None
+    edited_message: Optional[TelegramMessage] = None
+    channel_post: Optional[TelegramMessage] = None
+
+    @property
+    def payload(self) -> Optional[TelegramMessage]:
+        return self.message or self.edited_message or self.channel_post
+
+
+def to_base_message(message: TelegramMessage) -> BaseMessage:
+    """
+    Конвертирует TelegramMessage в BaseMessage без повторной валидации
+
+    Args:
+        message: Уже провалидированное сообщение Telegram
+
+    Returns:
+        BaseMessage от клиента
+    """
+    user = message.from_user
+    return BaseMessage.model_construct(
+        timestamp=datetime.fromtimestamp(message.date) if message.date else datetime.now(),
+        source=Source.CLIENT,
+        content=message.text,
+        tg_nick=(user.username or "") if user else "",
+        tg_id=user.id if user else None,
+    )
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import TypedDict
+
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.enum.client import Source
+from src.models.client_model import ClientModel
+from src.models.messages import BaseMessage
+from src.factories.checkpointer_factory import CheckpointerFactory
+
+
+class _State(TypedDict):
+    message: BaseMessage | None
+    preprocessed_data: dict | None
+    response: str | None
+
+
+def _graph(checkpointer: InMemorySaver):
+    async def preprocess(state: _State) -> _State:
+        message = state["message"]
+        client = ClientModel(tg_id=message.tg_id, message_history=[message])
+        return {**state, "preprocessed_data": {"client_data": client}}
+
+    async def dialog(state: _State) -> _State:
+        client = state["preprocessed_data"]["client_data"]
+        assert isinstance(client, ClientModel)
+        assert client.message_history[0].source is Source.CLIENT
+        return {**state, "response": client.message_history[0].content}
+
+    builder = StateGraph(_State)
+    builder.add_node("preprocess", preprocess)
+    builder.add_node("dialog", dialog)
+    builder.add_edge(START, "preprocess")
+    builder.add_edge("preprocess", "dialog")
+    builder.add_edge("dialog", END)
+    # остановка после preprocess имитирует рестарт посреди прогона
+    return builder.compile(checkpointer=checkpointer, interrupt_before=["dialog"])
+
+
+def test_resume_deserializes_state_without_warnings(caplog):
+    graph = _graph(InMemorySaver(serde=CheckpointerFactory.serde()))
+    config = {"configurable": {"thread_id": "tg:1:0"}}
+    message = BaseMessage(content="привет", source=Source.CLIENT, tg_id=1)
+
+    async def run():
+        await graph.ainvoke({"message": message, "preprocessed_data": None, "response": None}, config)
+        return await graph.ainvoke(None, config)
+
+    with caplog.at_level(logging.WARNING, logger="langgraph"):
+        result = asyncio.run(run())
+
+    assert result["response"] == "привет"
+    assert not [record for record in caplog.records if "unregistered" in record.getMessage()]
@@ -0,0 +1,37 @@
+from langchain.messages import HumanMessage, SystemMessage
+
+from src.core.agents.context import MESSAGE_OVERHEAD_TOKENS, TokenCounter, fit_history
+from src.enum.client import Source
+from src.models.messages import BaseMessage
+
+
+class _OneTokenCounter(TokenCounter):
+    def _encode_len(self, text: str) -> int:
+        return 1 - MESSAGE_OVERHEAD_TOKENS
+
+
+def _history(size: int) -> list[BaseMessage]:
+    return [
+        BaseMessage(content=f"сообщение {i}", source=Source.CLIENT if i % 2 else Source.AGENT, tg_id=1)
+        for i in range(size)
+    ]
+
+
+def test_window_rounding_keeps_most_of_what_fits():
+    # 9 сообщений, бюджет на 8, шаг 8: округление до шага оставило бы одно
+    messages = fit_history(_history(9), budget=8, counter=_OneTokenCounter(), window_step=8)
+
+    kept = [msg for msg in messages if not isinstance(msg, SystemMessage)]
+    assert len(kept) >= 4
+    assert kept[-1].content == "сообщение 8"
+
+
+def test_window_start_moves_by_step():
+    counter = _OneTokenCounter()
+    first = fit_history(_history(30), budget=20, counter=counter, window_step=8)
+    second = fit_history(_history(31), budget=20, counter=counter, window_step=8)
+
+    first_kept = [msg.content for msg in first if isinstance(msg, HumanMessage)]
+    second_kept = [msg.content for msg in second if isinstance(msg, HumanMessage)]
+    # новое сообщение не сдвинуло начало окна - префикс промпта тот же
+    assert second_kept[:len(first_kept)] == first_kept
@@ -0,0 +1,30 @@
+import asyncio
+
+from src.app.fair_scheduler import FairScheduler
+
+
+def test_first_get_serves_high_priority():
+    async def run():
+        scheduler = FairScheduler({"high": 3, "normal": 2, "low": 1})
+        scheduler.set_priority("lead", "qualified")
+        scheduler.set_priority("cold", "not_interested")
+        scheduler.put_nowait("new_user")
+        scheduler.put_nowait("cold")
+        scheduler.put_nowait("lead")
+        return await scheduler.get()
+
+    assert asyncio.run(run()) == "lead"
+
+
+def test_classes_are_served_by_weight():
+    async def run():
+        scheduler = FairScheduler({"high": 3, "normal": 2, "low": 1})
+        for i in range(6):
+            for status in ("qualified", "new", "not_interested"):
+                key = f"{status}:{i}"
+                scheduler.set_priority(key, status)
+                scheduler.put_nowait(key)
+        return [(await scheduler.get()).split(":")[0] for _ in range(6)]
+
+    order = asyncio.run(run())
+    assert order == ["qualified"] * 3 + ["new"] * 2 + ["not_interested"]
@@ -0,0 +1,48 @@
+import asyncio
+from collections import Counter
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain.agents.middleware.types import ModelRequest
+
+from src.core.agents import breaker
+from src.core.agents.breaker import BreakerFallbackMiddleware, CircuitBreaker, backend_of, register_backend
+from src.core.agents.hedging import HedgingMiddleware
+from utils import deadline
+
+
+def _model(name: str) -> GenericFakeChatModel:
+    model = GenericFakeChatModel(messages=iter([]))
+    register_backend(name, model)
+    breaker._breakers[name] = CircuitBreaker(name)
+    return model
+
+
+def test_failed_hedge_does_not_fall_back_to_primary():
+    deadline._retry_budget = deadline.RetryBudget()
+    primary, secondary = _model("primary"), _model("secondary")
+    hedging = HedgingMiddleware(primary, secondary, min_samples=1)
+    hedging._record(primary, 0.01)
+    fallback = BreakerFallbackMiddleware(primary, secondary)
+    calls = Counter()
+
+    async def model_call(request):
+        calls[backend_of(request.model)] += 1
+        if request.model is secondary:
+            raise RuntimeError("secondary down")
+        await asyncio.sleep(0.05)
+        return AIMessage(content="ok")
+
+    async def run():
+        request = ModelRequest(model=primary, messages=[HumanMessage(content="привет")])
+        return await hedging.awrap_model_call(
+            request, lambda req: fallback.awrap_model_call(req, model_call)
+        )
+
+    response = asyncio.run(run())
+
+    assert response.content == "ok"
+    assert hedging.hedged == 1
+    assert calls == {"primary": 1, "secondary": 1}
+    # у хеджа был только свой бэкенд - запасной повтор не понадобился
+    assert deadline._retry_budget.granted["fallback"] == 0
@@ -0,0 +1,41 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain.agents.middleware.types import ModelRequest
+
+from src.core.agents import breaker, limiter
+from src.core.agents.breaker import BreakerFallbackMiddleware, CircuitBreaker, register_backend
+from src.core.agents.limiter import AdaptiveLimiter, LimiterMiddleware
+from utils import deadline
+
+
+def _model(name: str) -> GenericFakeChatModel:
+    model = GenericFakeChatModel(messages=iter([]))
+    register_backend(name, model)
+    breaker._breakers[name] = CircuitBreaker(name)
+    limiter._limiters[name] = AdaptiveLimiter(name, initial=4)
+    return model
+
+
+def test_fallback_error_is_sampled_by_failed_backend():
+    deadline._retry_budget = deadline.RetryBudget()
+    primary, secondary = _model("primary"), _model("secondary")
+    fallback = BreakerFallbackMiddleware(primary, secondary)
+    limiter_middleware = LimiterMiddleware()
+
+    async def model_call(request):
+        if request.model is primary:
+            raise RuntimeError("primary down")
+        return AIMessage(content="ok")
+
+    async def run():
+        request = ModelRequest(model=primary, messages=[HumanMessage(content="привет")])
+        return await fallback.awrap_model_call(
+            request, lambda req: limiter_middleware.awrap_model_call(req, model_call)
+        )
+
+    assert asyncio.run(run()).content == "ok"
+    assert limiter._limiters["primary"].stats()["errors"] == 1
+    assert limiter._limiters["secondary"].stats()["completed"] == 1
+    assert limiter._limiters["secondary"].stats()["errors"] == 0
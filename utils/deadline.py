@@ -0,0 +1,121 @@
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# абсолютный дедлайн текущего сообщения (unix time), None - без дедлайна
+_deadline: ContextVar[Optional[float]] = ContextVar("message_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """Вызовы внутри блока, включая запущенные из него задачи, видят этот дедлайн"""
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Секунды до дедлайна текущего сообщения, None - дедлайна нет"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+class RetryBudget:
+    """
+    Общий на процесс бюджет повторов для всех слоев ретраев.
+
+    Каждое входящее сообщение добавляет `ratio` токенов, сверх того бюджет
+    пополняется на `min_per_second` в секунду, чтобы при малом трафике
+    повторы оставались возможны. Каждый повтор любого слоя забирает токен;
+    пустой бюджет или истекший дедлайн сообщения повтор запрещают.
+    Так плохая минута дает не больше ~`ratio` лишних вызовов на сообщение.
+    """
+
+    def __init__(self, *, ratio: float = 0.5, min_per_second: float = 1.0, max_tokens: float = 100.0):
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        # Celery и asyncio.to_thread тоже могут повторять
+        self._lock = threading.Lock()
+
+        self.messages = 0
+        self.granted: defaultdict[str, int] = defaultdict(int)
+        self.denied_budget: defaultdict[str, int] = defaultdict(int)
+        self.denied_deadline: defaultdict[str, int] = defaultdict(int)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._max_tokens, self._tokens + (now - self._updated) * self._min_per_second)
+        self._updated = now
+
+    def on_message(self) -> None:
+        """Новое входящее сообщение пополняет бюджет"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+            self.messages += 1
+
+    def allow(self, layer: str, delay: float = 0.0) -> bool:
+        """
+        Можно ли повторить вызов
+
+        Args:
+            layer: Слой ретраев для метрик (execute, fallback, tool, send)
+            delay: Пауза перед повтором; повтор после дедлайна не нужен
+        """
+        left = remaining()
+        with self._lock:
+            if left is not None and left <= delay:
+                self.denied_deadline[layer] += 1
+                return False
+            self._refill()
+            if self._tokens < 1:
+                self.denied_budget[layer] += 1
+                return False
+            self._tokens -= 1
+            self.granted[layer] += 1
+            return True
+
+    def stats(self) -> dict:
+        retries = sum(self.granted.values())
+        return {
+            "messages": self.messages,
+            "tokens": self._tokens,
+            "retries": dict(self.granted),
+            "denied_budget": dict(self.denied_budget),
+            "denied_deadline": dict(self.denied_deadline),
+            # сколько лишних вызовов приходится на одно сообщение
+            "amplification": retries / self.messages if self.messages else 0.0,
+        }
+
+
+_retry_budget: Optional[RetryBudget] = None
+
+
+def get_retry_budget() -> RetryBudget:
+    global _retry_budget
+    if _retry_budget is None:
+        from data.init_configs import get_config
+        base_config = get_config().BASE_CONFIG
+        _retry_budget = RetryBudget(
+            ratio=base_config.RETRY_BUDGET_RATIO,
+            min_per_second=base_config.RETRY_BUDGET_MIN_PER_SECOND,
+            max_tokens=base_config.RETRY_BUDGET_MAX_TOKENS,
+        )
+    return _retry_budget
+
+
+def allow_retry(layer: str, delay: float = 0.0) -> bool:
+    """Повтор в слое `layer` укладывается в дедлайн сообщения и общий бюджет"""
+    return get_retry_budget().allow(layer, delay)
@@ -4,6 +4,8 @@ import random
 from functools import wraps
 from typing import Callable, TypeVar, Any
 
+from utils.deadline import allow_retry
+
 T = TypeVar("T")
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,8 @@ def retry_async(
     *,
     max_delay: float | None = None,
     retry_on: tuple[type[Exception], ...] = (Exception,),
+    no_retry_on: tuple[type[Exception], ...] = (),
+    layer: str | None = None,
     on_retry: Callable[[int, Exception], None] | None = None,
 ):
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
@@ -28,8 +32,11 @@ def retry_async(
                 except asyncio.CancelledError:
                     raise
 
+                except no_retry_on:
+                    raise
+
                 except retry_on as e:
-                    if attempt >= attempts:
+                    if attempt >= attempts or not allow_retry(layer or func.__name__, current_delay):
                         logger.error(
                             "Retry failed",
                             extra={